@@ -1,4 +1,5 @@
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
 import functools
 
 # Abstract class declaration
@@ -90,3 +91,38 @@ class BaseBackend(ABC):
         environment.
         """
         pass
+
+    def execute_graphs(self, generators):
+        """
+        Runs several RDataFrame graphs. Backends able to process them in a
+        single submission should override it, the default implementation
+        runs every graph with its own backend, one after the other.
+
+        Args:
+            generators (list): Instances of :obj:`CallableGenerator` of the
+                graphs.
+        """
+        for generator in generators:
+            generator.head_node.backend.execute(generator)
+
+    @contextmanager
+    def job_group(self, job_id):
+        """
+        Context manager that tags the work submitted by the current thread
+        with an identifier, so that it can be cancelled with `cancel_job`.
+        Backends that cannot cancel work do nothing.
+
+        Args:
+            job_id (str): Identifier of the work.
+        """
+        yield
+
+    def cancel_job(self, job_id):
+        """
+        Cancels the work tagged with an identifier by `job_group`. Backends
+        that cannot cancel work let it finish.
+
+        Args:
+            job_id (str): Identifier of the work.
+        """
+        pass
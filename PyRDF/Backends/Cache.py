@@ -0,0 +1,239 @@
+"""
+Content-addressed cache of the results of distributed executions.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from PyRDF import GraphSerializer
+
+logger = logging.getLogger(__name__)
+
+
+# Prefixes of the URLs of files that are not on the local file system
+REMOTE_PREFIXES = ("root:", "http:", "https:")
+
+
+def _remote_file_fingerprint(filename):
+    """
+    Identifies the current version of a remote ROOT file, which cannot be
+    inspected with `os.stat`. Its size, unique identifier and modification
+    date are read from its header with ROOT.
+
+    Args:
+        filename (str): URL of the file.
+
+    Returns:
+        tuple: The fingerprint of the file.
+
+    Raises:
+        IOError: If the file cannot be opened.
+    """
+    import ROOT
+
+    tfile = ROOT.TFile.Open(filename)
+    if not tfile or tfile.IsZombie():
+        raise IOError("Cannot open {} to fingerprint it".format(filename))
+
+    try:
+        return (filename, tfile.GetSize(), tfile.GetUUID().AsString(),
+                tfile.GetModificationDate().AsSQLString())
+    finally:
+        tfile.Close()
+
+
+def file_fingerprint(filename):
+    """
+    Identifies the current version of a file by its name, size and last
+    modification time. Remote ROOT files are identified by the size,
+    identifier and modification date stored in their header.
+
+    Args:
+        filename (str): Path or URL to the file.
+
+    Returns:
+        tuple: The fingerprint of the file.
+    """
+    if filename.startswith(REMOTE_PREFIXES):
+        return _remote_file_fingerprint(filename)
+
+    if not os.path.isfile(filename):
+        return (filename,)
+
+    stat = os.stat(filename)
+    return (filename, stat.st_size, stat.st_mtime)
+
+
+class EmptyFile(object):
+    """
+    Marker stored as the partial result of an input file without entries,
+    which produces no range and thus no value, so that it is not processed
+    again by the next executions.
+    """
+
+
+def get_action_paths(head_node):
+    """
+    Collects the action nodes of a graph together with the operations found
+    in the path from the head node to each of them.
+
+    Args:
+        head_node (PyRDF.Node): Head node of the graph.
+
+    Returns:
+        list: Pairs of action node and list of operations, in DFS order.
+    """
+    paths = []
+
+    def collect(node, operations):
+        for child in node.children:
+            child_operations = operations + [child.operation]
+            if child.operation.is_action():
+                paths.append((child, child_operations))
+            collect(child, child_operations)
+
+    collect(head_node, [])
+    return paths
+
+
+def make_key(operations, *fingerprints):
+    """
+    Builds the cache key of an action.
+
+    Args:
+        operations (list): Operations in the path from the head node to the
+            action.
+
+        *fingerprints: Any other picklable object that the result depends on,
+            like the fingerprint of the input dataset.
+
+    Returns:
+        str: Hexadecimal digest identifying the result of the action.
+    """
+    payload = pickle.dumps(
+        (GraphSerializer.operations_hash(operations),) + fingerprints,
+        protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha1(payload).hexdigest()
+
+
+class ResultCache(object):
+    """
+    Stores pickled action results (mergeable values) in a local directory,
+    one file per key. When the total size of the directory goes above the
+    limit, the least recently used entries are removed.
+
+    Attributes:
+        directory (str): Path to the directory holding the cached results.
+
+        max_size (int): Maximum size of the cache in bytes.
+    """
+
+    EXTENSION = ".pkl"
+
+    def __init__(self, directory, max_size=2**30):
+        """
+        Creates a cache in the given directory.
+
+        Args:
+            directory (str): Path to the directory holding the cached results.
+                It is created if it doesn't exist.
+
+            max_size (int, optional): Maximum size of the cache in bytes.
+                Defaults to 1 GiB.
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        """Path to the file storing the value of the given key."""
+        return os.path.join(self.directory, key + ResultCache.EXTENSION)
+
+    def get(self, key):
+        """
+        Retrieves a cached value.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            The cached value, or :obj:`None` if the key is not in the cache.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                value = pickle.load(cache_file)
+        except (IOError, OSError):
+            return None
+        except Exception as e:
+            # Corrupted or incompatible entry, it will be computed again
+            logger.debug("Discarding cache entry %s: %s", key, e)
+            self._remove(path)
+            return None
+
+        # Update access time for the LRU policy
+        os.utime(path, None)
+        logger.debug("Cache hit for key %s", key)
+        return value
+
+    def put(self, key, value):
+        """
+        Stores a value in the cache and evicts old entries if needed.
+
+        Args:
+            key (str): The key of the value.
+
+            value: Any picklable object.
+        """
+        # Write to a temporary file first so that readers never see a
+        # partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                pickle.dump(value, cache_file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            # Values that cannot be pickled leave no file behind
+            self._remove(tmp_path)
+            raise
+
+        self._evict()
+
+    def _remove(self, path):
+        """Removes a cache entry, ignoring entries that are already gone."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache fits in its
+        maximum size.
+        """
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(ResultCache.EXTENSION):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Removed by another process in the meantime
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        # Oldest entries first
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            logger.debug("Evicting cache entry %s", path)
+            self._remove(path)
+            total_size -= size
@@ -0,0 +1,131 @@
+"""
+Encoding of the values sent back from the workers to the driver.
+"""
+import logging
+import pickle
+import zlib
+
+logger = logging.getLogger(__name__)
+
+
+class PackedValues(object):
+    """
+    List of values, e.g. the mergeable values computed for a range, pickled
+    together into a single binary blob which is optionally compressed with
+    zlib. Sending one blob instead of the individual values reduces the
+    serialization overhead, and the compression reduces the network volume
+    of sparse objects like mostly empty histograms.
+
+    The blob is only unpickled when the values are accessed for the first
+    time.
+
+    Attributes:
+        payload (bytes): The serialized values.
+
+        compression_level (int): The zlib compression level of the payload,
+            0 means no compression.
+    """
+
+    def __init__(self, values, compression_level=0):
+        """
+        Packs a list of values.
+
+        Args:
+            values (list): The values to be packed.
+
+            compression_level (int, optional): The zlib compression level,
+                from 0 (no compression) to 9.
+        """
+        payload = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+        if compression_level:
+            payload = zlib.compress(payload, compression_level)
+
+        self.payload = payload
+        self.compression_level = compression_level
+        self._values = values
+
+    def __getstate__(self):
+        """
+        Only the payload is pickled, not the unpacked values.
+
+        Returns:
+            dict: The payload and its compression level.
+        """
+        return {
+            "payload": self.payload,
+            "compression_level": self.compression_level
+        }
+
+    def __setstate__(self, state):
+        """
+        Restores the payload, the values are unpacked later on demand.
+
+        Args:
+            state (dict): The state dictionary created by `__getstate__`.
+        """
+        self.payload = state["payload"]
+        self.compression_level = state["compression_level"]
+        self._values = None
+
+    @property
+    def values(self):
+        """list: The unpacked values."""
+        if self._values is None:
+            payload = self.payload
+            if self.compression_level:
+                payload = zlib.decompress(payload)
+            self._values = pickle.loads(payload)
+        return self._values
+
+
+def unpack(values):
+    """
+    Retrieves a list of values that may have been packed.
+
+    Args:
+        values (list, PackedValues): The values.
+
+    Returns:
+        list: The unpacked values.
+    """
+    if isinstance(values, PackedValues):
+        return values.values
+    return values
+
+
+def pack_mapper(mapper, compression_level=0):
+    """
+    Wraps a mapper so that its values are returned packed.
+
+    Args:
+        mapper (function): A function that processes a range and returns a
+            list of values.
+
+        compression_level (int, optional): The zlib compression level.
+
+    Returns:
+        function: The wrapped mapper.
+    """
+    def packed_mapper(current_range):
+        return PackedValues(mapper(current_range), compression_level)
+
+    return packed_mapper
+
+
+def pack_reducer(reducer, compression_level=0):
+    """
+    Wraps a reducer so that it merges packed values and packs its result.
+
+    Args:
+        reducer (function): A function that merges two lists of values.
+
+        compression_level (int, optional): The zlib compression level.
+
+    Returns:
+        function: The wrapped reducer.
+    """
+    def packed_reducer(values_out, values_in):
+        return PackedValues(reducer(unpack(values_out), unpack(values_in)),
+                            compression_level)
+
+    return packed_reducer
@@ -2,19 +2,611 @@ from __future__ import print_function
 
 import collections
 import glob
+import itertools
 import logging
+import math
+import os
+import pickle
+import queue
+import threading
+import uuid
 import warnings
+from urllib.parse import quote
 from abc import abstractmethod
+from contextlib import contextmanager
 
 import numpy
 import ROOT
+from PyRDF import GraphOptimizer
+from PyRDF import Node
+from PyRDF import Profiler
 from PyRDF.Backends import Base
+from PyRDF.Backends import Cache
+from PyRDF.Backends import Codec
+from PyRDF.Backends import Histograms
+from PyRDF.Backends import Progress
+from PyRDF.Backends import Snapshots
+from PyRDF.Backends import Spill
 from PyRDF.Backends import Utils
+from PyRDF.Operation import Operation
 
 logger = logging.getLogger(__name__)
 
 Range = collections.namedtuple("Range",
-                               ["start", "end", "filelist", "friend_info"])
+                               ["start", "end", "filelist", "friend_info",
+                                "id"])
+
+
+def _merge_array_chunks(chunks):
+    """
+    Builds the final result of an `AsNumpy` operation out of the partial
+    results of every range. The partial arrays of each column are copied
+    following the order of the ranges into a single preallocated array, so
+    every entry is copied only once. Columns made of a single partial array
+    are not copied at all.
+
+    The partial arrays are released as soon as their column is merged, which
+    keeps the peak memory close to the size of the final result.
+
+    Args:
+        chunks (dict): Partial `AsNumpy` results (dictionaries of numpy
+            arrays) indexed by sortable keys that follow the order of the
+            ranges in the dataset. This dictionary is emptied.
+
+    Returns:
+        dict: The numpy arrays of every column.
+    """
+    partials = [chunks[key] for key in sorted(chunks)]
+    chunks.clear()
+
+    if not partials:
+        return {}
+
+    merged = {}
+    for column in list(partials[0]):
+        arrays = [partial.pop(column) for partial in partials]
+        if len(arrays) == 1:
+            # Nothing to concatenate, the array is used as it is
+            merged[column] = arrays[0]
+            continue
+
+        length = sum(len(array) for array in arrays)
+        merged[column] = result = numpy.empty(
+            (length,) + arrays[0].shape[1:],
+            dtype=numpy.result_type(*set(array.dtype for array in arrays)))
+
+        # Reversed so that the arrays can be released in order
+        arrays.reverse()
+        position = 0
+        while arrays:
+            array = arrays.pop()
+            result[position:position + len(array)] = array
+            position += len(array)
+
+    return merged
+
+
+def _get_array_file_name(column):
+    """
+    Builds the name of the `.npy` file of a column. Characters that are not
+    allowed in file names, like `/`, are escaped.
+
+    Args:
+        column (str): Name of the column.
+
+    Returns:
+        str: The file name.
+    """
+    return "{}.npy".format(quote(column, safe=""))
+
+
+def _write_array_chunk(columns, output_dir, rangeid):
+    """
+    Writes the `AsNumpy` result of a range to disk, one `.npy` file per
+    column in a directory of the range, so that the names of the files of
+    different ranges and columns never collide.
+
+    Args:
+        columns (dict): The numpy arrays of every column.
+
+        output_dir (str): Directory where the files are written.
+
+        rangeid (int): Identifier of the range, used to name the directory.
+
+    Returns:
+        dict: Paths to the file of every column.
+    """
+    range_dir = os.path.join(output_dir, "range_{}".format(rangeid))
+    os.makedirs(range_dir, exist_ok=True)
+
+    paths = {}
+    for column, array in columns.items():
+        paths[column] = os.path.join(range_dir, _get_array_file_name(column))
+        numpy.save(paths[column], array, allow_pickle=True)
+    return paths
+
+
+def _writes_files(node):
+    """
+    Checks whether the result of an action node is written to files.
+
+    Args:
+        node (PyRDF.Node.Node): An action node of the graph.
+
+    Returns:
+        bool: True for snapshots and `AsNumpy` operations writing their
+        arrays to disk, False otherwise.
+    """
+    operation = node.operation
+    return (operation.name == "Snapshot" or
+            (operation.name == "AsNumpy" and
+             bool(operation.kwargs.get("output_dir"))))
+
+
+def _is_delta_snapshot(node):
+    """
+    Checks whether an action node is a snapshot that only writes the columns
+    defined in the graph.
+
+    Args:
+        node (PyRDF.Node.Node): An action node of the graph.
+
+    Returns:
+        bool: True for snapshots with the `delta` option, False otherwise.
+    """
+    operation = node.operation
+    return (operation.name == "Snapshot" and
+            bool(operation.kwargs.get("delta")))
+
+
+def _has_histogram_model(node):
+    """
+    Checks whether an action node books a histogram with a model, whose
+    binning is the same in every range.
+
+    Args:
+        node (PyRDF.Node.Node): An action node of the graph.
+
+    Returns:
+        bool: True for `Histo1D`, `Histo2D` and `Histo3D` operations given a
+        model, False otherwise, e.g. for histograms binned automatically from
+        the values of every range.
+    """
+    operation = node.operation
+    return (operation.name in ("Histo1D", "Histo2D", "Histo3D") and
+            bool(operation.args) and
+            not isinstance(operation.args[0], str))
+
+
+def _copy_result(value):
+    """
+    Copies the result held by a (mergeable) value, so that later merges into
+    the value do not modify the copy.
+
+    Args:
+        value: A (mergeable) value with a `GetValue` method.
+
+    Returns:
+        The copied result.
+    """
+    result = value.GetValue()
+    if isinstance(result, (int, float, bool)):
+        # Python scalars are immutable
+        return result
+    if hasattr(result, "Clone"):
+        copy = result.Clone()
+        if hasattr(copy, "SetDirectory"):
+            # Not owned by the current directory
+            copy.SetDirectory(0)
+        return copy
+    # Other C++ objects, e.g. the vector of a `Take`, by copy constructor
+    return type(result)(result)
+
+
+def _get_ancestors(head_node, node):
+    """
+    Finds the nodes of the graph between the head node and a given node.
+    A node merged by the graph optimizer is found through the node it was
+    merged into.
+
+    Args:
+        head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+        node (PyRDF.Node.Node): A node of the graph, or the head node itself.
+
+    Returns:
+        list: The nodes on the path from the head node to the given node,
+        excluding both of them.
+
+    Raises:
+        ValueError: If the node cannot be reached from the head node.
+    """
+    if node is head_node:
+        return []
+
+    pending = [(head_node, [])]
+    while pending:
+        current, path = pending.pop()
+        for child in current.children:
+            if child is node or any(merged_node is node
+                                    for merged_node in child.merged_nodes):
+                return path
+            pending.append((child, path + [child]))
+
+    raise ValueError("The node {} is not part of the graph".format(
+        node.operation.name))
+
+
+def _load_checkpoint_manifest(path):
+    """
+    Reads the list of files of a checkpoint.
+
+    Args:
+        path (str): Path to the manifest of the checkpoint.
+
+    Returns:
+        list: Path to every file of the checkpoint and its layout, or
+        :obj:`None` if the checkpoint does not exist or some of its files
+        were modified or removed.
+    """
+    try:
+        with open(path, "rb") as manifest_file:
+            manifest = pickle.load(manifest_file)
+    except (IOError, OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    for filename, _, fingerprint in manifest:
+        if Cache.file_fingerprint(filename) != fingerprint:
+            logger.debug("Checkpoint file %s was modified", filename)
+            return None
+
+    return [(filename, layout) for filename, layout, _ in manifest]
+
+
+def _save_checkpoint_manifest(path, files):
+    """
+    Writes the list of files of a checkpoint, with their fingerprints.
+
+    Args:
+        path (str): Path to the manifest of the checkpoint.
+
+        files (list): Path to every file of the checkpoint and its layout.
+    """
+    manifest = [(filename, layout, Cache.file_fingerprint(filename))
+                for filename, layout in files]
+    with open(path, "wb") as manifest_file:
+        pickle.dump(manifest, manifest_file,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_array_file(path):
+    """
+    Loads a `.npy` file, memory-mapping it unless it holds Python objects.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        numpy.ndarray: The array stored in the file.
+    """
+    try:
+        return numpy.load(path, mmap_mode="r")
+    except ValueError:
+        # Arrays of Python objects cannot be memory-mapped
+        return numpy.load(path, allow_pickle=True)
+
+
+def _stitch_array_files(chunks, output_dir):
+    """
+    Builds the final result of an `AsNumpy` operation written to disk. The
+    files of every range are copied following the order of the ranges into
+    a single `.npy` file per column, which is then memory-mapped. The files
+    and directories of the ranges are removed afterwards.
+
+    Columns that cannot be memory-mapped (e.g. strings or collections stored
+    as Python objects) are loaded in memory.
+
+    Args:
+        chunks (dict): Paths to the files of every column of every range,
+            indexed by sortable keys that follow the order of the ranges in
+            the dataset.
+
+        output_dir (str): Directory where the final files are written.
+
+    Returns:
+        dict: The arrays of every column, most of them as
+        :obj:`numpy.memmap` objects.
+    """
+    partials = [chunks[key] for key in sorted(chunks)]
+    if not partials:
+        return {}
+
+    merged = {}
+    for column in partials[0]:
+        paths = [partial[column] for partial in partials]
+        arrays = [_load_array_file(path) for path in paths]
+        dtype = numpy.result_type(*set(array.dtype for array in arrays))
+        path = os.path.join(output_dir, _get_array_file_name(column))
+
+        if dtype.hasobject:
+            merged[column] = numpy.concatenate(arrays).astype(dtype)
+            numpy.save(path, merged[column], allow_pickle=True)
+        else:
+            length = sum(len(array) for array in arrays)
+            result = numpy.lib.format.open_memmap(
+                path, mode="w+", dtype=dtype,
+                shape=(length,) + arrays[0].shape[1:])
+            position = 0
+            for array in arrays:
+                result[position:position + len(array)] = array
+                position += len(array)
+            result.flush()
+            del result
+            merged[column] = numpy.load(path, mmap_mode="r")
+
+        del arrays
+        for partial_path in paths:
+            os.remove(partial_path)
+
+    # The directories of the ranges are empty once all columns are stitched
+    for partial_dir in set(os.path.dirname(path)
+                           for partial in partials
+                           for path in partial.values()):
+        os.rmdir(partial_dir)
+
+    return merged
+
+
+def combine_ranges(mapper, reducer):
+    """
+    Builds a function that processes a group of ranges in the same worker
+    and merges their values locally, so that a single list of values per
+    group is sent for the final merge.
+
+    Args:
+        mapper (function): A function that processes a range and returns a
+            list of values.
+
+        reducer (function): A function that merges two lists of values.
+
+    Returns:
+        function: A function that takes an iterable of ranges and yields the
+        merged values of all of them, or nothing if there are no ranges.
+    """
+    def combined_mapper(ranges):
+        values = None
+        for current_range in ranges:
+            range_values = mapper(current_range)
+            if values is None:
+                values = range_values
+            else:
+                values = reducer(values, range_values)
+
+        if values is not None:
+            yield values
+
+    return combined_mapper
+
+
+def _count_entries(task):
+    """
+    Counts the entries of a range, or of a pair of graph index and range as
+    built by `interleave_ranges`.
+
+    Args:
+        task (Range, tuple): The range.
+
+    Returns:
+        int: The number of entries of the range.
+    """
+    current_range = task if isinstance(task, Range) else task[1]
+    # The offsets of start and end are the same, their difference is the
+    # number of entries of the range
+    return current_range.end - current_range.start
+
+
+def interleave_ranges(ranges_per_graph):
+    """
+    Interleaves the ranges of several graphs, taking one range of every graph
+    in turn, so that the graphs progress together and the ranges of the
+    smaller ones do not pile up at the end.
+
+    Args:
+        ranges_per_graph (list): The list of ranges of every graph.
+
+    Returns:
+        list: Pairs of graph index and range.
+    """
+    tasks = []
+    for ranges in itertools.zip_longest(*ranges_per_graph):
+        tasks.extend((index, current_range)
+                     for index, current_range in enumerate(ranges)
+                     if current_range is not None)
+    return tasks
+
+
+def combine_graphs(mappers, nvalues, reducer):
+    """
+    Builds the functions that process the ranges of several graphs in the
+    same submission. The values of all graphs are kept in a single list,
+    where the values of the graphs not processed by a range are :obj:`None`.
+
+    Args:
+        mappers (list): The mapper of every graph.
+
+        nvalues (list): Number of values returned by the mapper of every
+            graph.
+
+        reducer (function): A function that merges two lists of values. It
+            merges them one by one according to their type, which is the same
+            for every graph.
+
+    Returns:
+        tuple: A mapper processing pairs of graph index and range, as returned
+        by `interleave_ranges`, and its reducer.
+    """
+    offsets = [sum(nvalues[:index]) for index in range(len(nvalues))]
+    total = sum(nvalues)
+
+    def combined_mapper(task):
+        index, current_range = task
+        values = [None] * total
+        values[offsets[index]:offsets[index] + nvalues[index]] = \
+            mappers[index](current_range)
+        return values
+
+    def combined_reducer(values_out, values_in):
+        for index, (value_out, value_in) in enumerate(
+                zip(values_out, values_in)):
+            if value_out is None:
+                values_out[index] = value_in
+            elif value_in is not None:
+                values_out[index] = reducer([value_out], [value_in])[0]
+        return values_out
+
+    return combined_mapper, combined_reducer
+
+
+def _split_batches(chunks, batch_size=None):
+    """
+    Regroups a sequence of dictionaries of numpy arrays in batches with a
+    fixed number of entries. Only the entries of the current batch are kept
+    in memory.
+
+    Args:
+        chunks (iterable): Dictionaries of numpy arrays with the same columns,
+            e.g. the `AsNumpy` results of consecutive ranges.
+
+        batch_size (int, optional): Number of entries of every batch, the
+            last one may be smaller. If `None`, the chunks are returned as
+            they are.
+
+    Yields:
+        dict: The numpy arrays of every column for the entries of a batch.
+
+    Raises:
+        ValueError: If the batch size is smaller than one entry.
+    """
+    if batch_size is not None and batch_size < 1:
+        raise ValueError(
+            "The batch size must be at least 1, got {}".format(batch_size))
+
+    if batch_size is None:
+        for columns in chunks:
+            yield columns
+        return
+
+    # Pieces of the chunks that belong to the next batch
+    pending = []
+    npending = 0
+
+    for columns in chunks:
+        if not columns:
+            continue
+
+        length = len(next(iter(columns.values())))
+        start = 0
+        while npending + length - start >= batch_size:
+            end = start + batch_size - npending
+            pending.append({key: array[start:end]
+                            for key, array in columns.items()})
+            yield _merge_array_chunks(dict(enumerate(pending)))
+            pending = []
+            npending = 0
+            start = end
+
+        if start < length:
+            pending.append({key: array[start:]
+                            for key, array in columns.items()})
+            npending += length - start
+
+    if pending:
+        yield _merge_array_chunks(dict(enumerate(pending)))
+
+
+def _prefetch(iterator, size):
+    """
+    Consumes an iterator in a background thread, keeping at most `size`
+    items ready to be used. The producer is blocked while the buffer is
+    full, which bounds the memory used by items not yet consumed.
+
+    Args:
+        iterator (iterable): The items to be fetched.
+
+        size (int): Maximum number of items fetched in advance. If it is
+            smaller than 1, items are fetched on demand.
+
+    Yields:
+        The items of the iterator, in the same order.
+    """
+    if size < 1:
+        for item in iterator:
+            yield item
+        return
+
+    items = queue.Queue(maxsize=size)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+        # Waits for a free slot unless the consumer is gone
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((end, None))
+        except Exception as e:
+            put((None, e))
+        finally:
+            if stop.is_set() and hasattr(iterator, "close"):
+                # The consumer is gone, the iterator can release the work
+                # it has in progress
+                iterator.close()
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is end:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _iterate_in_job_group(backend, iterator, job_id):
+    """
+    Consumes an iterator in a job group of a backend. The job group is set
+    in the thread consuming the returned generator, which is the one
+    submitting the work of lazy iterators.
+
+    Args:
+        backend (PyRDF.Backends.Base.BaseBackend): The backend.
+
+        iterator (iterable): The items to be produced.
+
+        job_id (str): Identifier of the job group.
+
+    Yields:
+        The items of the iterator, in the same order.
+    """
+    with backend.job_group(job_id):
+        for item in iterator:
+            yield item
 
 
 def _n_even_chunks(iterable, n_chunks):
@@ -102,6 +694,28 @@ class FriendInfo(object):
         """
         return self.__bool__()
 
+    def select_files(self, indices, nfiles):
+        """
+        Restricts the friend trees to the files matching some files of the
+        main tree. Friend trees made of one file per file of the main tree,
+        like delta snapshots, are assumed to be aligned with them file by
+        file. The rest of the friend trees keep all their files.
+
+        Args:
+            indices (list): Positions of the selected files in the main tree.
+
+            nfiles (int): Number of files of the main tree.
+
+        Returns:
+            FriendInfo: The information about the selected friend files.
+        """
+        friend_file_names = [
+            [filenames[index] for index in indices]
+            if len(filenames) == nfiles else filenames
+            for filenames in self.friend_file_names
+        ]
+        return FriendInfo(self.friend_names, friend_file_names)
+
 
 class DistBackend(Base.BaseBackend):
     """
@@ -116,6 +730,122 @@ class DistBackend(Base.BaseBackend):
 
         friend_info (PyRDF.Dist.FriendInfo): A class instance that holds
             information about any friend trees of the main ROOT.TTree
+
+        fuse_filters (bool): Whether chains of consecutive filters are run as
+            a single filter expression. Defaults to :obj:`False`.
+
+        reorder_filters (bool): Whether fused filters are reordered so that
+            the most selective ones are evaluated first. It only applies when
+            `fuse_filters` is enabled. Only filters that are independent of
+            each other should be reordered, hence this is :obj:`False` by
+            default.
+
+        filter_sample_entries (int): Number of entries used to measure the
+            selectivity of the filters when both `fuse_filters` and
+            `reorder_filters` are enabled.
+
+        filter_selectivity (dict): Fraction of entries passing each filter
+            expression. It is filled with the measurements of previous
+            executions and can also be set by the user.
+
+        result_cache (PyRDF.Backends.Cache.ResultCache): Cache of action
+            results. If set, actions whose result was already computed for the
+            same operations, input dataset and headers are not executed again.
+            Defaults to :obj:`None` (no cache).
+
+        incremental (bool): Whether partial results are stored per input file
+            in the `result_cache`, so that later executions only process the
+            files that were added to the dataset. Defaults to :obj:`False`.
+
+        pack_results (bool): Whether the values computed for every range are
+            serialized together into a single blob before being sent for
+            merging. Defaults to :obj:`False`.
+
+        compression_level (int): The zlib compression level of the packed
+            values, from 0 (no compression) to 9. Defaults to 1.
+
+        numpy_histogram_merge (bool): Whether the one, two and three
+            dimensional histograms booked with a model are exported to numpy
+            arrays by the workers and merged with numpy, instead of with ROOT.
+            The histograms are only rebuilt on the driver. Histograms whose
+            binning differs are still merged by ROOT, profiles always are.
+            Defaults to :obj:`False`.
+
+        combine_ranges (bool): Whether the ranges processed by the same worker
+            are merged locally before the final merge. Backends supporting it
+            then send one list of values per worker instead of one per range.
+            Defaults to :obj:`False`.
+
+        progressive_merge (bool): Whether the values of every range are
+            merged on the driver as soon as the range is processed, instead
+            of with a tree reduction at the end. The action nodes then expose
+            a copy of the values merged so far while the graph runs. It is
+            not combined with incremental execution, `pack_results` or
+            `reduce_memory_budget`. Defaults to :obj:`False`.
+
+        reduce_memory_budget (int): Size in bytes above which the values
+            merged by the reducer are written to disk instead of being kept
+            in memory. They are merged from disk in batches at the end.
+            Defaults to :obj:`None` (no limit).
+
+        spill_dir (str): Directory where the values above the memory budget
+            are written. It must be reachable from the workers and from the
+            driver, e.g. on a shared file system, and it is required when
+            `reduce_memory_budget` is set. Defaults to :obj:`None`.
+
+        spill_merge_batch_size (int): Number of spilled files merged together
+            at the same time, at least 2. Defaults to 16.
+
+        snapshot_nfiles (int): Number of files into which the partial files
+            of every range written by a `Snapshot` are merged. Defaults to
+            :obj:`None` (no merge, unless `snapshot_file_size` is set).
+
+        snapshot_file_size (int): Target size in bytes of the merged files
+            of a `Snapshot`, only used if `snapshot_nfiles` is not set.
+            Defaults to :obj:`None`.
+
+        snapshot_merge_batch_size (int): Maximum number of files merged
+            together by a single task. Larger groups of files are merged in
+            several rounds of parallel tasks. Defaults to 32.
+
+        snapshot_compression_algorithm (str): Compression algorithm of the
+            merged files of a `Snapshot`: "zlib", "lzma", "lz4" or "zstd".
+            Defaults to :obj:`None` (the default of ROOT).
+
+        snapshot_compression_level (int): Compression level of the merged
+            files of a `Snapshot`. It applies to the default algorithm of
+            ROOT if no algorithm is set. Defaults to :obj:`None` (the default
+            of ROOT, or level 1 if an algorithm is set).
+
+        file_layouts (dict): Number of entries and cluster boundaries of the
+            input files of the current execution that are already known, like
+            the files written by a previous `Snapshot`. Indexed by file name.
+
+        show_progress (bool): Whether a text progress bar showing the
+            processed ranges, the throughput and the estimated time left is
+            written to the standard error during the execution. Defaults to
+            :obj:`False`.
+
+        progress_callback (function): A function receiving a
+            :obj:`PyRDF.Backends.Progress.ProgressReport` every time ranges
+            are processed, e.g. to update a notebook widget. Defaults to
+            :obj:`None`.
+
+        progress_interval (float): Time in seconds between two checks of the
+            progress of the execution. Defaults to 1.
+
+        profile (bool): Whether the transformations of the graph are
+            profiled: the entries passing each of them are counted and the
+            time spent evaluating their expressions is measured. The figures
+            are stored in the `profile` attribute of every transformation
+            node. Filters are not fused while profiling and ranges processed
+            with implicit multithreading are not profiled. Expressions with
+            statements, e.g. `"return x > 0;"`, are not timed, only their
+            entries are counted. Defaults to :obj:`False`.
+
+        profile_sampling_period (int): One evaluation of every
+            `profile_sampling_period` evaluations of an expression is timed
+            while profiling. Defaults to 10.
     """
 
     def __init__(self):
@@ -143,6 +873,35 @@ class DistBackend(Base.BaseBackend):
         self.headers = set()
         self.shared_libraries = set()
 
+        self.fuse_filters = False
+        self.reorder_filters = False
+        self.filter_sample_entries = 10000
+        self.filter_selectivity = {}
+
+        self.result_cache = None
+        self.incremental = False
+        self.pack_results = False
+        self.compression_level = 1
+        self.combine_ranges = False
+        self.numpy_histogram_merge = False
+        self.progressive_merge = False
+        self.reduce_memory_budget = None
+        self.spill_dir = None
+        self.spill_merge_batch_size = 16
+        self.snapshot_nfiles = None
+        self.snapshot_file_size = None
+        self.snapshot_merge_batch_size = 32
+        self.snapshot_compression_algorithm = None
+        self.snapshot_compression_level = None
+        self._file_aligned_ranges = False
+        self._prebuilt_ranges = None
+        self.file_layouts = {}
+        self.show_progress = False
+        self.profile = False
+        self.profile_sampling_period = 10
+        self.progress_callback = None
+        self.progress_interval = 1.0
+
     def get_clusters(self, treename, filelist):
         """
         Extract a list of cluster boundaries for the given tree and files
@@ -180,22 +939,17 @@ class DistBackend(Base.BaseBackend):
         fileindex = 0
 
         for filename in filelist:
-            f = ROOT.TFile.Open(filename)
-            t = f.Get(treename)
-
-            entries = t.GetEntriesFast()
-            it = t.GetClusterIterator(0)
-            start = it()
-            end = 0
+            # Files written by distributed snapshots are not opened again
+            layout = self.file_layouts.get(filename)
+            if layout is None:
+                layout = Snapshots.read_file_layout(filename, treename)
 
-            while start < entries:
-                end = it()
+            for start, end in layout.clusters:
                 clusters.append(cluster(start + offset, end + offset, offset,
                                         fileandindex(filename, fileindex)))
-                start = end
 
             fileindex += 1
-            offset += entries
+            offset += layout.entries
 
         logger.debug("Returning files with their clusters:\n%s",
                      "\n\n".join(map(str, clusters)))
@@ -235,7 +989,7 @@ class DistBackend(Base.BaseBackend):
                 end = i = end + 1
                 remainder -= 1
 
-            ranges.append(Range(start, end, None, None))
+            ranges.append(Range(start, end, None, None, len(ranges)))
 
         return ranges
 
@@ -265,11 +1019,13 @@ class DistBackend(Base.BaseBackend):
                         end=42287856,
                         filelist=['Run2012B_TauPlusX.root',
                                   'Run2012C_TauPlusX.root'],
-                        friend_info=None),
+                        friend_info=None,
+                        id=0),
                     Range(start=6640348,
                         end=51303171,
                         filelist=['Run2012C_TauPlusX.root'],
-                        friend_info=None)
+                        friend_info=None,
+                        id=1)
                 ]
 
         """
@@ -326,6 +1082,8 @@ class DistBackend(Base.BaseBackend):
            In each file only the clusters needed to process the clustered range
            will be read.
         4. ``friend_info``: Information about friend trees.
+        5. ``id``: The position of the range in the list, used to merge
+           results that depend on the order of the entries.
 
         In each range, the offset of the first file is always subtracted to the
         ``start`` and ``end`` entries. This is needed to maintain a reference of
@@ -342,13 +1100,15 @@ class DistBackend(Base.BaseBackend):
                   end=20000,
                   filelist=['tree10000entries10clusters.root',
                             'tree20000entries10clusters.root'],
-                  friend_info=None)
+                  friend_info=None,
+                  id=0)
 
             Range(start=10000,
                   end=50000,
                   filelist=['tree20000entries10clusters.root',
                             'tree30000entries10clusters.root'],
-                  friend_info=None)
+                  friend_info=None,
+                  id=1)
 
         The first ``Range`` will read the first 10000 entries from the first
         file, then switch to the second file and read the first 10000 entries.
@@ -356,26 +1116,98 @@ class DistBackend(Base.BaseBackend):
         file up until the end of that file (entry number 20000), then switch to
         the third file and read the whole 30000 entries there.
         """
-        clustered_ranges = [
-            Range(
+        clustered_ranges = []
+        for rangeid, clusters in enumerate(
+                _n_even_chunks(clustersinfiles, self.npartitions)):
+            filetuples = sorted(set([
+                cluster.filetuple for cluster in clusters
+            ]), key=lambda curtuple: curtuple[1])
+
+            range_friend_info = friend_info
+            if friend_info:
+                # Friend trees aligned file by file with the main tree only
+                # need the files of the range
+                range_friend_info = friend_info.select_files(
+                    [filetuple[1] for filetuple in filetuples], len(filelist))
+
+            clustered_ranges.append(Range(
                 min(clusters)[0] - clusters[0].offset,  # type: int
                 max(clusters)[1] - clusters[0].offset,  # type: int
-                [
-                    filetuple.filename
-                    for filetuple in sorted(set([
-                        cluster.filetuple for cluster in clusters
-                    ]), key=lambda curtuple: curtuple[1])
-                ],  # type: list[str]
-                friend_info  # type: FriendInfo
-            )  # type: collections.namedtuple
-            for clusters in _n_even_chunks(clustersinfiles, self.npartitions)
-        ]
+                [filetuple.filename for filetuple in filetuples],
+                range_friend_info,  # type: FriendInfo
+                rangeid  # type: int
+            ))  # type: collections.namedtuple
 
         logger.debug("Created following clustered ranges:\n%s",
                      "\n\n".join(map(str, clustered_ranges)))
 
         return clustered_ranges
 
+    def _get_file_aligned_ranges(self, treename, filelist,
+                                 friend_info=FriendInfo()):
+        """
+        Builds clustered ranges that never span more than one file, so that
+        the results of every range can be attributed to a single input file.
+        The partitions are shared among the files proportionally to their
+        number of clusters, with at least one partition per file.
+
+        Args:
+            treename (str): Name of the tree.
+
+            filelist (list): List of ROOT files.
+
+            friend_info (FriendInfo): Information about friend trees. Every
+                range gets the friend files matching its input file.
+
+        Returns:
+            list[collections.namedtuple]: List of ``Range`` objects, each of
+            them with a single file in its ``filelist``.
+
+        Raises:
+            ValueError: If a friend tree is not made of one file per input
+                file, since its entries could not be aligned with the ones of
+                the ranges.
+        """
+        if friend_info and len(filelist) > 1 and any(
+                len(filenames) != len(filelist)
+                for filenames in friend_info.friend_file_names):
+            raise ValueError(
+                "Ranges aligned with the input files need friend trees made "
+                "of one file per input file")
+
+        clusters_per_file = collections.OrderedDict()
+        for cluster in self.get_clusters(treename, filelist):
+            clusters_per_file.setdefault(cluster.filetuple, []).append(cluster)
+
+        numclusters = sum(len(clusters)
+                          for clusters in clusters_per_file.values())
+
+        ranges = []
+        for filetuple, clusters in clusters_per_file.items():
+            npartitions = int(round(
+                self.npartitions * len(clusters) / float(numclusters)))
+            npartitions = min(max(npartitions, 1), len(clusters))
+
+            file_friend_info = friend_info
+            if friend_info:
+                file_friend_info = friend_info.select_files(
+                    [filetuple.index], len(filelist))
+
+            ranges.extend([
+                Range(chunk[0].start - chunk[0].offset,
+                      chunk[-1].end - chunk[0].offset,
+                      [filetuple.filename],
+                      file_friend_info,
+                      len(ranges) + rangeid)
+                for rangeid, chunk in enumerate(
+                    _n_even_chunks(clusters, npartitions))
+            ])
+
+        logger.debug("Created following file-aligned ranges:\n%s",
+                     "\n\n".join(map(str, ranges)))
+
+        return ranges
+
     def _get_filelist(self, files):
         """
         Convert single file into list of files and expand globbing
@@ -390,8 +1222,7 @@ class DistBackend(Base.BaseBackend):
         """
         if isinstance(files, str):
             # Expand globbing excluding remote files
-            remote_prefixes = ("root:", "http:", "https:")
-            if not files.startswith(remote_prefixes):
+            if not files.startswith(Cache.REMOTE_PREFIXES):
                 files = glob.glob(files)
             else:
                 # Convert single file into a filelist
@@ -404,6 +1235,11 @@ class DistBackend(Base.BaseBackend):
         Define two type of ranges based on the arguments passed to the
         RDataFrame head node.
         """
+        if self._prebuilt_ranges is not None:
+            # Ranges already built for the current submission, possibly of
+            # several graphs processed together
+            return self._prebuilt_ranges
+
         if self.npartitions > self.nentries:
             # Restrict 'npartitions' if it's greater
             # than 'nentries'
@@ -416,6 +1252,9 @@ class DistBackend(Base.BaseBackend):
                          self.treename,
                          list(self.files)
                          )
+            if self._file_aligned_ranges:
+                return self._get_file_aligned_ranges(self.treename, filelist,
+                                                     self.friend_info)
             return self._get_clustered_ranges(self.treename, filelist,
                                               self.friend_info)
         else:
@@ -475,6 +1314,653 @@ class DistBackend(Base.BaseBackend):
 
         return FriendInfo(friend_names, friend_file_names)
 
+    def _update_filter_selectivity(self, head_node):
+        """
+        Measures the selectivity of the filters of the graph that were not
+        measured in previous executions. The measurement runs locally on the
+        first `filter_sample_entries` entries of the dataset.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+        """
+        if ROOT.IsImplicitMTEnabled():
+            # Range is not available with implicit multithreading
+            warnings.warn("Filter selectivity cannot be measured with "
+                          "implicit multithreading enabled, filters will not "
+                          "be reordered.", UserWarning, stacklevel=3)
+            return
+
+        sample = ROOT.RDataFrame(*head_node.args).Range(
+            self.filter_sample_entries)
+
+        self.filter_selectivity.update(
+            GraphOptimizer.measure_filter_selectivity(
+                head_node, sample, known=self.filter_selectivity))
+
+    def _get_dataset_fingerprint(self, head_node):
+        """
+        Identifies the input dataset of a graph and the code declared to
+        process it. Any change in the input files, their friend trees or the
+        distributed headers and shared libraries changes the fingerprint.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+        Returns:
+            tuple: The fingerprint of the dataset.
+        """
+        treename = head_node.get_treename()
+        if not treename:
+            # Empty source, results only depend on the number of entries
+            return (head_node.get_num_entries(),)
+
+        branches = head_node.get_branches()
+        if branches:
+            branches = [str(branch) for branch in branches]
+
+        files = head_node.get_inputfiles()
+        if files:
+            files = [Cache.file_fingerprint(str(filename))
+                     for filename in self._get_filelist(files)]
+
+        friends = []
+        tree = head_node.get_tree()
+        if tree:
+            friend_info = self._get_friend_info(tree)
+            friends = [
+                (friend_name, [Cache.file_fingerprint(str(filename))
+                               for filename in friend_files])
+                for friend_name, friend_files in zip(
+                    friend_info.friend_names, friend_info.friend_file_names)
+            ]
+
+        declared_files = sorted(
+            Cache.file_fingerprint(path)
+            for path in self.headers | self.shared_libraries)
+
+        return (treename, branches, files, friends, declared_files)
+
+    def _fill_cached_results(self, head_node):
+        """
+        Sets the value of the action nodes whose result is in the cache.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+        Returns:
+            dict: Cache keys of the action nodes that still have to be
+            computed.
+        """
+        fingerprint = self._get_dataset_fingerprint(head_node)
+        missing_keys = {}
+
+        for node, operations in Cache.get_action_paths(head_node):
+            if node.value is not None or _writes_files(node):
+                # Already computed nodes will be pruned. Operations writing
+                # files always run since their output may have changed.
+                continue
+
+            key = Cache.make_key(operations, fingerprint)
+            mergeable = self.result_cache.get(key)
+            if mergeable is None:
+                missing_keys[node] = key
+            else:
+                self._set_value(node, mergeable)
+
+        logger.debug("%d action(s) not found in the result cache",
+                     len(missing_keys))
+        return missing_keys
+
+    def _can_process_incrementally(self, nodes):
+        """
+        Checks whether the current execution can store and reuse partial
+        results per input file.
+
+        Args:
+            nodes (list): Action nodes of the graph.
+
+        Returns:
+            bool: True if incremental processing is enabled and the graph and
+            its dataset support it, False otherwise.
+        """
+        if not self.incremental:
+            return False
+
+        if self.profile:
+            logger.debug("Incremental processing is not available while "
+                         "profiling the graph")
+            return False
+
+        if not (self.treename and self.files) or self.friend_info:
+            logger.debug("Incremental processing needs a dataset made of "
+                         "files without friend trees")
+            return False
+
+        if not all(node.operation.is_action() and not _writes_files(node)
+                   for node in nodes):
+            # Outputs on disk and instant actions are not stored per file
+            logger.debug("Incremental processing is not available for "
+                         "operations writing files and instant actions")
+            return False
+
+        return True
+
+    def _process_incrementally(self, head_node, nodes, mapper, reducer):
+        """
+        Runs the graph only on the input files whose partial results are not
+        stored in the result cache, stores the new partial results and merges
+        the partial results of all files.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+            nodes (list): Action nodes of the graph, in the same order as the
+                values returned by the mapper.
+
+            mapper (function): The mapper of the current execution.
+
+            reducer (function): The reducer of the current execution.
+
+        Returns:
+            list: The merged values of the action nodes.
+        """
+        operations = dict(Cache.get_action_paths(head_node))
+
+        branches = head_node.get_branches()
+        if branches:
+            branches = [str(branch) for branch in branches]
+        declared_files = sorted(
+            Cache.file_fingerprint(path)
+            for path in self.headers | self.shared_libraries)
+        common_fingerprint = (self.treename, branches, declared_files)
+
+        filelist = [str(filename)
+                    for filename in self._get_filelist(self.files)]
+
+        # Cache keys of the partial results of every file
+        file_keys = collections.OrderedDict()
+        for filename in filelist:
+            if filename not in file_keys:
+                file_fingerprint = Cache.file_fingerprint(filename)
+                file_keys[filename] = [
+                    Cache.make_key(operations[node], common_fingerprint,
+                                   file_fingerprint)
+                    for node in nodes
+                ]
+
+        partials = {}
+        missing_files = []
+        for filename, keys in file_keys.items():
+            values = [self.result_cache.get(key) for key in keys]
+            if any(value is None for value in values):
+                missing_files.append(filename)
+            elif not any(isinstance(value, Cache.EmptyFile)
+                         for value in values):
+                partials[filename] = values
+
+        logger.debug("%d of %d file(s) have to be processed",
+                     len(missing_files), len(file_keys))
+
+        if missing_files:
+            def file_mapper(current_range):
+                """Attributes the values of a range to its input file."""
+                return {current_range.filelist[0]: mapper(current_range)}
+
+            def file_reducer(partials_out, partials_in):
+                """Merges the values of the ranges of each file."""
+                for filename, values in partials_in.items():
+                    if filename in partials_out:
+                        partials_out[filename] = reducer(
+                            partials_out[filename], values)
+                    else:
+                        partials_out[filename] = values
+                return partials_out
+
+            files = self.files
+            self.files = missing_files
+            self._file_aligned_ranges = True
+            try:
+                ranges = self.build_ranges()
+                new_partials = {}
+                if ranges:
+                    # Missing files without entries produce no ranges
+                    self._prebuilt_ranges = ranges
+                    monitor = self._monitor_progress(file_mapper)
+                    with monitor as monitored_mapper:
+                        new_partials = self.ProcessAndMerge(monitored_mapper,
+                                                            file_reducer)
+            finally:
+                self._prebuilt_ranges = None
+                self._file_aligned_ranges = False
+                self.files = files
+
+            for filename in missing_files:
+                values = new_partials.get(filename)
+                if values is None:
+                    values = [Cache.EmptyFile()] * len(nodes)
+                for key, value in zip(file_keys[filename], values):
+                    self.result_cache.put(key, value)
+            partials.update(new_partials)
+
+        # Merge the partial results following the order of the input files
+        values = None
+        merged_files = set()
+        for position, filename in enumerate(filelist):
+            file_values = partials.get(filename)
+            if file_values is None:
+                # Files without entries produce no ranges nor results
+                continue
+            if filename in merged_files:
+                # The same file is read more than once, merge a copy of its
+                # results since the reducer modifies them in place
+                file_values = pickle.loads(pickle.dumps(
+                    file_values, protocol=pickle.HIGHEST_PROTOCOL))
+            merged_files.add(filename)
+
+            # Partial numpy arrays and snapshot files of different files are
+            # ordered by the position of the file in the dataset first
+            file_values = [
+                {(position,) + key: chunk for key, chunk in value.items()}
+                if isinstance(value, dict) else value
+                for value in file_values
+            ]
+
+            if values is None:
+                values = file_values
+            else:
+                values = reducer(values, file_values)
+
+        if values is None:
+            # No file has entries, the empty dataset is processed like
+            # without incremental processing
+            return self._process_and_merge(mapper, reducer)
+
+        return values
+
+    def _set_value(self, node, value):
+        """
+        Converts the (mergeable) value computed for an action node to the
+        final result shown to the user and stores it in the node.
+
+        Args:
+            node (PyRDF.Node.Node): An action node of the graph.
+
+            value: The value obtained after Map-Reduce.
+        """
+        if _is_delta_snapshot(node):
+            node.value = self._make_delta_dataframe(node, value)
+        elif node.operation.name == "Snapshot":
+            # Retrieve treename from operation args
+            snapshot_treename = node.operation.args[0]
+            snapshot_files = self._merge_snapshot_files(
+                snapshot_treename, node.operation.args[1], value)
+            node.value = self._make_snapshot_dataframe(snapshot_treename,
+                                                       snapshot_files)
+        elif node.operation.name == "AsNumpy":
+            output_dir = node.operation.kwargs.get("output_dir")
+            if output_dir:
+                node.value = _stitch_array_files(value, output_dir)
+            else:
+                node.value = _merge_array_chunks(value)
+        else:
+            node.value = value.GetValue()
+
+        # Nodes merged into this one share the same result
+        for merged_node in [node] + node.merged_nodes:
+            merged_node.value = node.value
+            merged_node.partial_result = None
+            merged_node.progress = 1.0
+
+    def _make_snapshot_dataframe(self, treename, files):
+        """
+        Creates the dataframe that reads the files written by a snapshot.
+
+        Args:
+            treename (str): Name of the tree written by the snapshot.
+
+            files (list): Path to every file and its layout.
+
+        Returns:
+            The new dataframe.
+        """
+        snapshot_chain = ROOT.TChain(treename)
+        # Add partial (or merged) snapshot files to the chain
+        for filename, _ in files:
+            snapshot_chain.Add(filename)
+        # Create a new rdf with the chain and return that to user. The layout
+        # of the files is already known, they are not opened again to split
+        # the new dataset in ranges.
+        return self.make_dataframe(snapshot_chain, file_layouts=dict(files))
+
+    def _check_delta_snapshots(self, head_node, nodes):
+        """
+        Checks that the delta snapshots of the graph can be attached as
+        friend trees of the input dataset.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+            nodes (list): Action nodes of the graph.
+
+        Raises:
+            ValueError: If the dataset is not read from files or if a delta
+                snapshot is not written for every entry of the dataset.
+        """
+        if not (self.treename and self.files):
+            raise ValueError(
+                "Delta snapshots need a dataset read from files")
+
+        for node in nodes:
+            if not _is_delta_snapshot(node):
+                continue
+            for ancestor in _get_ancestors(head_node, node):
+                if ancestor.operation.name != "Define":
+                    raise ValueError(
+                        "Delta snapshots must have the same entries as the "
+                        "input dataset, found a {} operation before the "
+                        "snapshot".format(ancestor.operation.name))
+
+    def _make_delta_dataframe(self, node, value):
+        """
+        Builds the dataframe returned by a delta snapshot: the input dataset
+        with the written columns attached as a friend tree. The partial files
+        of the ranges of every input file are merged into a single file.
+
+        Args:
+            node (PyRDF.Node.Node): A delta snapshot node.
+
+            value (dict): The path to the partial file of every range and its
+                input file, indexed by range.
+
+        Returns:
+            The new dataframe.
+        """
+        treename, filename = node.operation.args[:2]
+
+        # The ranges are aligned with the input files, consecutive ranges of
+        # the same file are merged together
+        groups = []
+        for key in sorted(value):
+            path, input_file = value[key]
+            if groups and groups[-1][0] == input_file:
+                groups[-1][1].append(path)
+            else:
+                groups.append((input_file, [path]))
+
+        outputs = Snapshots.get_output_names(filename, len(groups))
+        compression = Snapshots.get_compression_setting(
+            self.snapshot_compression_algorithm,
+            self.snapshot_compression_level)
+        self.RunTasks(Snapshots.merge_files, [
+            (paths, output, compression, None)
+            for (_, paths), output in zip(groups, outputs)
+        ])
+
+        friend_chain = ROOT.TChain(treename)
+        for output in outputs:
+            friend_chain.Add(output)
+
+        input_chain = ROOT.TChain(self.treename)
+        for input_file, _ in groups:
+            input_chain.Add(input_file)
+        input_chain.AddFriend(friend_chain)
+        # The friend chain must live as long as the input chain
+        ROOT.SetOwnership(friend_chain, False)
+
+        return self.make_dataframe(input_chain)
+
+    def _merge_snapshot_files(self, treename, filename, files):
+        """
+        Merges the partial files written by a `Snapshot` into the number of
+        files or the file size requested. Groups of files are merged in
+        rounds of parallel tasks, each of them merging at most
+        `snapshot_merge_batch_size` files, like a tree of `hadd` calls.
+
+        Args:
+            treename (str): Name of the tree written by the snapshot.
+
+            filename (str): The file name requested for the snapshot.
+
+            files (dict): Path to the partial files of every range and their
+                layout, keyed by range id.
+
+        Returns:
+            list: Paths to the merged files and their layouts, or the partial
+            files in the order of the ranges if no merge was requested.
+        """
+        # Ranges finish in any order, files are grouped in the order of the
+        # ranges so that the merged files keep the order of the entries
+        files = [range_file for key in sorted(files)
+                 for range_file in files[key]]
+
+        if not (self.snapshot_nfiles or self.snapshot_file_size):
+            return files
+
+        paths = [path for path, _ in files]
+
+        compression = Snapshots.get_compression_setting(
+            self.snapshot_compression_algorithm,
+            self.snapshot_compression_level)
+
+        sizes = [os.path.getsize(path) for path in paths]
+        if self.snapshot_nfiles:
+            ngroups = self.snapshot_nfiles
+        else:
+            ngroups = int(math.ceil(sum(sizes) /
+                                    float(self.snapshot_file_size)))
+        ngroups = max(1, min(ngroups, len(paths)))
+
+        groups = Snapshots.group_files(paths, sizes, ngroups)
+        outputs = Snapshots.get_output_names(filename, len(groups))
+
+        batch_size = self.snapshot_merge_batch_size
+        basename = filename.partition(".root")[0]
+        level = 0
+        while any(len(group) > batch_size for group in groups):
+            # Intermediate round, groups that are too large are merged in
+            # batches and replaced by the merged files
+            tasks = []
+            next_groups = []
+            for groupid, group in enumerate(groups):
+                if len(group) <= batch_size:
+                    next_groups.append(group)
+                    continue
+                names = []
+                for batchid, start in enumerate(
+                        range(0, len(group), batch_size)):
+                    name = "{}_{}_merge{}_{}.root".format(
+                        basename, groupid, level, batchid)
+                    tasks.append((group[start:start + batch_size], name,
+                                  compression, None))
+                    names.append(name)
+                next_groups.append(names)
+
+            self.RunTasks(Snapshots.merge_files, tasks)
+            groups = next_groups
+            level += 1
+
+        return self.RunTasks(Snapshots.merge_files, [
+            (group, output, compression, treename)
+            for group, output in zip(groups, outputs)
+        ])
+
+    def _set_partial_value(self, node, value, progress):
+        """
+        Stores in an action node the (mergeable) value merged so far while
+        the graph is being executed.
+
+        Args:
+            node (PyRDF.Node.Node): An action node of the graph.
+
+            value: The value merged out of the ranges processed so far.
+
+            progress (float): Fraction of the entries of the dataset that have
+                been processed.
+        """
+        # Snapshot and AsNumpy results are only meaningful once complete.
+        # Other results are copied since the reducer merges the next ranges
+        # in place while the user may be reading them.
+        partial_result = None
+        if node.operation.name not in ("Snapshot", "AsNumpy"):
+            partial_result = _copy_result(value)
+
+        for partial_node in [node] + node.merged_nodes:
+            partial_node.partial_result = partial_result
+            partial_node.progress = progress
+
+    def _get_progress_callbacks(self):
+        """
+        Returns:
+            list: The functions receiving the progress reports of the
+            execution, empty if progress is not reported.
+        """
+        callbacks = []
+        if self.show_progress:
+            callbacks.append(Progress.TextProgressBar())
+        if self.progress_callback is not None:
+            callbacks.append(self.progress_callback)
+        return callbacks
+
+    def _process_and_merge(self, mapper, reducer):
+        """
+        Runs the mapper on every range of the dataset and merges the values
+        with the backend, packing them or spilling them to disk if requested.
+        The progress of the execution is reported while the ranges are
+        processed, if requested.
+
+        Args:
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            reducer (function): A function that merges two lists that were
+                returned by the mapper.
+
+        Returns:
+            list: The merged values of the action nodes.
+        """
+        with self._monitor_progress(mapper) as monitored_mapper:
+            return self._map_and_reduce(monitored_mapper, reducer)
+
+    @contextmanager
+    def _monitor_progress(self, mapper):
+        """
+        Reports the progress of the execution while the ranges are
+        processed, if requested. The ranges are built beforehand to know the
+        size of the execution and they are reused by the backend until the
+        end of the context.
+
+        Args:
+            mapper (function): A function that processes a range.
+
+        Yields:
+            function: The mapper to be run by the backend, which reports the
+            figures of every range it processes.
+        """
+        callbacks = self._get_progress_callbacks()
+        if not callbacks:
+            yield mapper
+            return
+
+        ranges = self.build_ranges()
+        accumulator = self.make_progress_accumulator()
+        monitor = Progress.ProgressMonitor(
+            accumulator, len(ranges), sum(_count_entries(current_range)
+                                          for current_range in ranges),
+            callbacks, self.progress_interval)
+
+        prebuilt_ranges = self._prebuilt_ranges
+        self._prebuilt_ranges = ranges
+        try:
+            with monitor:
+                yield Progress.monitor_mapper(mapper, accumulator,
+                                              _count_entries)
+        finally:
+            self._prebuilt_ranges = prebuilt_ranges
+
+    def _map_and_reduce(self, mapper, reducer):
+        """
+        Runs the mapper and the reducer with the backend, packing the values
+        or spilling them to disk if requested.
+
+        Args:
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            reducer (function): A function that merges two lists that were
+                returned by the mapper.
+
+        Returns:
+            list: The merged values of the action nodes.
+
+        Raises:
+            ValueError: If a memory budget is set without a spill directory.
+        """
+        spill_dir = self.spill_dir
+
+        merge_reducer = reducer
+        if self.reduce_memory_budget is not None:
+            if not spill_dir:
+                # A local temporary directory of a worker cannot be read by
+                # the driver or by the other workers
+                raise ValueError(
+                    "A spill_dir shared by the workers and the driver is "
+                    "required when reduce_memory_budget is set")
+            merge_reducer = Spill.spill_reducer(reducer, spill_dir,
+                                                self.reduce_memory_budget)
+
+        if self.pack_results:
+            values = Codec.unpack(self.ProcessAndMerge(
+                Codec.pack_mapper(mapper, self.compression_level),
+                Codec.pack_reducer(merge_reducer, self.compression_level)))
+        else:
+            values = self.ProcessAndMerge(mapper, merge_reducer)
+
+        if isinstance(values, Spill.SpilledValues):
+            values = Spill.merge_files(values, reducer, spill_dir,
+                                       self.spill_merge_batch_size)
+
+        return values
+
+    def _process_progressively(self, nodes, mapper, reducer):
+        """
+        Runs the mapper on every range of the dataset and merges the values
+        on the driver in the order in which the ranges are completed. The
+        values merged so far are stored in the action nodes after every
+        range.
+
+        Args:
+            nodes (list): The action nodes of the graph, in the same order as
+                the values returned by the mapper.
+
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            reducer (function): A function that merges two lists that were
+                returned by the mapper.
+
+        Returns:
+            list: The merged values of the action nodes.
+        """
+        def counting_mapper(current_range):
+            return _count_entries(current_range), mapper(current_range)
+
+        values = None
+        processed_entries = 0
+        with self._monitor_progress(counting_mapper) as monitored_mapper:
+            results = self.ProcessAndIterate(monitored_mapper, ordered=False)
+            for nentries, range_values in results:
+                if values is None:
+                    values = range_values
+                else:
+                    values = reducer(values, range_values)
+
+                processed_entries += nentries
+                progress = min(processed_entries / float(self.nentries), 1.0)
+                for node, value in zip(nodes, values):
+                    self._set_partial_value(node, value, progress)
+
+        return values
+
     def execute(self, generator):
         """
         Executes the current RDataFrame graph
@@ -485,15 +1971,507 @@ class DistBackend(Base.BaseBackend):
                 :obj:`CallableGenerator` that is responsible for generating
                 the callable function.
         """
-        callable_function = generator.get_callable()
+        execution = self._prepare_execution(generator)
+        if execution is not None:
+            self._run_execution(generator.head_node, *execution)
+
+    def _prepare_execution(self, generator):
+        """
+        Optimizes the graph, retrieves the cached results and builds the
+        functions that process the dataset.
+
+        Args:
+            generator (PyRDF.CallableGenerator): An instance of
+                :obj:`CallableGenerator` of the graph.
+
+        Returns:
+            tuple: The action nodes to be computed, the cache keys of their
+            results, the mapper and the reducer, or :obj:`None` if every
+            result was retrieved from the cache.
+        """
+        # Merge identical branches of the graph so they run only once
+        GraphOptimizer.merge_common_nodes(generator.head_node)
+
+        if self.fuse_filters and self.reorder_filters:
+            # Only fused filters are reordered
+            self._update_filter_selectivity(generator.head_node)
+            filter_selectivity = self.filter_selectivity
+        else:
+            filter_selectivity = None
+
+        if self.result_cache is not None:
+            # Cached actions get their value here and are pruned afterwards
+            cache_keys = self._fill_cached_results(generator.head_node)
+        else:
+            cache_keys = {}
+
+        callable_function = generator.get_callable(
+            fuse_filters=self.fuse_filters,
+            filter_selectivity=filter_selectivity)
+
+        # List of action nodes in the same order as values
+        nodes = generator.get_action_nodes()
+        if not nodes:
+            # Every result was retrieved from the cache
+            return None
+
+        mapper, reducer = self._build_mapper_and_reducer(
+            generator.head_node, callable_function, nodes)
+
+        self._load_dataset_info(generator.head_node)
+
+        return nodes, cache_keys, mapper, reducer
+
+    def _needs_own_execution(self, nodes):
+        """
+        Checks whether a graph has to be processed on its own, instead of
+        together with other graphs.
+
+        Args:
+            nodes (list): The action nodes of the graph.
+
+        Returns:
+            bool: True for graphs processed incrementally, progressively or
+            writing delta snapshots.
+        """
+        return (self.progressive_merge or
+                any(_is_delta_snapshot(node) for node in nodes) or
+                self._can_process_incrementally(nodes))
+
+    def _run_execution(self, head_node, nodes, cache_keys, mapper, reducer):
+        """
+        Processes the dataset of a prepared graph and sets the value of its
+        action nodes.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+            nodes (list): The action nodes, in the same order as the values
+                returned by the mapper.
+
+            cache_keys (dict): Cache keys of the results of the action nodes.
+
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            reducer (function): A function that merges two lists that were
+                returned by the mapper.
+        """
+        if any(_is_delta_snapshot(node) for node in nodes):
+            self._check_delta_snapshots(head_node, nodes)
+            # Every range of a delta snapshot belongs to a single input file
+            self._file_aligned_ranges = True
+
+        # Values produced after Map-Reduce
+        try:
+            if self._can_process_incrementally(nodes):
+                if self.progressive_merge:
+                    warnings.warn("Progressive merging is not supported with "
+                                  "incremental execution, partial values "
+                                  "will not be available.", UserWarning,
+                                  stacklevel=3)
+                values = self._process_incrementally(head_node, nodes,
+                                                     mapper, reducer)
+            elif self.progressive_merge:
+                if (self.pack_results or
+                        self.reduce_memory_budget is not None):
+                    warnings.warn("Values merged progressively on the driver "
+                                  "are neither packed nor spilled to disk, "
+                                  "pack_results and reduce_memory_budget are "
+                                  "ignored.", UserWarning, stacklevel=3)
+                values = self._process_progressively(nodes, mapper, reducer)
+            else:
+                values = self._process_and_merge(mapper, reducer)
+        finally:
+            self._file_aligned_ranges = False
+
+        self._set_values(nodes, values, cache_keys)
+
+    def _set_values(self, nodes, values, cache_keys):
+        """
+        Stores the merged values in the action nodes and in the cache.
+
+        Args:
+            nodes (list): The action nodes.
+
+            values (list): The merged values, in the same order as the nodes.
+
+            cache_keys (dict): Cache keys of the results of the action nodes.
+        """
+        for node, value in zip(nodes, values):
+            if node in cache_keys:
+                self.result_cache.put(cache_keys[node], value)
+            self._set_value(node, value)
+
+        if self.profile:
+            # The profile of the graph follows the values of the actions
+            self._set_profile(nodes[0].get_head(), values[len(nodes)])
+
+    def _set_profile(self, head_node, profile):
+        """
+        Stores the profile of every transformation of a graph in its node.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+            profile (PyRDF.Profiler.GraphProfile): The merged profile.
+        """
+        if profile.nodes is None:
+            logger.warning("The transformations of the graph were not "
+                           "profiled, implicit multithreading was enabled "
+                           "while processing some ranges")
+            return
+
+        for node, node_profile in zip(Profiler.get_profiled_nodes(head_node),
+                                      profile.nodes):
+            for profiled_node in [node] + node.merged_nodes:
+                profiled_node.profile = node_profile
+
+    def execute_graphs(self, generators):
+        """
+        Executes several RDataFrame graphs in a single submission. The ranges
+        of all graphs are interleaved and processed together, then the values
+        of every graph are stored in its action nodes. Graphs of other types
+        of backends, or needing incremental or progressive processing, are
+        executed on their own.
+
+        Args:
+            generators (list): Instances of :obj:`CallableGenerator` of the
+                graphs.
+        """
+        executions = []
+        # Headers and libraries of every graph are declared on the workers
+        # for this submission only
+        headers = set(self.headers)
+        shared_libraries = set(self.shared_libraries)
+        for generator in generators:
+            backend = generator.head_node.backend
+            if not isinstance(backend, DistBackend):
+                backend.execute(generator)
+                continue
+
+            execution = backend._prepare_execution(generator)
+            if execution is None:
+                continue
+
+            nodes = execution[0]
+            if backend._needs_own_execution(nodes):
+                backend._run_execution(generator.head_node, *execution)
+                continue
+
+            # The ranges are built now, since the dataset information is
+            # replaced if the same backend prepares another graph
+            executions.append((backend, execution, backend.build_ranges()))
+            headers.update(backend.headers)
+            shared_libraries.update(backend.shared_libraries)
+
+        if not executions:
+            return
+
+        logger.debug("Processing %d graphs together", len(executions))
+        mapper, reducer = combine_graphs(
+            [mapper for _, (_, _, mapper, _), _ in executions],
+            [len(nodes) + int(backend.profile)
+             for backend, (nodes, _, _, _), _ in executions],
+            executions[0][1][3])
+        tasks = interleave_ranges([ranges for _, _, ranges in executions])
+
+        # One task per range, like the ranges of a single graph
+        npartitions = self.npartitions
+        own_headers = self.headers
+        own_shared_libraries = self.shared_libraries
+        self._prebuilt_ranges = tasks
+        self.npartitions = len(tasks)
+        self.headers = headers
+        self.shared_libraries = shared_libraries
+        try:
+            values = self._process_and_merge(mapper, reducer)
+        finally:
+            self._prebuilt_ranges = None
+            self.npartitions = npartitions
+            self.headers = own_headers
+            self.shared_libraries = own_shared_libraries
+
+        offset = 0
+        for backend, (nodes, cache_keys, _, _), _ in executions:
+            nvalues = len(nodes) + int(backend.profile)
+            backend._set_values(nodes, values[offset:offset + nvalues],
+                                cache_keys)
+            offset += nvalues
+
+    def execute_batches(self, generator, batch_node, batch_size=None,
+                        prefetch=1):
+        """
+        Executes the current RDataFrame graph in the given distributed
+        environment and streams the numpy arrays extracted by one of its
+        nodes as ranges are processed, instead of merging them.
+
+        The rest of the actions of the graph run in the same pass over the
+        data, they get their values once all batches have been consumed.
+
+        Args:
+            generator (PyRDF.CallableGenerator): An instance of
+                :obj:`CallableGenerator` that is responsible for generating
+                the callable function.
+
+            batch_node (PyRDF.Node.Node): A lazy `AsNumpy` node of the graph.
+
+            batch_size (int, optional): Number of entries of every batch. If
+                `None`, one batch per range is returned.
+
+            prefetch (int, optional): Number of range results fetched from
+                the workers in advance while batches are being consumed.
+
+        Yields:
+            dict: The numpy arrays of every column for the entries of a batch.
+        """
+        callable_function = generator.get_callable(
+            fuse_filters=self.fuse_filters)
+
+        nodes = generator.get_action_nodes()
+        index = nodes.index(batch_node)
+
+        mapper, reducer = self._build_mapper_and_reducer(
+            generator.head_node, callable_function, nodes)
+
+        self._load_dataset_info(generator.head_node)
+
+        # Merged values of the other actions of the graph
+        merged = [None]
+
+        # Jobs cancelled if the consumer stops before the last batch
+        job_id = "pyrdf-{}".format(uuid.uuid4().hex)
+
+        def column_chunks():
+            with self._monitor_progress(mapper) as monitored_mapper:
+                results = _iterate_in_job_group(
+                    self, self.ProcessAndIterate(monitored_mapper), job_id)
+                prefetched = _prefetch(results, prefetch)
+                try:
+                    for values in prefetched:
+                        (columns,) = values[index].values()
+                        # The arrays are streamed, they never go through the
+                        # reducer
+                        values[index] = {}
+                        if merged[0] is None:
+                            merged[0] = values
+                        else:
+                            merged[0] = reducer(merged[0], values)
+                        yield columns
+                finally:
+                    prefetched.close()
+
+        chunks = column_chunks()
+        try:
+            for batch in _split_batches(chunks, batch_size):
+                yield batch
+        except GeneratorExit:
+            # The consumer stopped early, the jobs in flight are not needed
+            self.cancel_job(job_id)
+            chunks.close()
+            raise
+
+        for node, value in zip(nodes, merged[0] or []):
+            if node is not batch_node:
+                self._set_value(node, value)
+
+        if self.profile and merged[0]:
+            self._set_profile(generator.head_node, merged[0][len(nodes)])
+
+    def execute_distributed(self, generator, distributed_node):
+        """
+        Executes the current RDataFrame graph in the given distributed
+        environment, keeping the numpy arrays extracted by one of its nodes
+        on the workers. The value of that node is a backend-specific handle
+        to a distributed collection with the `AsNumpy` result of every range,
+        in the order of the ranges.
+
+        The rest of the actions of the graph run in the same pass over the
+        data and are merged as usual.
+
+        Args:
+            generator (PyRDF.CallableGenerator): An instance of
+                :obj:`CallableGenerator` that is responsible for generating
+                the callable function.
+
+            distributed_node (PyRDF.Node.Node): An `AsNumpy` node of the
+                graph.
+        """
+        callable_function = generator.get_callable(
+            fuse_filters=self.fuse_filters)
+
+        nodes = generator.get_action_nodes()
+        index = nodes.index(distributed_node)
+
+        mapper, reducer = self._build_mapper_and_reducer(
+            generator.head_node, callable_function, nodes)
+
+        self._load_dataset_info(generator.head_node)
+
+        with self._monitor_progress(mapper) as monitored_mapper:
+            handle, values = self.ProcessAndDistribute(monitored_mapper,
+                                                       reducer, index)
+
+        for node, value in zip(nodes, values):
+            if node is distributed_node:
+                node.value = handle
+            else:
+                self._set_value(node, value)
+
+        if self.profile:
+            self._set_profile(generator.head_node, values[len(nodes)])
+
+    def checkpoint(self, generator, node, directory, treename):
+        """
+        Materializes the dataset at a node of the graph, i.e. its entries
+        after the filters and with the columns defined up to that node. The
+        dataset is written with a distributed `Snapshot` the first time and
+        reused afterwards, as long as the operations up to the node, the
+        input dataset and the written files did not change.
+
+        The rest of the actions of the graph run in the same pass over the
+        data when the dataset is written.
+
+        Args:
+            generator (PyRDF.CallableGenerator): An instance of
+                :obj:`CallableGenerator` that is responsible for generating
+                the callable function.
+
+            node (PyRDF.Node.Node): The node to be materialized.
+
+            directory (str): Directory where the checkpoints are stored. It
+                must be reachable from the workers and from the driver.
+
+            treename (str): Name of the tree written in the checkpoint files.
+
+        Returns:
+            A new dataframe reading the materialized dataset.
+        """
+        head_node = generator.head_node
+        operations = [ancestor.operation
+                      for ancestor in _get_ancestors(head_node, node)]
+        if node is not head_node:
+            operations.append(node.operation)
+
+        key = Cache.make_key(operations,
+                             self._get_dataset_fingerprint(head_node),
+                             treename)
+        checkpoint_dir = os.path.join(directory, key)
+        manifest_path = os.path.join(checkpoint_dir, "manifest.pkl")
+
+        files = _load_checkpoint_manifest(manifest_path)
+        if files is None:
+            logger.debug("Writing checkpoint %s", checkpoint_dir)
+            files = self._write_checkpoint(generator, node, checkpoint_dir,
+                                           treename)
+            _save_checkpoint_manifest(manifest_path, files)
+        else:
+            logger.debug("Reusing checkpoint %s", checkpoint_dir)
+
+        return self._make_snapshot_dataframe(treename, files)
+
+    def _write_checkpoint(self, generator, node, checkpoint_dir, treename):
+        """
+        Writes the dataset at a node of the graph with a distributed
+        `Snapshot` and runs the rest of the actions of the graph.
+
+        Args:
+            generator (PyRDF.CallableGenerator): An instance of
+                :obj:`CallableGenerator` that is responsible for generating
+                the callable function.
+
+            node (PyRDF.Node.Node): The node to be materialized.
+
+            checkpoint_dir (str): Directory where the files are written.
+
+            treename (str): Name of the tree written in the files.
+
+        Returns:
+            list: Path to every written file and its layout.
+        """
+        if not os.path.isdir(checkpoint_dir):
+            os.makedirs(checkpoint_dir)
+
+        filename = os.path.join(checkpoint_dir, "checkpoint.root")
+        operation = Operation("Snapshot", treename, filename)
+        snapshot_node = Node.Node(operation=operation, get_head=node.get_head)
+        node.children.append(snapshot_node)
+
+        try:
+            callable_function = generator.get_callable(
+                fuse_filters=self.fuse_filters)
+
+            nodes = generator.get_action_nodes()
+
+            mapper, reducer = self._build_mapper_and_reducer(
+                generator.head_node, callable_function, nodes)
+
+            self._load_dataset_info(generator.head_node)
+
+            values = self._process_and_merge(mapper, reducer)
+        finally:
+            # The snapshot is not part of the graph of the user
+            snapshot_node.has_user_references = False
+
+        files = None
+        for action_node, value in zip(nodes, values):
+            if action_node is snapshot_node:
+                files = self._merge_snapshot_files(treename, filename, value)
+            else:
+                self._set_value(action_node, value)
+
+        if self.profile:
+            self._set_profile(generator.head_node, values[len(nodes)])
+        return files
+
+    def _build_mapper_and_reducer(self, head_node, callable_function, nodes):
+        """
+        Builds the functions that process a range of the dataset and merge
+        the results of two ranges.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+            callable_function (function): The callable generated from the
+                graph.
+
+            nodes (list): Action nodes of the graph, in the same order as the
+                values returned by the callable.
+
+        Returns:
+            tuple: The mapper and the reducer functions.
+        """
         # Arguments needed to create PyROOT RDF object
-        rdf_args = generator.head_node.args
-        treename = generator.head_node.get_treename()
-        selected_branches = generator.head_node.get_branches()
+        rdf_args = head_node.args
+        treename = head_node.get_treename()
+        selected_branches = head_node.get_branches()
 
         # Avoid having references to the instance inside the mapper
         initialization = Base.BaseBackend.initialization
 
+        # Directories where the AsNumpy results are written, if any
+        output_dirs = [node.operation.kwargs.get("output_dir")
+                       if node.operation.name == "AsNumpy" else None
+                       for node in nodes]
+
+        # Histograms merged through numpy arrays
+        numpy_merge = [self.numpy_histogram_merge and
+                       _has_histogram_model(node) for node in nodes]
+
+        # Snapshots writing only the columns defined in the graph
+        delta_snapshots = [_is_delta_snapshot(node) for node in nodes]
+
+        # Profiling of the transformations of the graph
+        profile = self.profile
+        profile_sampling_period = self.profile_sampling_period
+        timed_nodes = [Profiler.is_timed(node.operation)
+                       for node in Profiler.get_profiled_nodes(head_node)]
+
+        # Trees written by the snapshots, if any
+        snapshot_treenames = [node.operation.args[0]
+                              if node.operation.name == "Snapshot" else None
+                              for node in nodes]
+
         def mapper(current_range):
             """
             Triggers the event-loop and executes all
@@ -564,14 +2542,71 @@ class DistBackend(Base.BaseBackend):
             # rdf_range = rdf.Range(current_range.start, current_range.end)
 
             # Output of the callable
-            output = callable_function(rdf, rdf_range=current_range)
-
-            mergeables = [
-                resultptr  # Here resultptr is already the result value
-                if isinstance(resultptr, (dict, list))
-                else ROOT.ROOT.Detail.RDF.GetMergeableValue(resultptr)
-                for resultptr in output
-            ]
+            # The timers are not synchronized, event loops running on several
+            # threads are not profiled
+            profiled = profile and not ROOT.IsImplicitMTEnabled()
+            profile_counts = None
+            if profiled:
+                profile_counts = []
+                Profiler.reset(profile_sampling_period)
+
+            output = callable_function(rdf, rdf_range=current_range,
+                                       profile_counts=profile_counts)
+
+            mergeables = []
+            for (resultptr, output_dir, to_numpy, delta,
+                 snapshot_treename) in zip(output, output_dirs, numpy_merge,
+                                           delta_snapshots,
+                                           snapshot_treenames):
+                if isinstance(resultptr, dict) and output_dir:
+                    # Only the paths to the partial arrays are sent back
+                    mergeables.append({(current_range.id,): _write_array_chunk(
+                        resultptr, output_dir, current_range.id)})
+                elif isinstance(resultptr, dict):
+                    # Partial numpy arrays are indexed by range so that they
+                    # can be concatenated in order once all are available.
+                    mergeables.append({(current_range.id,): resultptr})
+                elif isinstance(resultptr, list) and delta:
+                    # The files of a delta snapshot are kept in the order of
+                    # the ranges to be aligned with the input files
+                    (path,) = resultptr
+                    mergeables.append({(current_range.id,): (
+                        path, current_range.filelist[0])})
+                elif isinstance(resultptr, list):
+                    # Here resultptr is already the result value, the
+                    # layout of the written files is sent along with their
+                    # paths so that the driver does not need to open them.
+                    # They are keyed by range to be merged in order.
+                    mergeables.append({(current_range.id,): [
+                        (path, Snapshots.read_file_layout(path,
+                                                          snapshot_treename))
+                        for path in resultptr]})
+                else:
+                    mergeable = None
+                    if to_numpy:
+                        mergeable = Histograms.from_histogram(
+                            resultptr.GetValue())
+                    if mergeable is None:
+                        mergeable = ROOT.ROOT.Detail.RDF.GetMergeableValue(
+                            resultptr)
+                    mergeables.append(mergeable)
+
+            if profiled:
+                # The counts run in the same event loop as the actions, the
+                # profile of the graph follows their values
+                entries = [count.GetValue() for count in profile_counts]
+                evaluations, seconds = Profiler.read_timers(len(entries))
+                node_profiles = []
+                for timed, figures in zip(timed_nodes,
+                                          zip(entries, evaluations, seconds)):
+                    if not timed:
+                        # Only the entries are known for expressions with
+                        # statements
+                        figures = (figures[0], None, None)
+                    node_profiles.append(Profiler.NodeProfile(*figures))
+                mergeables.append(Profiler.GraphProfile(node_profiles))
+            elif profile:
+                mergeables.append(Profiler.GraphProfile(None))
             return mergeables
 
         def reducer(mergeables_out, mergeables_in):
@@ -595,23 +2630,26 @@ class DistBackend(Base.BaseBackend):
 
             import ROOT
 
-            # We still need the list index to modify results of `Snapshot` and
-            # `AsNumpy` in place.
+            # We still need the list index to replace histograms whose
+            # numpy arrays could not be merged.
             for index, (mergeable_out, mergeable_in) in enumerate(
                     zip(mergeables_out, mergeables_in)):
-                # Create a global list with all the files of the partial
-                # snapshots.
-                if isinstance(mergeable_out, list):
-                    mergeables_out[index].extend(mergeable_in)
-
-                # Concatenate the partial numpy arrays along the same key of
-                # the dictionary.
-                elif isinstance(mergeable_out, dict):
-                    mergeables_out[index] = {
-                        key: numpy.concatenate([mergeable_out[key],
-                                                mergeable_in[key]])
-                        for key in mergeable_out
-                    }
+                # Collect the partial files of the snapshots and the partial
+                # numpy arrays of every range, keyed by range, they are
+                # sorted and concatenated only once at the end.
+                if isinstance(mergeable_out, dict):
+                    mergeable_out.update(mergeable_in)
+
+                # Profiles of the graph add the figures of every range
+                elif isinstance(mergeable_out, Profiler.GraphProfile):
+                    mergeable_out.merge(mergeable_in)
+
+                # Histograms exported to numpy arrays are added with numpy,
+                # or by ROOT if their binning differs
+                elif (isinstance(mergeable_out, Histograms.HistogramArrays) or
+                      isinstance(mergeable_in, Histograms.HistogramArrays)):
+                    mergeables_out[index] = Histograms.merge_values(
+                        mergeable_out, mergeable_in)
 
                 # The `MergeValues` function modifies the arguments in place
                 # so there's no need to access the list elements.
@@ -621,18 +2659,34 @@ class DistBackend(Base.BaseBackend):
 
             return mergeables_out
 
+        return mapper, reducer
+
+    def _load_dataset_info(self, head_node):
+        """
+        Retrieves the information about the input dataset needed to split it
+        in ranges.
+
+        Args:
+            head_node (PyRDF.Node.HeadNode): Head node of the graph.
+
+        Raises:
+            RuntimeError: If the dataset has no entries.
+        """
         # Get number of entries in the input dataset using
         # arguments passed to RDataFrame constructor
-        self.nentries = generator.head_node.get_num_entries()
+        self.nentries = head_node.get_num_entries()
 
         # Retrieve the treename used to initialize the RDataFrame
-        self.treename = generator.head_node.get_treename()
+        self.treename = head_node.get_treename()
 
         # Retrieve the filenames used to initialize the RDataFrame
-        self.files = generator.head_node.get_inputfiles()
+        self.files = head_node.get_inputfiles()
 
         # Retrieve the ROOT.TTree instance used to initialize the RDataFrame
-        self.tree = generator.head_node.get_tree()
+        self.tree = head_node.get_tree()
+
+        # Known number of entries and clusters of the input files
+        self.file_layouts = head_node.file_layouts
 
         # Retrieve info about the friend trees
         if self.tree:
@@ -643,27 +2697,6 @@ class DistBackend(Base.BaseBackend):
             raise RuntimeError(
                 "No entries in the TTree, distributed execution aborted!")
 
-        # Values produced after Map-Reduce
-        values = self.ProcessAndMerge(mapper, reducer)
-        # List of action nodes in the same order as values
-        nodes = generator.get_action_nodes()
-
-        # Set the value of every action node
-        for node, value in zip(nodes, values):
-            if node.operation.name == "Snapshot":
-                # Retrieve treename from operation args and start TChain
-                snapshot_treename = node.operation.args[0]
-                snapshot_chain = ROOT.TChain(snapshot_treename)
-                # Add partial snapshot files to the chain
-                for filename in value:
-                    snapshot_chain.Add(filename)
-                # Create a new rdf with the chain and return that to user
-                node.value = self.make_dataframe(snapshot_chain)
-            elif node.operation.name == "AsNumpy":
-                node.value = value
-            else:
-                node.value = value.GetValue()
-
     @abstractmethod
     def ProcessAndMerge(self, mapper, reducer):
         """
@@ -672,6 +2705,88 @@ class DistBackend(Base.BaseBackend):
         """
         pass
 
+    def make_progress_accumulator(self):
+        """
+        Creates the object receiving the figures of every processed range,
+        see `Progress.LocalAccumulator` for its interface. Backends running
+        the mappers in other processes must return an accumulator that sends
+        the figures back to the driver. The default one only works with
+        mappers running in the driver process.
+
+        Returns:
+            PyRDF.Backends.Progress.LocalAccumulator: The accumulator.
+        """
+        return Progress.LocalAccumulator()
+
+    def RunTasks(self, function, tasks):
+        """
+        Runs a function on every task. Subclasses should run the tasks in
+        parallel on the workers, the default implementation runs them
+        sequentially on the driver.
+
+        Args:
+            function (function): A function that receives a task.
+
+            tasks (list): The arguments of every call to the function.
+
+        Returns:
+            list: The values returned by the function for every task, in the
+            same order.
+        """
+        return [function(task) for task in tasks]
+
+    def ProcessAndIterate(self, mapper, ordered=True):
+        """
+        Runs the mapper on every range of the dataset and returns an iterator
+        over its results, in the order of the ranges. Subclasses supporting
+        streaming should fetch the results lazily, so that only a few of them
+        are held by the driver at the same time.
+
+        Args:
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            ordered (bool, optional): Whether the results are returned in the
+                order of the ranges. Otherwise they are returned as soon as
+                their range is processed.
+
+        Raises:
+            NotImplementedError: If the backend doesn't support streaming.
+        """
+        raise NotImplementedError(
+            "The {} backend cannot stream results".format(
+                type(self).__name__))
+
+    def ProcessAndDistribute(self, mapper, reducer, index):
+        """
+        Runs the mapper on every range of the dataset, keeping the `AsNumpy`
+        results found at the given position of the values on the workers and
+        merging the rest of the values.
+
+        Args:
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            reducer (function): A function that merges two lists that were
+                returned by the mapper.
+
+            index (int): Position of the `AsNumpy` results in the list of
+                values returned by the mapper.
+
+        Returns:
+            tuple: A handle to the distributed collection of `AsNumpy`
+            results and the list of merged values. The value at `index` in
+            this list is meaningless. The resources kept on the workers
+            should be released once the handle is garbage collected.
+
+        Raises:
+            NotImplementedError: If the backend doesn't support keeping
+                results on the workers.
+        """
+        raise NotImplementedError(
+            "The {} backend cannot keep results on the workers".format(
+                type(self).__name__))
+
     @abstractmethod
     def distribute_unique_paths(self, paths):
         """
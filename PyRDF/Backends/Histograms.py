@@ -0,0 +1,243 @@
+"""
+Merging of ROOT histograms through numpy arrays.
+"""
+import logging
+
+import numpy
+import ROOT
+
+logger = logging.getLogger(__name__)
+
+# Histogram classes created by the Histo1D, Histo2D and Histo3D operations
+SUPPORTED_CLASSES = ("TH1D", "TH2D", "TH3D")
+
+# Size of the array of statistics of a histogram (TH1::kNstat)
+NSTATS = 13
+
+
+def _to_numpy(buffer, size):
+    """
+    Copies the first `size` doubles of a buffer to a numpy array.
+
+    Args:
+        buffer: A PyROOT view on a C++ array of doubles.
+
+        size (int): Number of elements to copy.
+
+    Returns:
+        numpy.ndarray: The copied elements.
+    """
+    return numpy.frombuffer(buffer, dtype=numpy.float64, count=size).copy()
+
+
+def _get_axis_binning(axis):
+    """
+    Describes the binning of an axis.
+
+    Args:
+        axis (ROOT.TAxis): The axis of a histogram.
+
+    Returns:
+        tuple: The number of bins, the limits of the axis and the edges of
+        every bin, or :obj:`None` if all bins have the same size.
+    """
+    nbins = axis.GetNbins()
+    edges = None
+    if axis.GetXbins().GetSize():
+        edges = tuple(axis.GetBinLowEdge(i) for i in range(1, nbins + 2))
+    return (nbins, axis.GetXmin(), axis.GetXmax(), edges)
+
+
+def from_histogram(histogram):
+    """
+    Exports the content of a histogram to numpy arrays.
+
+    Args:
+        histogram (ROOT.TH1): The histogram.
+
+    Returns:
+        HistogramArrays: The exported histogram, or :obj:`None` if it can
+        only be merged by ROOT (unsupported class or labelled axes).
+    """
+    class_name = histogram.ClassName()
+    if class_name not in SUPPORTED_CLASSES:
+        return None
+
+    dimension = histogram.GetDimension()
+    axes = [histogram.GetXaxis(), histogram.GetYaxis(),
+            histogram.GetZaxis()][:dimension]
+    if any(axis.GetLabels() for axis in axes):
+        return None
+
+    ncells = histogram.GetNcells()
+    contents = _to_numpy(histogram.GetArray(), ncells)
+
+    sumw2 = None
+    if histogram.GetSumw2N():
+        sumw2 = _to_numpy(histogram.GetSumw2().GetArray(), ncells)
+
+    stats = numpy.zeros(NSTATS)
+    histogram.GetStats(stats)
+
+    return HistogramArrays(class_name,
+                           histogram.GetName(),
+                           histogram.GetTitle(),
+                           [_get_axis_binning(axis) for axis in axes],
+                           contents, sumw2, stats, histogram.GetEntries())
+
+
+class HistogramArrays(object):
+    """
+    Content of a histogram stored in numpy arrays. Histograms with the same
+    binning are merged with vectorized numpy operations, the ROOT histogram
+    is only rebuilt when its value is retrieved.
+
+    Attributes:
+        class_name (str): Name of the ROOT class of the histogram.
+
+        name (str): Name of the histogram.
+
+        title (str): Title of the histogram.
+
+        axes (list): Binning of every axis, as returned by
+            `_get_axis_binning`.
+
+        contents (numpy.ndarray): Content of every bin, including underflow
+            and overflow bins.
+
+        sumw2 (numpy.ndarray): Sum of the squares of the weights of every
+            bin, or :obj:`None` if they are not stored.
+
+        stats (numpy.ndarray): Statistics of the histogram (sum of weights,
+            sum of weights squared, sum of weights times x...).
+
+        entries (float): Number of entries of the histogram.
+    """
+
+    def __init__(self, class_name, name, title, axes, contents, sumw2, stats,
+                 entries):
+        """Creates a histogram from its content."""
+        self.class_name = class_name
+        self.name = name
+        self.title = title
+        self.axes = axes
+        self.contents = contents
+        self.sumw2 = sumw2
+        self.stats = stats
+        self.entries = entries
+
+    def can_merge(self, other):
+        """
+        Checks whether another histogram can be added to this one with numpy.
+
+        Args:
+            other (HistogramArrays): The other histogram.
+
+        Returns:
+            bool: True if both histograms have the same class and binning.
+        """
+        return (self.class_name == other.class_name and
+                self.axes == other.axes)
+
+    def merge(self, other):
+        """
+        Adds the content of another histogram to this one.
+
+        Args:
+            other (HistogramArrays): The histogram to be added.
+
+        Raises:
+            ValueError: If the histograms have different binning.
+        """
+        if not self.can_merge(other):
+            raise ValueError(
+                "Cannot merge histograms \"{}\" and \"{}\" with different "
+                "binning".format(self.name, other.name))
+
+        # Without stored squares of the weights, unit weights are assumed and
+        # they are equal to the contents
+        if self.sumw2 is not None and other.sumw2 is not None:
+            self.sumw2 += other.sumw2
+        elif other.sumw2 is not None:
+            self.sumw2 = self.contents + other.sumw2
+        elif self.sumw2 is not None:
+            self.sumw2 += other.contents
+
+        self.contents += other.contents
+        self.stats += other.stats
+        self.entries += other.entries
+
+    def GetValue(self):
+        """
+        Rebuilds the ROOT histogram.
+
+        Returns:
+            ROOT.TH1: The histogram, with the same class, binning and content
+            as the merged histograms.
+        """
+        histogram_class = getattr(ROOT, self.class_name)
+
+        args = []
+        if all(edges is None for _, _, _, edges in self.axes):
+            # Fixed size bins
+            for nbins, xmin, xmax, _ in self.axes:
+                args.extend((nbins, xmin, xmax))
+        else:
+            for nbins, xmin, xmax, edges in self.axes:
+                if edges is None:
+                    edges = numpy.linspace(xmin, xmax, nbins + 1)
+                args.extend((nbins, numpy.array(edges, dtype=numpy.float64)))
+
+        histogram = histogram_class(self.name, self.title, *args)
+        histogram.SetDirectory(0)
+
+        histogram.SetContent(self.contents)
+        if self.sumw2 is not None:
+            histogram.Sumw2()
+            histogram.GetSumw2().Set(len(self.sumw2), self.sumw2)
+        histogram.PutStats(self.stats)
+        histogram.SetEntries(self.entries)
+
+        return histogram
+
+
+def merge_values(value_out, value_in):
+    """
+    Merges two values of a histogram action where at least one of them was
+    exported to numpy arrays. Histograms with the same binning are added with
+    numpy. Otherwise, e.g. for histograms binned automatically from the range
+    of the values of every range or when one of them could not be exported,
+    they are merged by ROOT.
+
+    Args:
+        value_out: The value receiving the merge, either a
+            :obj:`HistogramArrays` or a ROOT mergeable value.
+
+        value_in: The value to be added, of either kind.
+
+    Returns:
+        The merged value, which replaces `value_out`.
+    """
+    if (isinstance(value_out, HistogramArrays) and
+            isinstance(value_in, HistogramArrays) and
+            value_out.can_merge(value_in)):
+        value_out.merge(value_in)
+        return value_out
+
+    # ROOT mergeable values are merged in place, the other value is rebuilt
+    # as a ROOT histogram and added with `TH1::Merge`, which also handles
+    # different axes
+    if isinstance(value_out, HistogramArrays):
+        target, other = value_in, value_out
+    else:
+        target, other = value_out, value_in
+
+    histogram = target.GetValue()
+    histograms = ROOT.TList()
+    histograms.Add(other.GetValue())
+    histogram.Merge(histograms)
+
+    if isinstance(target, HistogramArrays):
+        # Both histograms were rebuilt, the merged one is exported again
+        return from_histogram(histogram)
+    return target
@@ -0,0 +1,325 @@
+"""
+Reporting of the progress of a distributed execution.
+"""
+import collections
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Figures sent by the workers: number of processed ranges and entries, bytes
+# read from the input files and time spent processing, in seconds
+RangeStats = collections.namedtuple("RangeStats",
+                                    ["ranges", "entries", "bytes", "seconds"])
+
+EMPTY_STATS = RangeStats(0, 0, 0, 0.0)
+
+
+def add_stats(stats_out, stats_in):
+    """
+    Adds the figures of two groups of ranges.
+
+    Args:
+        stats_out (RangeStats): Figures of the first group.
+
+        stats_in (RangeStats): Figures of the second group.
+
+    Returns:
+        RangeStats: The figures of both groups.
+    """
+    return RangeStats(*(out + value_in
+                        for out, value_in in zip(stats_out, stats_in)))
+
+
+class LocalAccumulator(object):
+    """
+    Sum of the figures reported by mappers running in the driver process.
+    It has the same interface as a Spark accumulator, so that backends able
+    to gather figures from remote workers can provide their own.
+
+    Attributes:
+        value (RangeStats): The figures reported so far.
+    """
+
+    def __init__(self):
+        """Creates an empty accumulator."""
+        self.value = EMPTY_STATS
+        self._lock = threading.Lock()
+
+    def add(self, stats):
+        """
+        Adds the figures of a range.
+
+        Args:
+            stats (RangeStats): The figures.
+        """
+        with self._lock:
+            self.value = add_stats(self.value, stats)
+
+
+def _get_bytes_read():
+    """
+    Returns:
+        int: Number of bytes read from ROOT files by the current process.
+    """
+    import ROOT
+
+    return ROOT.TFile.GetFileBytesRead()
+
+
+def monitor_mapper(mapper, accumulator, count_entries):
+    """
+    Wraps a mapper so that it reports the figures of every range it
+    processes.
+
+    Args:
+        mapper (function): A function that processes a range.
+
+        accumulator: Object with an `add` method receiving the `RangeStats`
+            of every range, like :obj:`LocalAccumulator`.
+
+        count_entries (function): A function that returns the number of
+            entries of a range.
+
+    Returns:
+        function: The wrapped mapper.
+    """
+    def monitored_mapper(current_range):
+        bytes_read = _get_bytes_read()
+        start = time.time()
+        values = mapper(current_range)
+        accumulator.add(RangeStats(1, count_entries(current_range),
+                                   _get_bytes_read() - bytes_read,
+                                   time.time() - start))
+        return values
+
+    return monitored_mapper
+
+
+class ProgressReport(object):
+    """
+    State of an execution seen from the driver.
+
+    Attributes:
+        completed_ranges (int): Number of processed ranges.
+
+        total_ranges (int): Number of ranges of the execution.
+
+        entries (int): Number of processed entries.
+
+        total_entries (int): Number of entries of the execution.
+
+        bytes_read (int): Bytes read from the input files so far.
+
+        worker_time (float): Time spent by the workers processing ranges, in
+            seconds.
+
+        elapsed (float): Time since the execution started, in seconds.
+    """
+
+    def __init__(self, stats, total_ranges, total_entries, elapsed):
+        """
+        Creates a report from the figures reported by the workers.
+
+        Args:
+            stats (RangeStats): Sum of the figures of the processed ranges.
+
+            total_ranges (int): Number of ranges of the execution.
+
+            total_entries (int): Number of entries of the execution.
+
+            elapsed (float): Time since the execution started, in seconds.
+        """
+        self.completed_ranges = stats.ranges
+        self.total_ranges = total_ranges
+        self.entries = stats.entries
+        self.total_entries = total_entries
+        self.bytes_read = stats.bytes
+        self.worker_time = stats.seconds
+        self.elapsed = elapsed
+
+    @property
+    def done(self):
+        """bool: Whether every range was processed."""
+        return self.completed_ranges >= self.total_ranges
+
+    @property
+    def fraction(self):
+        """float: Fraction of the entries processed, from 0 to 1."""
+        if not self.total_entries:
+            return 1.0
+        return min(self.entries / float(self.total_entries), 1.0)
+
+    @property
+    def events_per_second(self):
+        """float: Entries processed per second since the start."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.entries / self.elapsed
+
+    @property
+    def bytes_per_second(self):
+        """float: Bytes read per second since the start."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bytes_read / self.elapsed
+
+    @property
+    def eta(self):
+        """
+        float: Estimated time until the end of the execution in seconds, or
+        :obj:`None` if no entry was processed yet.
+        """
+        if self.done:
+            return 0.0
+        if not self.entries:
+            return None
+        return (self.total_entries - self.entries) / self.events_per_second
+
+
+def _format_duration(seconds):
+    """
+    Formats a duration as hours, minutes and seconds.
+
+    Args:
+        seconds (float): The duration, or :obj:`None` if unknown.
+
+    Returns:
+        str: The formatted duration.
+    """
+    if seconds is None:
+        return "--:--:--"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "{}:{:02d}:{:02d}".format(hours, minutes, seconds)
+
+
+class TextProgressBar(object):
+    """
+    Progress callback drawing a text progress bar, rewritten in place on
+    every report.
+
+    Attributes:
+        stream (file): Stream where the bar is written.
+
+        width (int): Number of characters of the bar.
+    """
+
+    def __init__(self, stream=None, width=30):
+        """
+        Creates a progress bar.
+
+        Args:
+            stream (file, optional): Stream where the bar is written.
+                Defaults to the standard error.
+
+            width (int, optional): Number of characters of the bar.
+        """
+        self.stream = stream if stream is not None else sys.stderr
+        self.width = width
+
+    def format(self, report):
+        """
+        Builds the line showing a report.
+
+        Args:
+            report (ProgressReport): The report.
+
+        Returns:
+            str: The progress bar followed by the processed ranges, the
+            throughput and the estimated time left.
+        """
+        filled = int(self.width * report.fraction)
+        line = "[{}{}] {}/{} ranges, {:.3g} events/s, {:.3g} MB/s, ETA {}"
+        return line.format("#" * filled, "." * (self.width - filled),
+                           report.completed_ranges, report.total_ranges,
+                           report.events_per_second,
+                           report.bytes_per_second / 1e6,
+                           _format_duration(report.eta))
+
+    def __call__(self, report):
+        """
+        Draws the progress bar of a report.
+
+        Args:
+            report (ProgressReport): The report.
+        """
+        self.stream.write("\r" + self.format(report))
+        if report.done:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+class ProgressMonitor(object):
+    """
+    Polls the figures reported by the workers from a background thread and
+    passes a `ProgressReport` to the callbacks every time they change.
+    It is used as a context manager around the execution, a last report is
+    always sent when the execution ends.
+
+    Attributes:
+        accumulator: Object whose `value` holds the sum of the `RangeStats`
+            reported by the workers.
+
+        total_ranges (int): Number of ranges of the execution.
+
+        total_entries (int): Number of entries of the execution.
+
+        callbacks (list): Functions receiving every `ProgressReport`.
+
+        interval (float): Time between two polls, in seconds.
+    """
+
+    def __init__(self, accumulator, total_ranges, total_entries, callbacks,
+                 interval=1.0):
+        """Creates a monitor of the figures of an accumulator."""
+        self.accumulator = accumulator
+        self.total_ranges = total_ranges
+        self.total_entries = total_entries
+        self.callbacks = callbacks
+        self.interval = interval
+        self._start = None
+        self._last_stats = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def report(self):
+        """
+        Sends a report to the callbacks if the figures changed since the
+        last one. Errors of the callbacks are logged and ignored, so that
+        they cannot stop the execution.
+        """
+        stats = self.accumulator.value
+        if stats == self._last_stats:
+            return
+        self._last_stats = stats
+
+        report = ProgressReport(stats, self.total_ranges, self.total_entries,
+                                time.time() - self._start)
+        for callback in self.callbacks:
+            try:
+                callback(report)
+            except Exception:
+                logger.exception("Progress callback %s failed", callback)
+
+    def _poll(self):
+        """Reports the figures until the monitor is stopped."""
+        while not self._stopped.wait(self.interval):
+            self.report()
+
+    def __enter__(self):
+        """Starts polling the figures."""
+        self._start = time.time()
+        self.report()
+        self._thread = threading.Thread(target=self._poll)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stops polling and sends the last report."""
+        self._stopped.set()
+        self._thread.join()
+        self.report()
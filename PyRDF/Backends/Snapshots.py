@@ -0,0 +1,205 @@
+"""
+Merging of the partial files written by a distributed `Snapshot`.
+"""
+import collections
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Number of entries of the tree of a file and boundaries of its clusters, as
+# a list of (first entry, last entry (exclusive)) pairs
+FileLayout = collections.namedtuple("FileLayout", ["entries", "clusters"])
+
+# Identifiers of the compression algorithms of ROOT (ROOT::RCompressionSetting)
+COMPRESSION_ALGORITHMS = {
+    "zlib": 1,
+    "lzma": 2,
+    "lz4": 4,
+    "zstd": 5
+}
+
+
+def read_file_layout(filename, treename):
+    """
+    Reads the number of entries and the cluster boundaries of a tree.
+
+    Args:
+        filename (str): Path to the ROOT file.
+
+        treename (str): Name of the tree in the file.
+
+    Returns:
+        FileLayout: The layout of the tree.
+    """
+    import ROOT
+
+    f = ROOT.TFile.Open(filename)
+    t = f.Get(treename)
+
+    entries = t.GetEntriesFast()
+    it = t.GetClusterIterator(0)
+    start = it()
+    clusters = []
+
+    while start < entries:
+        end = it()
+        clusters.append((start, end))
+        start = end
+
+    f.Close()
+    return FileLayout(entries, clusters)
+
+
+def get_compression_setting(algorithm, level):
+    """
+    Builds the compression setting of a ROOT file.
+
+    Args:
+        algorithm (str): Name of the compression algorithm, one of the keys
+            of `COMPRESSION_ALGORITHMS`, or :obj:`None` for the default
+            algorithm of ROOT.
+
+        level (int): Compression level, from 0 (no compression) to 9, or
+            :obj:`None` for level 1 with the given algorithm.
+
+    Returns:
+        int: The compression setting, or :obj:`None` for the default one if
+        neither the algorithm nor the level is given.
+
+    Raises:
+        ValueError: If the algorithm is unknown.
+    """
+    if algorithm is None:
+        # An algorithm of 0 stands for the default algorithm of ROOT
+        return level
+
+    if level is None:
+        level = 1
+
+    try:
+        return COMPRESSION_ALGORITHMS[algorithm.lower()] * 100 + level
+    except KeyError:
+        raise ValueError(
+            "Unknown compression algorithm \"{}\", expected one of: {}".format(
+                algorithm, ", ".join(sorted(COMPRESSION_ALGORITHMS))))
+
+
+def group_files(paths, sizes, ngroups):
+    """
+    Splits a list of files into groups of consecutive files with similar
+    total sizes.
+
+    Args:
+        paths (list): Paths to the files.
+
+        sizes (list): Size of every file.
+
+        ngroups (int): Maximum number of groups.
+
+    Returns:
+        list: The groups, each of them a non-empty list of paths.
+    """
+    target_size = sum(sizes) / float(ngroups)
+
+    groups = [[]]
+    accumulated_size = 0
+    for path, size in zip(paths, sizes):
+        # A new group starts when most of the file would exceed the target
+        # size of the current group
+        if (groups[-1] and len(groups) < ngroups and
+                accumulated_size + size / 2.0 > target_size * len(groups)):
+            groups.append([])
+        groups[-1].append(path)
+        accumulated_size += size
+
+    return groups
+
+
+def get_output_names(filename, ngroups):
+    """
+    Builds the names of the merged files of a snapshot.
+
+    Args:
+        filename (str): The file name requested for the snapshot.
+
+        ngroups (int): Number of merged files.
+
+    Returns:
+        list: The requested file name if there is only one merged file, the
+        requested name followed by the index of the file otherwise.
+    """
+    if ngroups == 1:
+        return [filename]
+
+    basename = filename.partition(".root")[0]
+    return ["{}_{}.root".format(basename, index) for index in range(ngroups)]
+
+
+def merge_files(task):
+    """
+    Merges ROOT files into a new one and removes them. Entries are copied
+    one by one instead of copying the compressed baskets, so that the merged
+    file is written with large clusters and with the requested compression.
+
+    Args:
+        task (tuple): The paths to the input files, the path to the output
+            file, its compression setting (:obj:`None` for the default) and
+            the name of the tree, or :obj:`None` if the layout of the output
+            file is not needed.
+
+    Returns:
+        tuple: The path to the output file and its layout.
+
+    Raises:
+        RuntimeError: If the files could not be merged.
+    """
+    inputs, output, compression, treename = task
+
+    if len(inputs) == 1 and compression is None:
+        # Nothing to merge or to recompress
+        os.rename(inputs[0], output)
+    else:
+        _merge_root_files(inputs, output, compression)
+
+    layout = None
+    if treename is not None:
+        layout = read_file_layout(output, treename)
+    return output, layout
+
+
+def _merge_root_files(inputs, output, compression):
+    """
+    Merges ROOT files with a `TFileMerger` and removes them.
+
+    Args:
+        inputs (list): Paths to the input files.
+
+        output (str): Path to the output file.
+
+        compression (int): Compression setting of the output file, or
+            :obj:`None` for the default one.
+
+    Raises:
+        RuntimeError: If the files could not be merged.
+    """
+    import ROOT
+
+    merger = ROOT.TFileMerger(False, False)
+    merger.SetFastMethod(False)
+    if compression is None:
+        merger.OutputFile(output, "RECREATE")
+    else:
+        merger.OutputFile(output, "RECREATE", compression)
+
+    for path in inputs:
+        merger.AddFile(path, False)
+
+    if not merger.Merge():
+        raise RuntimeError(
+            "Could not merge the snapshot files into {}".format(output))
+
+    for path in inputs:
+        os.remove(path)
+
+    logger.debug("Merged %s snapshot files into %s", len(inputs), output)
@@ -1,7 +1,13 @@
+import collections
+import itertools
 import ntpath  # Filename from path (should be platform-independent)
+import weakref
+from concurrent import futures
+from contextlib import contextmanager
 
 from PyRDF import DataFrame
 from PyRDF.Backends import Dist
+from PyRDF.Backends import Progress
 from PyRDF.Backends import Utils
 
 try:
@@ -12,6 +18,22 @@ except ModuleNotFoundError:
          " Please make sure Spark is installed."))
 
 
+# Description of the Spark job groups of PyRDF executions
+JOB_DESCRIPTION = "PyRDF execution"
+
+
+class RangeStatsParam(pyspark.AccumulatorParam):
+    """Adds the progress figures sent by the executors."""
+
+    def zero(self, value):
+        """No range processed."""
+        return Progress.EMPTY_STATS
+
+    def addInPlace(self, value1, value2):
+        """Adds the figures of two groups of ranges."""
+        return Progress.add_stats(value1, value2)
+
+
 class SparkBackend(Dist.DistBackend):
     """
     Backend that executes the computational graph using using `Spark` framework
@@ -64,22 +86,18 @@ class SparkBackend(Dist.DistBackend):
         # getConf().get('spark.executor.instances') could return a string
         return int(npart)
 
-    def ProcessAndMerge(self, mapper, reducer):
+    def _get_spark_mapper(self, mapper):
         """
-        Performs map-reduce using Spark framework.
+        Wraps the mapper so that the headers and shared libraries sent to the
+        executors are declared before running it.
 
         Args:
             mapper (function): A function that runs the computational graph
                 and returns a list of values.
 
-            reducer (function): A function that merges two lists that were
-                returned by the mapper.
-
         Returns:
-            list: A list representing the values of action nodes returned
-            after computation (Map-Reduce).
+            function: The map function to be executed on each executor.
         """
-
         # These need to be passed as variables and not as class attributes
         # otherwise the `spark_mapper` function would be referencing this
         # this instance of the Spark backend along with the referenced
@@ -116,14 +134,232 @@ class SparkBackend(Dist.DistBackend):
 
             return mapper(current_range)
 
+        return spark_mapper
+
+    def ProcessAndMerge(self, mapper, reducer):
+        """
+        Performs map-reduce using Spark framework.
+
+        Args:
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            reducer (function): A function that merges two lists that were
+                returned by the mapper.
+
+        Returns:
+            list: A list representing the values of action nodes returned
+            after computation (Map-Reduce).
+        """
+        spark_mapper = self._get_spark_mapper(mapper)
+
         ranges = self.build_ranges()  # Get range pairs
 
+        if self.combine_ranges:
+            # One partition per executor core, each one merging the values of
+            # its ranges before the tree reduction
+            nslices = min(len(ranges), self.sc.defaultParallelism)
+            parallel_collection = self.sc.parallelize(ranges, nslices)
+            return parallel_collection.mapPartitions(
+                Dist.combine_ranges(spark_mapper, reducer)).treeReduce(reducer)
+
         # Build parallel collection
         parallel_collection = self.sc.parallelize(ranges, self.npartitions)
 
         # Map-Reduce using Spark
         return parallel_collection.map(spark_mapper).treeReduce(reducer)
 
+    def ProcessAndIterate(self, mapper, ordered=True):
+        """
+        Runs the mapper using Spark framework and fetches the results one
+        partition at a time.
+
+        Args:
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            ordered (bool, optional): Whether the results are returned in the
+                order of the ranges. Every partition runs as a separate job,
+                as many at the same time as executor cores. Ordered results
+                wait for the previous partitions, while unordered results
+                are returned as soon as their job is done.
+
+        Returns:
+            iterator: The values returned by the mapper for every range.
+        """
+        spark_mapper = self._get_spark_mapper(mapper)
+
+        ranges = self.build_ranges()  # Get range pairs
+
+        # Build parallel collection
+        parallel_collection = self.sc.parallelize(ranges, self.npartitions)
+        mapped_collection = parallel_collection.map(spark_mapper)
+
+        return self._iterate_partitions(mapped_collection, ordered)
+
+    def _iterate_partitions(self, collection, ordered):
+        """
+        Computes every partition of a collection in a separate Spark job and
+        yields its elements. Jobs are submitted from a pool of threads, so
+        that the executors are kept busy. Unlike `RDD.toLocalIterator`, the
+        next partitions are computed while the driver consumes the current
+        one.
+
+        Args:
+            collection (pyspark.RDD): The collection to be computed.
+
+            ordered (bool): Whether the partitions are returned in order.
+                Only as many partitions as threads are then computed ahead
+                of the one being returned, so that the driver does not hold
+                all of them.
+
+        Yields:
+            The elements of the collection, grouped by partition.
+        """
+        npartitions = collection.getNumPartitions()
+        nthreads = max(1, min(npartitions, self.sc.defaultParallelism))
+
+        # Jobs submitted from the pool belong to the job group of the caller
+        job_id = self.sc.getLocalProperty("spark.jobGroup.id")
+
+        def run_partition(partition):
+            if job_id:
+                self.sc.setJobGroup(job_id, JOB_DESCRIPTION,
+                                    interruptOnCancel=True)
+            return self.sc.runJob(collection, list, [partition])
+
+        partitions = iter(range(npartitions))
+        nsubmitted = nthreads if ordered else npartitions
+
+        with futures.ThreadPoolExecutor(max_workers=nthreads) as pool:
+            jobs = collections.deque(
+                pool.submit(run_partition, partition)
+                for partition in itertools.islice(partitions, nsubmitted))
+            try:
+                if ordered:
+                    while jobs:
+                        results = jobs.popleft().result()
+                        # Keep the executors busy while the driver consumes
+                        # the results
+                        for partition in itertools.islice(partitions, 1):
+                            jobs.append(pool.submit(run_partition, partition))
+                        for element in results:
+                            yield element
+                else:
+                    for job in futures.as_completed(jobs):
+                        for element in job.result():
+                            yield element
+            finally:
+                # Partitions that did not start yet are not needed anymore
+                for job in jobs:
+                    job.cancel()
+
+    def ProcessAndDistribute(self, mapper, reducer, index):
+        """
+        Runs the mapper using Spark framework. The values returned for every
+        range are persisted on the executors, the `AsNumpy` results stay
+        there and the rest of the values are merged on the driver.
+
+        Args:
+            mapper (function): A function that runs the computational graph
+                and returns a list of values.
+
+            reducer (function): A function that merges two lists that were
+                returned by the mapper.
+
+            index (int): Position of the `AsNumpy` results in the list of
+                values returned by the mapper.
+
+        Returns:
+            tuple: A :obj:`pyspark.RDD` with the dictionary of numpy arrays of
+            every range and the list of merged values. The values persisted
+            on the executors are released once the returned RDD is garbage
+            collected.
+        """
+        spark_mapper = self._get_spark_mapper(mapper)
+
+        ranges = self.build_ranges()  # Get range pairs
+
+        # Build parallel collection
+        parallel_collection = self.sc.parallelize(ranges, self.npartitions)
+
+        # The graph runs only once, later jobs reuse the persisted values
+        values = parallel_collection.map(spark_mapper).persist(
+            pyspark.StorageLevel.MEMORY_AND_DISK)
+
+        def drop_arrays(range_values):
+            """Removes the numpy arrays before merging the values."""
+            range_values = list(range_values)
+            range_values[index] = {}
+            return range_values
+
+        def get_arrays(range_values):
+            """Retrieves the numpy arrays of a range."""
+            (columns,) = range_values[index].values()
+            return dict(columns)
+
+        merged_values = values.map(drop_arrays).treeReduce(reducer)
+
+        arrays = values.map(get_arrays)
+        # The persisted values are only needed as long as the arrays can be
+        # accessed
+        weakref.finalize(arrays, values.unpersist)
+
+        return arrays, merged_values
+
+    @contextmanager
+    def job_group(self, job_id):
+        """
+        Sets the Spark job group of the jobs submitted by the current thread.
+
+        Args:
+            job_id (str): Identifier of the job group.
+        """
+        self.sc.setJobGroup(job_id, JOB_DESCRIPTION, interruptOnCancel=True)
+        try:
+            yield
+        finally:
+            self.sc.setLocalProperty("spark.jobGroup.id", None)
+
+    def cancel_job(self, job_id):
+        """
+        Cancels the active jobs of a Spark job group, interrupting the tasks
+        running on the executors.
+
+        Args:
+            job_id (str): Identifier of the job group.
+        """
+        self.sc.cancelJobGroup(job_id)
+
+    def make_progress_accumulator(self):
+        """
+        Creates a Spark accumulator of the progress figures. The figures of
+        a task reach the driver when the task is done, so they are updated
+        once per partition.
+
+        Returns:
+            pyspark.Accumulator: The accumulator.
+        """
+        return self.sc.accumulator(Progress.EMPTY_STATS, RangeStatsParam())
+
+    def RunTasks(self, function, tasks):
+        """
+        Runs a function on every task using Spark framework, one task per
+        partition.
+
+        Args:
+            function (function): A function that receives a task.
+
+            tasks (list): The arguments of every call to the function.
+
+        Returns:
+            list: The values returned by the function for every task, in the
+            same order.
+        """
+        if not tasks:
+            return []
+        return self.sc.parallelize(tasks, len(tasks)).map(function).collect()
+
     def distribute_unique_paths(self, paths):
         """
         Spark supports sending files to the executors via the
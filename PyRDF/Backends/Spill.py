@@ -0,0 +1,225 @@
+"""
+Spilling of merged values to disk when they exceed a memory budget.
+"""
+import logging
+import os
+import pickle
+import sys
+import tempfile
+
+import numpy
+
+from PyRDF.Backends import Histograms
+
+logger = logging.getLogger(__name__)
+
+
+class SpilledValues(object):
+    """
+    Lists of values that were written to disk instead of being merged in
+    memory. Every file holds one list of values, pickled one value after the
+    other so that they can be read back one at a time.
+
+    Attributes:
+        paths (list): Paths to the files, which are not merged together yet.
+    """
+
+    def __init__(self, paths):
+        """
+        Creates a reference to spilled lists of values.
+
+        Args:
+            paths (list): Paths to the files holding the lists of values.
+        """
+        self.paths = paths
+
+
+def estimate_size(value):
+    """
+    Estimates the memory used by a (mergeable) value, or by a list of them.
+    Only the large buffers of histograms and numpy arrays are taken into
+    account.
+
+    Args:
+        value: The value.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if isinstance(value, list):
+        return sum(estimate_size(element) for element in value)
+
+    if isinstance(value, dict):
+        return sum(estimate_size(element) for element in value.values())
+
+    if isinstance(value, numpy.ndarray):
+        return value.nbytes
+
+    if isinstance(value, Histograms.HistogramArrays):
+        return value.contents.nbytes + estimate_size(value.sumw2)
+
+    try:
+        result = value.GetValue()
+    except AttributeError:
+        return sys.getsizeof(value)
+
+    if hasattr(result, "GetNcells"):
+        # Content of every bin, plus the squares of the weights if stored
+        nbuffers = 2 if result.GetSumw2N() else 1
+        return nbuffers * result.GetNcells() * numpy.dtype(float).itemsize
+
+    return sys.getsizeof(result)
+
+
+def _write_values(values, directory):
+    """
+    Writes a list of values to a new file.
+
+    Args:
+        values (iterable): The values, they are consumed one at a time.
+
+        directory (str): Directory where the file is created.
+
+    Returns:
+        str: The path to the file.
+    """
+    descriptor, path = tempfile.mkstemp(prefix="pyrdf_spill_", suffix=".pkl",
+                                        dir=directory)
+    with os.fdopen(descriptor, "wb") as spill_file:
+        for value in values:
+            pickle.dump(value, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    logger.debug("Spilled merged values to %s", path)
+    return path
+
+
+def _read_values(path):
+    """
+    Reads back the values of a file, one at a time.
+
+    Args:
+        path (str): The path to the file.
+
+    Yields:
+        The values, in the order in which they were written.
+    """
+    with open(path, "rb") as spill_file:
+        while True:
+            try:
+                yield pickle.load(spill_file)
+            except EOFError:
+                return
+
+
+def _spill(values, directory):
+    """
+    Retrieves the paths to the files of values that may be spilled already.
+
+    Args:
+        values (list, SpilledValues): The values.
+
+        directory (str): Directory where values in memory are written.
+
+    Returns:
+        list: The paths to the files holding the values.
+    """
+    if isinstance(values, SpilledValues):
+        return values.paths
+    return [_write_values(values, directory)]
+
+
+def spill_reducer(reducer, directory, memory_budget):
+    """
+    Wraps a reducer so that values whose merge would exceed the memory
+    budget are written to disk instead of being merged. The size is checked
+    before merging, so that the merged values are never held in memory.
+    Spilled values are not read again by the reducer, they are only merged at
+    the end by `merge_files`.
+
+    Args:
+        reducer (function): A function that merges two lists of values.
+
+        directory (str): Directory where the values are written. It must be
+            reachable from the workers and from the driver.
+
+        memory_budget (int): Size in bytes above which values are written
+            to disk.
+
+    Returns:
+        function: The wrapped reducer.
+    """
+    def spilling_reducer(values_out, values_in):
+        if (isinstance(values_out, SpilledValues) or
+                isinstance(values_in, SpilledValues)):
+            return SpilledValues(_spill(values_out, directory) +
+                                 _spill(values_in, directory))
+
+        # Merging cannot take more memory than both lists of values
+        if (estimate_size(values_out) + estimate_size(values_in) <=
+                memory_budget):
+            return reducer(values_out, values_in)
+        return SpilledValues(_spill(values_out, directory) +
+                             _spill(values_in, directory))
+
+    return spilling_reducer
+
+
+def _merge_streams(paths, reducer):
+    """
+    Merges the lists of values of several files, one value at a time, and
+    removes the files.
+
+    Args:
+        paths (list): The paths to the files.
+
+        reducer (function): A function that merges two lists of values.
+
+    Yields:
+        The merged values, in the order of the lists.
+    """
+    streams = [_read_values(path) for path in paths]
+    try:
+        for values in zip(*streams):
+            merged = [values[0]]
+            for value in values[1:]:
+                merged = reducer(merged, [value])
+            yield merged[0]
+    finally:
+        for stream in streams:
+            stream.close()
+        for path in paths:
+            os.remove(path)
+
+
+def merge_files(values, reducer, directory, batch_size=16):
+    """
+    Merges spilled lists of values. Like `hadd`, the files are merged in
+    batches into intermediate files until only one batch is left, which is
+    merged in memory. Only one value of every file of a batch is held in
+    memory at the same time.
+
+    Args:
+        values (list, SpilledValues): The values, which are returned as they
+            are if they were not spilled.
+
+        reducer (function): A function that merges two lists of values.
+
+        directory (str): Directory where the intermediate files are written.
+
+        batch_size (int, optional): Number of files merged together.
+
+    Returns:
+        list: The merged values.
+    """
+    if not isinstance(values, SpilledValues):
+        return values
+
+    paths = values.paths
+    while len(paths) > batch_size:
+        paths = [
+            _write_values(_merge_streams(paths[i:i + batch_size], reducer),
+                          directory)
+            for i in range(0, len(paths), batch_size)
+        ]
+
+    return list(_merge_streams(paths, reducer))
@@ -1,3 +1,32 @@
+import collections
+import logging
+
+from PyRDF import GraphOptimizer
+from PyRDF import GraphSerializer
+from PyRDF import Profiler
+
+logger = logging.getLogger(__name__)
+
+# Graphs already deserialized in the current process, indexed by their content
+# hash. Workers that process several ranges of the same job rebuild the graph
+# only once. Only the `_GRAPH_CACHE_SIZE` most recently used graphs are kept.
+_graph_cache = collections.OrderedDict()
+_GRAPH_CACHE_SIZE = 16
+
+
+def _clear_pyroot_nodes(node):
+    """
+    Drops the PyROOT objects stored in the nodes of a graph, so that graphs
+    kept in the cache do not keep the dataframes of past ranges alive.
+
+    Args:
+        node (PyRDF.Node.Node): The node whose descendants are cleared.
+    """
+    for child in node.children:
+        child.pyroot_node = None
+        _clear_pyroot_nodes(child)
+
+
 class CallableGenerator(object):
     """
     Class that generates a callable to parse a PyRDF graph.
@@ -14,6 +43,44 @@ class CallableGenerator(object):
         """
         self.head_node = head_node
 
+    def __getstate__(self):
+        """
+        Converts the state of the generator to a Python dictionary. The graph
+        is stored in its compact serialized form together with its content
+        hash.
+
+        Returns:
+            dict: The serialized graph and its hash.
+        """
+        payload = GraphSerializer.serialize(self.head_node)
+        return {
+            "graph": payload,
+            "graph_hash": GraphSerializer.content_hash(payload)
+        }
+
+    def __setstate__(self, state):
+        """
+        Rebuilds the generator from its state dictionary. If a graph with the
+        same hash was already deserialized in this process, it is reused.
+
+        Args:
+            state (dict): The state dictionary created by `__getstate__`.
+        """
+        graph_hash = state["graph_hash"]
+        head_node = _graph_cache.get(graph_hash)
+
+        if head_node is None:
+            logger.debug("Deserializing graph %s", graph_hash)
+            head_node = GraphSerializer.deserialize(state["graph"])
+            _graph_cache[graph_hash] = head_node
+            if len(_graph_cache) > _GRAPH_CACHE_SIZE:
+                # Drop the least recently used graph
+                _graph_cache.popitem(last=False)
+        else:
+            _graph_cache.move_to_end(graph_hash)
+
+        self.head_node = head_node
+
     def get_action_nodes(self, node_py=None):
         """
         Recurses through PyRDF graph and collects the PyRDF node objects.
@@ -47,10 +114,18 @@ class CallableGenerator(object):
 
         return return_nodes
 
-    def get_callable(self):
+    def get_callable(self, fuse_filters=False, filter_selectivity=None):
         """
         Converts a given graph into a callable and returns the same.
 
+        Args:
+            fuse_filters (bool, optional): Whether chains of consecutive
+                filters should be fused into a single filter expression.
+
+            filter_selectivity (dict, optional): Fraction of entries passing
+                each filter expression. If given, fused filters are reordered
+                so that the most selective ones are evaluated first.
+
         Returns:
             function: The callable that takes in a PyROOT RDataFrame object
             and executes all operations from the PyRDF graph
@@ -59,7 +134,8 @@ class CallableGenerator(object):
         # Prune the graph to check user references
         self.head_node.graph_prune()
 
-        def mapper(node_cpp, node_py=None, rdf_range=None):
+        def mapper(node_cpp, node_py=None, rdf_range=None, lazy_results=None,
+                   profile_counts=None):
             """
             The callable that recurses through the PyRDF nodes and executes
             operations from a starting (PyROOT) RDF node.
@@ -72,6 +148,18 @@ class CallableGenerator(object):
                 rdf_range (optional): The current range of the RDataFrame to run
                     the analysis on. This is an helper parameter for the
                     analysis in a distributed environment.
+                lazy_results (list, optional): Results of lazy operations that
+                    are not :obj:`ROOT.RResultPtr` objects, i.e. lazy
+                    snapshots in a distributed environment and lazy AsNumpy
+                    results. They are triggered at the end of the first
+                    recursive state, once every action has been booked.
+                profile_counts (list, optional): If given, the transformations
+                    are profiled: their expressions are timed and the number
+                    of entries passing each of them is counted. The results
+                    of the counts are appended to this list, in the order of
+                    `Profiler.get_profiled_nodes`, which is also the index of
+                    the timer of every transformation. Filters are not fused
+                    while profiling, so that each of them is measured.
 
             Returns:
                 list: A list of :obj:`ROOT.RResultPtr` objects in DFS order of
@@ -79,6 +167,11 @@ class CallableGenerator(object):
             """
             return_vals = []
 
+            # Only the first recursive state triggers the lazy results
+            trigger_lazy_results = lazy_results is None
+            if trigger_lazy_results:
+                lazy_results = []
+
             if rdf_range:
                 parent_node = node_cpp.Range(rdf_range.start, rdf_range.end)
             else:
@@ -93,6 +186,25 @@ class CallableGenerator(object):
                 # node (node_cpp)
                 RDFOperation = getattr(node_cpp, node_py.operation.name)
                 operation = node_py.operation
+                args = operation.args
+
+                if fuse_filters and profile_counts is None:
+                    chain = GraphOptimizer.get_filter_chain(node_py)
+                    if len(chain) > 1:
+                        # Run the whole chain as a single filter and carry on
+                        # from the children of its last node
+                        args = [GraphOptimizer.fuse_filters(
+                            chain, filter_selectivity)]
+                        node_py = chain[-1]
+
+                if profile_counts is not None:
+                    # Expressions with statements are left as they are, they
+                    # cannot be wrapped
+                    position = Profiler.get_timed_argument(operation)
+                    if position is not None:
+                        args = list(args)
+                        args[position] = Profiler.wrap_expression(
+                            len(profile_counts), args[position])
 
                 if rdf_range and operation.name == "Snapshot":
                     # Retrieve filename and append range boundaries
@@ -101,21 +213,42 @@ class CallableGenerator(object):
                     end = str(rdf_range.end - 1)
                     path_with_range = "{}_{}_{}.root".format(filename,
                                                              start, end)
-                    # Create a partial snapshot on the current range
-                    operation.args[1] = path_with_range
-                pyroot_node = RDFOperation(*operation.args,
-                                           **operation.kwargs)
+                    # Create a partial snapshot on the current range. The
+                    # arguments are copied since the same graph may be used
+                    # to process other ranges.
+                    args = list(args)
+                    args[1] = path_with_range
+                kwargs = operation.kwargs
+                if operation.name == "AsNumpy":
+                    # Remove the options handled by the backend, they are not
+                    # known by ROOT
+                    kwargs = {key: value for key, value in kwargs.items()
+                              if key not in ("output_dir", "distributed")}
+                if operation.name == "Snapshot" and "delta" in kwargs:
+                    kwargs = {key: value for key, value in kwargs.items()
+                              if key != "delta"}
+                    if operation.kwargs["delta"] and len(args) < 3:
+                        # Only the columns defined in the graph are written,
+                        # the rest are already in the input dataset
+                        args = list(args) + [
+                            node_cpp.GetDefinedColumnNames()]
+                pyroot_node = RDFOperation(*args, **kwargs)
 
                 # The result is a pyroot object which is stored together with
-                # the pyrdf node. This binds the pyroot object lifetime to the
-                # pyrdf node, so both nodes will be kept alive as long as there
-                # is a valid reference poiting to the pyrdf node.
+                # the pyrdf node while the graph is being booked. The
+                # references are dropped once the whole graph is booked, the
+                # returned results keep the booked nodes alive.
                 node_py.pyroot_node = pyroot_node
 
                 # The new pyroot_node becomes the parent_node for the next
                 # recursive call
                 parent_node = pyroot_node
 
+                if (profile_counts is not None and
+                        operation.is_transformation()):
+                    # Booked with the rest of the actions of the graph
+                    profile_counts.append(pyroot_node.Count())
+
                 if (node_py.operation.is_action() or
                         node_py.operation.is_instant_action()):
                     # Collect all action nodes in order to return them
@@ -123,16 +256,39 @@ class CallableGenerator(object):
                     # the file with the partial snapshot
                     if rdf_range and operation.name == "Snapshot":
                         return_vals.append([path_with_range])
+                        if operation.is_action():
+                            # Lazy snapshot, only the path is returned so
+                            # nothing else would write the file
+                            lazy_results.append(pyroot_node)
                     else:
                         return_vals.append(pyroot_node)
+                        if (operation.name == "AsNumpy" and
+                                operation.is_action()):
+                            # Lazy AsNumpy, its result is the dictionary of
+                            # arrays returned by `GetValue`
+                            lazy_results.append(pyroot_node)
 
             for n in node_py.children:
                 # Recurse through children and get their output
-                prev_vals = mapper(parent_node, node_py=n, rdf_range=rdf_range)
+                prev_vals = mapper(parent_node, node_py=n, rdf_range=rdf_range,
+                                   lazy_results=lazy_results,
+                                   profile_counts=profile_counts)
 
                 # Attach the output of the children node
                 return_vals.extend(prev_vals)
 
+            if trigger_lazy_results and lazy_results:
+                # All actions are booked at this point, so this runs a single
+                # event loop for all of them
+                values = {id(result): result.GetValue()
+                          for result in lazy_results}
+                return_vals = [values.get(id(val), val) for val in return_vals]
+
+            if trigger_lazy_results:
+                # The graph may be reused for other ranges, possibly after
+                # being cached, it must not keep this dataframe alive
+                _clear_pyroot_nodes(self.head_node)
+
             return return_vals
 
         return mapper
@@ -6,6 +6,7 @@ import ROOT
 
 from PyRDF import Node
 from PyRDF import Proxy
+from PyRDF.Backends import Cache
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +26,65 @@ class DistDataFrame(object):
 
         self._headnode.backend = backend
 
+        # Layout of input files known in advance, e.g. written by a snapshot
+        if "file_layouts" in kwargs:
+            self._headnode.file_layouts = kwargs["file_layouts"]
+
         self._headnode.backend.npartitions = kwargs.get("npartitions", 2)
 
+        # Optional settings of the graph optimizer
+        for option in ("fuse_filters", "reorder_filters"):
+            if option in kwargs:
+                setattr(self._headnode.backend, option, kwargs[option])
+
+        # Optional encoding and combining of the values sent for merging
+        for option in ("pack_results", "compression_level", "combine_ranges",
+                       "numpy_histogram_merge", "progressive_merge"):
+            if option in kwargs:
+                setattr(self._headnode.backend, option, kwargs[option])
+
+        # Memory budget of the reducer and spilling of larger values
+        if kwargs.get("spill_merge_batch_size", 2) < 2:
+            # Merging fewer files at once would never reduce their number
+            raise ValueError("The spill_merge_batch_size must be at least 2, "
+                             "got {}".format(kwargs["spill_merge_batch_size"]))
+        for option in ("reduce_memory_budget", "spill_dir",
+                       "spill_merge_batch_size"):
+            if option in kwargs:
+                setattr(self._headnode.backend, option, kwargs[option])
+
+        # Merge of the partial files of distributed snapshots
+        for option in ("snapshot_nfiles", "snapshot_file_size",
+                       "snapshot_merge_batch_size",
+                       "snapshot_compression_algorithm",
+                       "snapshot_compression_level"):
+            if option in kwargs:
+                setattr(self._headnode.backend, option, kwargs[option])
+
+        # Reporting of the progress of the execution
+        for option in ("show_progress", "progress_callback",
+                       "progress_interval"):
+            if option in kwargs:
+                setattr(self._headnode.backend, option, kwargs[option])
+
+        # Profiling of the transformations of the graph
+        for option in ("profile", "profile_sampling_period"):
+            if option in kwargs:
+                setattr(self._headnode.backend, option, kwargs[option])
+
+        # Opt-in cache of action results
+        if "cache_dir" in kwargs:
+            self._headnode.backend.result_cache = Cache.ResultCache(
+                kwargs["cache_dir"], kwargs.get("cache_size", 2**30))
+
+        # Incremental processing stores per-file results in the cache
+        if "incremental" in kwargs:
+            if (kwargs["incremental"] and
+                    self._headnode.backend.result_cache is None):
+                raise ValueError("Incremental processing requires a result "
+                                 "cache, please provide a 'cache_dir'.")
+            self._headnode.backend.incremental = kwargs["incremental"]
+
         self._headproxy = Proxy.TransformationProxy(self._headnode)
 
     def __dir__(self):
@@ -0,0 +1,243 @@
+"""
+Optimization passes applied to a PyRDF graph before generating the callable
+that runs it.
+"""
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _freeze(value):
+    """
+    Converts an operation argument to a hashable key. Containers are compared
+    by content, any object which is not a basic Python type (e.g. a ROOT
+    histogram model) is compared by identity.
+
+    Args:
+        value: Any argument of an operation.
+
+    Returns:
+        A hashable representation of the argument.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple((key, _freeze(value[key]))
+                              for key in sorted(value)))
+    if isinstance(value, (str, bool, int, float, type(None))):
+        return (type(value).__name__, value)
+    return ("id", id(value))
+
+
+def operation_key(operation):
+    """
+    Builds a key that is equal for structurally identical operations, i.e.
+    operations with the same name, arguments and keyword arguments.
+
+    Args:
+        operation (PyRDF.Operation.Operation): The operation of a node.
+
+    Returns:
+        tuple: The hashable key of the operation.
+    """
+    return (operation.name,
+            _freeze(operation.args),
+            _freeze(operation.kwargs))
+
+
+def _merge_nodes(canonical, duplicate):
+    """
+    Merges a node into a structurally identical sibling. The children of the
+    duplicate node are moved to the canonical one and both nodes share the
+    same list of children from now on, so operations booked later through the
+    proxy of the duplicate node still end up in the graph.
+
+    Args:
+        canonical (PyRDF.Node): The node that stays in the graph.
+
+        duplicate (PyRDF.Node): The node that is removed from the graph.
+    """
+    canonical.children.extend(duplicate.children)
+
+    merged_nodes = [duplicate] + duplicate.merged_nodes
+    for node in merged_nodes:
+        node.children = canonical.children
+    duplicate.merged_nodes = []
+
+    canonical.merged_nodes.extend(merged_nodes)
+
+
+def merge_common_nodes(node):
+    """
+    Common subexpression elimination. Structurally identical siblings
+    (transformations or actions with the same operation name, arguments and
+    keyword arguments) are merged into a single node together with their
+    subtrees, so that they are evaluated only once in the event loop. The
+    merged action nodes receive the value of the node that was kept in the
+    graph.
+
+    Instant actions are never merged, since they have side effects. Actions
+    whose value was already computed are not merged either, they are pruned
+    from the graph and their value must not be shared with new actions.
+
+    Args:
+        node (PyRDF.Node): Starting node of the (sub)graph to optimize.
+    """
+    kept_nodes = collections.OrderedDict()
+    children = []
+
+    for child in node.children:
+        if (child.operation.is_instant_action() or
+                child.value is not None):
+            children.append(child)
+            continue
+
+        key = operation_key(child.operation)
+        canonical = kept_nodes.get(key)
+        if canonical is None:
+            kept_nodes[key] = child
+            children.append(child)
+        else:
+            logger.debug("Merging duplicate {} node".format(
+                child.operation.name))
+            _merge_nodes(canonical, child)
+
+    # Modify the list in place, it may be shared with merged nodes
+    node.children[:] = children
+
+    for child in children:
+        merge_common_nodes(child)
+
+
+def is_fusable_filter(node):
+    """
+    Checks whether a node is a filter that can be fused with other filters,
+    i.e. an unnamed filter defined by a single C++ expression.
+
+    Args:
+        node (PyRDF.Node): The node to be checked.
+
+    Returns:
+        bool: True if the node can be fused, False otherwise.
+    """
+    operation = node.operation
+    if not operation or operation.name != "Filter":
+        return False
+    if len(operation.args) != 1 or operation.kwargs:
+        return False
+
+    return is_single_expression(operation.args[0])
+
+
+def is_single_expression(expression):
+    """
+    Checks whether a C++ expression given as a string is a single expression,
+    which can be wrapped in parentheses or in another expression. The body of
+    a function with statements is also accepted by RDataFrame, but it cannot.
+
+    Args:
+        expression: The expression to be checked.
+
+    Returns:
+        bool: True if the expression is a string without statements.
+    """
+    return (isinstance(expression, str) and
+            "return" not in expression and
+            ";" not in expression)
+
+
+def get_filter_chain(node):
+    """
+    Collects the chain of consecutive fusable filters starting at the given
+    node. The chain goes on as long as the current filter has a single child,
+    so no action or branch hangs between two filters of the chain.
+
+    Args:
+        node (PyRDF.Node): First node of the chain.
+
+    Returns:
+        list: The nodes of the chain, or an empty list if the given node is
+        not a fusable filter.
+    """
+    if not is_fusable_filter(node):
+        return []
+
+    chain = [node]
+    while (len(chain[-1].children) == 1 and
+           is_fusable_filter(chain[-1].children[0])):
+        chain.append(chain[-1].children[0])
+
+    return chain
+
+
+def fuse_filters(chain, selectivity=None):
+    """
+    Builds a single C++ expression out of a chain of filters. If the
+    selectivity of every filter is known, the most selective ones are
+    evaluated first, otherwise the order of the chain is kept.
+
+    Args:
+        chain (list): Nodes of a chain of fusable filters.
+
+        selectivity (dict, optional): Fraction of entries passing each filter
+            expression.
+
+    Returns:
+        str: The fused filter expression.
+    """
+    expressions = [node.operation.args[0] for node in chain]
+
+    if selectivity and all(expr in selectivity for expr in expressions):
+        # Stable sort, filters with equal selectivity keep the user order
+        expressions.sort(key=lambda expr: selectivity[expr])
+
+    return " && ".join("({})".format(expr) for expr in expressions)
+
+
+def measure_filter_selectivity(head_node, rdf, known=()):
+    """
+    Measures the fraction of entries passing every fusable filter of the
+    graph. All the transformations of the graph are replayed on the given
+    RDataFrame (usually a small sample of the dataset) and two counters are
+    booked per filter, before and after it. The counters run in a single event
+    loop.
+
+    Args:
+        head_node (PyRDF.Node): Head node of the graph.
+
+        rdf (ROOT.RDataFrame): The dataframe the graph is replayed on.
+
+        known (iterable, optional): Filter expressions that don't need to be
+            measured again.
+
+    Returns:
+        dict: Fraction of entries passing each filter expression.
+    """
+    counters = []
+
+    def book_counters(node_py, node_cpp):
+        for child in node_py.children:
+            operation = child.operation
+            if not operation.is_transformation():
+                continue
+
+            child_cpp = getattr(node_cpp, operation.name)(*operation.args,
+                                                          **operation.kwargs)
+            if is_fusable_filter(child) and operation.args[0] not in known:
+                counters.append((operation.args[0],
+                                 node_cpp.Count(),
+                                 child_cpp.Count()))
+            book_counters(child, child_cpp)
+
+    book_counters(head_node, rdf)
+
+    selectivity = {}
+    for expression, total, passed in counters:
+        total = total.GetValue()
+        if total:
+            selectivity[expression] = passed.GetValue() / float(total)
+            logger.debug("Selectivity of filter \"{}\": {}".format(
+                expression, selectivity[expression]))
+
+    return selectivity
@@ -0,0 +1,307 @@
+"""
+Compact serialization of PyRDF computational graphs.
+
+A graph is encoded as a flat tuple holding the format version, a table with
+every distinct string found in the operations and the list of nodes in DFS
+order. Each node only stores the number of its children, so the tree shape can
+be rebuilt without pickling the `children` lists of the nodes::
+
+    (
+        GRAPH_FORMAT_VERSION,
+        ("Define", "x", "rdfentry_", "Filter", "x > 10", "Count"),
+        (
+            (-1, (), (), 1),           # Head node, one child
+            (0, (S1, S2), (), 1),      # Define("x", "rdfentry_")
+            (3, (S4,), (), 1),         # Filter("x > 10")
+            (5, (), (), 0)             # Count()
+        )
+    )
+
+Where ``S<n>`` stands for a reference to the n-th entry of the string table.
+The payload obtained after pickling the tuple is also used to compute a
+content hash that identifies the graph.
+"""
+import hashlib
+import logging
+import pickle
+
+from PyRDF.Node import Node
+from PyRDF.Operation import Operation
+
+logger = logging.getLogger(__name__)
+
+GRAPH_FORMAT_VERSION = 1
+
+# Tags of the encoded values. Scalars (numbers, booleans and None) are stored
+# untagged, everything else is a pair (tag, payload).
+_STRING = 0
+_LIST = 1
+_TUPLE = 2
+_DICT = 3
+_OBJECT = 4
+
+_SCALAR_TYPES = (bool, int, float, type(None))
+
+
+class _Encoder(object):
+    """
+    Helper class that encodes the operations of a graph while filling the
+    table of strings shared among all nodes.
+
+    Attributes:
+        strings (list): Distinct strings found so far, in order of appearance.
+
+        indices (dict): Position of every string in the `strings` list.
+    """
+
+    def __init__(self):
+        """Creates an encoder with an empty string table."""
+        self.strings = []
+        self.indices = {}
+
+    def intern(self, string):
+        """
+        Retrieves the position of a string in the table, adding it if needed.
+
+        Args:
+            string (str): The string to be stored.
+
+        Returns:
+            int: Index of the string in the table.
+        """
+        index = self.indices.get(string)
+        if index is None:
+            index = self.indices[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+
+    def encode_value(self, value):
+        """
+        Converts an operation argument to its compact representation.
+
+        Args:
+            value: Any argument of an operation.
+
+        Returns:
+            The encoded value, either a scalar or a (tag, payload) tuple.
+        """
+        if isinstance(value, str):
+            return (_STRING, self.intern(value))
+        if isinstance(value, _SCALAR_TYPES):
+            return value
+        if isinstance(value, list):
+            return (_LIST, tuple(self.encode_value(v) for v in value))
+        if isinstance(value, tuple):
+            return (_TUPLE, tuple(self.encode_value(v) for v in value))
+        if isinstance(value, dict):
+            return (_DICT, self.encode_kwargs(value))
+        # Anything else (ROOT models, std containers...) is pickled as is
+        return (_OBJECT, value)
+
+    def encode_kwargs(self, kwargs):
+        """
+        Encodes a dictionary of keyword arguments. Keys are sorted so that the
+        same arguments always produce the same encoding.
+
+        Args:
+            kwargs (dict): Keyword arguments of an operation.
+
+        Returns:
+            tuple: Pairs of encoded keys and values.
+        """
+        return tuple(
+            (self.intern(str(key)), self.encode_value(kwargs[key]))
+            for key in sorted(kwargs)
+        )
+
+    def encode_node(self, node):
+        """
+        Encodes the operation of a node.
+
+        Args:
+            node (PyRDF.Node): The node to be encoded.
+
+        Returns:
+            tuple: Index of the operation name in the string table (-1 for the
+            head node), encoded arguments, encoded keyword arguments and number
+            of children of the node.
+        """
+        operation = node.operation
+        if not operation:
+            return (-1, (), (), len(node.children))
+
+        return (self.intern(operation.name),
+                tuple(self.encode_value(arg) for arg in operation.args),
+                self.encode_kwargs(operation.kwargs),
+                len(node.children))
+
+
+def _decode_value(value, strings):
+    """
+    Rebuilds an operation argument from its compact representation.
+
+    Args:
+        value: The encoded value.
+
+        strings (tuple): Table of strings of the graph.
+
+    Returns:
+        The original argument.
+    """
+    if not isinstance(value, tuple):
+        return value
+
+    tag, payload = value
+    if tag == _STRING:
+        return strings[payload]
+    if tag == _LIST:
+        return [_decode_value(v, strings) for v in payload]
+    if tag == _TUPLE:
+        return tuple(_decode_value(v, strings) for v in payload)
+    if tag == _DICT:
+        return _decode_kwargs(payload, strings)
+    return payload
+
+
+def _decode_kwargs(kwargs, strings):
+    """
+    Rebuilds a dictionary of keyword arguments.
+
+    Args:
+        kwargs (tuple): Pairs of encoded keys and values.
+
+        strings (tuple): Table of strings of the graph.
+
+    Returns:
+        dict: The original keyword arguments.
+    """
+    return {strings[key]: _decode_value(value, strings)
+            for key, value in kwargs}
+
+
+def encode(head_node):
+    """
+    Converts the graph hanging from the given node to its compact tuple
+    representation.
+
+    Args:
+        head_node (PyRDF.Node): Starting node of the graph.
+
+    Returns:
+        tuple: Format version, table of strings and encoded nodes in DFS
+        order.
+    """
+    encoder = _Encoder()
+    nodes = []
+
+    pending = [head_node]
+    while pending:
+        node = pending.pop()
+        nodes.append(encoder.encode_node(node))
+        # Reversed so that the first child is the next node to be popped
+        pending.extend(reversed(node.children))
+
+    return (GRAPH_FORMAT_VERSION, tuple(encoder.strings), tuple(nodes))
+
+
+def serialize(head_node):
+    """
+    Serializes the graph hanging from the given node.
+
+    Args:
+        head_node (PyRDF.Node): Starting node of the graph.
+
+    Returns:
+        bytes: The serialized graph.
+    """
+    return pickle.dumps(encode(head_node), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize(payload):
+    """
+    Rebuilds a graph of :obj:`PyRDF.Node` objects from its serialized form.
+
+    Args:
+        payload (bytes): A graph serialized with :func:`serialize`.
+
+    Returns:
+        PyRDF.Node: The head node of the rebuilt graph.
+
+    Raises:
+        ValueError: If the payload was produced with a different version of
+            the format.
+    """
+    version, strings, nodes = pickle.loads(payload)
+
+    if version != GRAPH_FORMAT_VERSION:
+        raise ValueError(
+            "Unsupported graph format version {} (expected {})"
+            .format(version, GRAPH_FORMAT_VERSION))
+
+    head_node = None
+    # Stack of [node, number of children still to be attached]
+    parents = []
+
+    for name, args, kwargs, nchildren in nodes:
+        if name < 0:
+            node = Node(None, None)
+        else:
+            operation = Operation(strings[name],
+                                  *[_decode_value(arg, strings)
+                                    for arg in args],
+                                  **_decode_kwargs(kwargs, strings))
+            node = Node(lambda: head_node, operation)
+
+        if parents:
+            parent = parents[-1]
+            parent[0].children.append(node)
+            parent[1] -= 1
+            if not parent[1]:
+                parents.pop()
+        else:
+            head_node = node
+
+        if nchildren:
+            parents.append([node, nchildren])
+
+    return head_node
+
+
+def content_hash(payload):
+    """
+    Computes a hash that identifies the content of a serialized graph.
+
+    Args:
+        payload (bytes): A graph serialized with :func:`serialize`.
+
+    Returns:
+        str: Hexadecimal digest of the payload.
+    """
+    return hashlib.sha1(payload).hexdigest()
+
+
+def operations_hash(operations):
+    """
+    Computes a hash that identifies a sequence of operations, e.g. the path
+    from the head node of a graph to one of its actions. Unlike
+    :func:`content_hash`, it does not depend on the shape of the rest of the
+    graph.
+
+    Args:
+        operations (iterable): The :obj:`PyRDF.Operation.Operation` objects.
+
+    Returns:
+        str: Hexadecimal digest of the encoded operations.
+    """
+    encoder = _Encoder()
+    encoded_operations = tuple(
+        (encoder.intern(operation.name),
+         tuple(encoder.encode_value(arg) for arg in operation.args),
+         encoder.encode_kwargs(operation.kwargs))
+        for operation in operations
+    )
+    payload = pickle.dumps((GRAPH_FORMAT_VERSION,
+                            tuple(encoder.strings),
+                            encoded_operations),
+                           protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha1(payload).hexdigest()
@@ -1,6 +1,7 @@
 from __future__ import print_function
 
 import logging
+import threading
 
 import ROOT
 
@@ -41,12 +42,30 @@ class Node(object):
             :obj:`ROOT.RResultPtr` after event-loop execution.
 
         pyroot_node: Reference to the PyROOT object that implements the
-            functionality of this node on the cpp side.
+            functionality of this node on the cpp side. It is only set while
+            the graph is being booked on a range and is :obj:`None`
+            otherwise.
 
         has_user_references (bool): A flag to check whether the node has
             direct user references, that is if it is assigned to a variable.
             Default value is :obj:`True`, turns to :obj:`False` if the proxy
             that wraps the node gets garbage collected by Python.
+
+        merged_nodes (list): Structurally identical nodes that were merged
+            into the current node by the graph optimizer. They share the list
+            of children of the current node and receive its value.
+
+        partial_result: A copy of the result merged so far for an action
+            node while the graph is being executed with progressive merging,
+            :obj:`None` otherwise.
+
+        progress (float): Fraction of the entries of the dataset that have
+            been processed for the value of an action node.
+
+        profile (PyRDF.Profiler.NodeProfile): Entries passing a
+            transformation node and time spent evaluating it, measured by the
+            last execution of the graph with profiling enabled, :obj:`None`
+            otherwise.
     """
 
     def __init__(self, get_head, operation, *args):
@@ -72,6 +91,10 @@ class Node(object):
         self.value = None
         self.pyroot_node = None
         self.has_user_references = True
+        self.merged_nodes = []
+        self.partial_result = None
+        self.progress = 0.0
+        self.profile = None
 
     def __getstate__(self):
         """
@@ -120,7 +143,7 @@ class Node(object):
         """
         if not self.children:
             # Every pruning condition is written on a separate line
-            if not self.has_user_references or \
+            if not self.is_referenced() or \
                (self.operation and self.operation.is_action() and self.value):
 
                 # ***** Condition 1 *****
@@ -148,6 +171,18 @@ class Node(object):
             logger.debug("Graph pruning completed")
         return False
 
+    def is_referenced(self):
+        """
+        Checks whether the user holds references to the current node or to
+        any of the nodes merged into it.
+
+        Returns:
+            bool: True if any of the nodes has user references, False
+            otherwise.
+        """
+        return self.has_user_references or any(
+            node.has_user_references for node in self.merged_nodes)
+
     def graph_prune(self):
         """
         Prunes nodes from the current PyRDF graph under certain conditions.
@@ -174,7 +209,13 @@ class Node(object):
             if not n.graph_prune():
                 children.append(n)
 
-        self.children = children
+        # Modify the list in place, it may be shared with merged nodes
+        self.children[:] = children
+
+        # Merged nodes without user references can no longer be accessed
+        self.merged_nodes = [node for node in self.merged_nodes
+                             if node.has_user_references]
+
         return self.is_prunable()
 
 
@@ -187,6 +228,14 @@ class HeadNode(Node):
         args (list): A list of arguments that were provided to construct
             the RDataFrame object.
 
+        file_layouts (dict): Known number of entries and cluster boundaries
+            (:obj:`PyRDF.Backends.Snapshots.FileLayout`) of the input files,
+            indexed by file name. They are used instead of opening the files.
+
+        execution_lock (threading.RLock): Lock held while the graph is being
+            executed, so that results requested from several threads trigger
+            a single execution.
+
 
     PyRDF's RDataFrame constructor accepts the same arguments as the ROOT's
     RDataFrame constructor (see
@@ -206,6 +255,8 @@ class HeadNode(Node):
         args = list(args)  # Make args mutable
 
         self.args = args
+        self.file_layouts = {}
+        self.execution_lock = threading.RLock()
 
     def get_branches(self):
         """Gets list of default branches if passed by the user."""
@@ -235,7 +286,12 @@ class HeadNode(Node):
             # If there's only one argument
             # which is an integer, return it.
             return first_arg
-        elif isinstance(first_arg, ROOT.TTree):
+
+        known_entries = self._get_known_entries()
+        if known_entries is not None:
+            return known_entries
+
+        if isinstance(first_arg, ROOT.TTree):
             # If the argument is a TTree or TChain,
             # get the number of entries from it.
             return first_arg.GetEntries()
@@ -255,6 +311,30 @@ class HeadNode(Node):
 
         return chain.GetEntries()
 
+    def _get_known_entries(self):
+        """
+        Computes the number of entries of the dataset out of the known layout
+        of its input files.
+
+        Returns:
+            (int, None): The number of entries, or :obj:`None` if the layout
+            of some input file is unknown.
+        """
+        if not self.file_layouts:
+            return None
+
+        files = self.get_inputfiles()
+        if not files:
+            return None
+        if isinstance(files, str):
+            files = [files]
+
+        try:
+            return sum(self.file_layouts[str(filename)].entries
+                       for filename in files)
+        except KeyError:
+            return None
+
     def get_treename(self):
         """
         Get name of the TTree.
@@ -20,6 +20,8 @@ class Operation(object):
 
         op_type: The type or category of the current operation
             (:obj:`ACTION`,  :obj:`TRANSFORMATION` or :obj:`INSTANT_ACTION`).
+            `Snapshot` and `AsNumpy` are instant actions unless they are
+            requested to be lazy, in which case they are actions.
 
     For the list of operations that your current
     backend supports, try :
@@ -88,8 +90,37 @@ class Operation(object):
 
         if not op_type:
             raise Exception("Invalid operation \"{}\"".format(name))
+
+        if op_type == ops.INSTANT_ACTION and self._is_lazy():
+            # Lazy instant actions are booked like any other action and run in
+            # the same event loop
+            op_type = ops.ACTION
+
         return op_type
 
+    def _is_lazy(self):
+        # Checks whether a lazy execution was requested, either through the
+        # snapshot options (fourth argument of Snapshot, like
+        # `ROOT.RDF.RSnapshotOptions.fLazy`) or through the `lazy` argument
+        # of AsNumpy (third argument).
+        if self.name == "Snapshot":
+            if len(self.args) > 3:
+                options = self.args[3]
+            else:
+                options = self.kwargs.get("options")
+            return bool(getattr(options, "fLazy", False))
+
+        if self.name == "AsNumpy":
+            if self.kwargs.get("distributed"):
+                # Distributed arrays are computed right away, only a handle
+                # to them is returned
+                return False
+            if len(self.args) > 2:
+                return bool(self.args[2])
+            return bool(self.kwargs.get("lazy", False))
+
+        return False
+
     def is_action(self):
         """
         Checks if the current operation is an action.
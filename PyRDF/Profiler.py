@@ -0,0 +1,325 @@
+"""
+Measurement of the cost of every transformation of a computational graph.
+"""
+import logging
+
+import ROOT
+
+from PyRDF import GraphOptimizer
+
+logger = logging.getLogger(__name__)
+
+# Timers of the expressions of the transformations. Every expression is
+# wrapped in a comma expression creating a `Timer` first, which measures the
+# time until it is destroyed at the end of the expression. Only one call every
+# `gSamplingPeriod` is timed and it is counted `gSamplingPeriod` times.
+# The timers are not synchronized, graphs are only profiled when they are
+# processed by one thread.
+PROFILER_CODE = """
+#include <chrono>
+#include <vector>
+
+namespace PyRDF {
+namespace Profiler {
+
+std::vector<double> gSeconds;
+std::vector<unsigned long long> gCalls;
+unsigned long long gSamplingPeriod = 1;
+
+void Reset(unsigned long long samplingPeriod)
+{
+   gSeconds.clear();
+   gCalls.clear();
+   gSamplingPeriod = samplingPeriod;
+}
+
+class Timer {
+   std::size_t fIndex;
+   bool fSampled;
+   std::chrono::steady_clock::time_point fStart;
+
+public:
+   Timer(std::size_t index) : fIndex(index)
+   {
+      if (gCalls.size() <= index) {
+         gCalls.resize(index + 1, 0);
+         gSeconds.resize(index + 1, 0.);
+      }
+      fSampled = gCalls[index]++ % gSamplingPeriod == 0;
+      if (fSampled)
+         fStart = std::chrono::steady_clock::now();
+   }
+
+   ~Timer()
+   {
+      if (fSampled) {
+         std::chrono::duration<double> elapsed =
+            std::chrono::steady_clock::now() - fStart;
+         gSeconds[fIndex] += elapsed.count() * gSamplingPeriod;
+      }
+   }
+};
+
+} // namespace Profiler
+} // namespace PyRDF
+"""
+
+_declared = False
+
+
+def _declare_profiler():
+    """Declares the timers to the ROOT interpreter, once per process."""
+    global _declared
+    if not _declared:
+        ROOT.gInterpreter.Declare(PROFILER_CODE)
+        _declared = True
+
+
+def reset(sampling_period):
+    """
+    Clears the timers before processing a range.
+
+    Args:
+        sampling_period (int): One call of every `sampling_period` calls of
+            an expression is timed.
+    """
+    _declare_profiler()
+    ROOT.PyRDF.Profiler.Reset(sampling_period)
+
+
+def wrap_expression(index, expression):
+    """
+    Wraps the expression of a transformation so that its evaluation is
+    timed. The expression is still a single expression, without `return`
+    statement, so that ROOT builds the same function around it.
+
+    Args:
+        index (int): Index of the timer of the transformation.
+
+        expression (str): The C++ expression.
+
+    Returns:
+        str: The wrapped expression.
+    """
+    return "((void)PyRDF::Profiler::Timer({}), ({}))".format(index,
+                                                             expression)
+
+
+def _get_expression_argument(operation):
+    """
+    Finds the argument of an operation holding its C++ expression, i.e. the
+    second argument of a Define and the first one of a Filter.
+
+    Args:
+        operation (PyRDF.Operation.Operation): The operation.
+
+    Returns:
+        int: The position of the expression in the arguments of the
+        operation, or :obj:`None` if it has no C++ expression.
+    """
+    position = {"Define": 1, "Filter": 0}.get(operation.name)
+    if (position is None or len(operation.args) <= position or
+            not isinstance(operation.args[position], str)):
+        return None
+    return position
+
+
+def get_timed_argument(operation):
+    """
+    Finds the argument of an operation holding the expression to be wrapped
+    by `wrap_expression`. Expressions with statements cannot be wrapped,
+    they are left as they are.
+
+    Args:
+        operation (PyRDF.Operation.Operation): The operation.
+
+    Returns:
+        int: The position of the expression in the arguments of the
+        operation, or :obj:`None` if it is not timed.
+    """
+    position = _get_expression_argument(operation)
+    if (position is None or
+            not GraphOptimizer.is_single_expression(
+                operation.args[position])):
+        return None
+    return position
+
+
+def is_timed(operation):
+    """
+    Checks whether the cost of an operation is measured, i.e. it has no C++
+    expression, with a cost of zero, or its expression is timed.
+
+    Args:
+        operation (PyRDF.Operation.Operation): The operation.
+
+    Returns:
+        bool: False for expressions with statements, True otherwise.
+    """
+    return (_get_expression_argument(operation) is None or
+            get_timed_argument(operation) is not None)
+
+
+def read_timers(ntimers):
+    """
+    Reads the timers after processing a range.
+
+    Args:
+        ntimers (int): Number of timers.
+
+    Returns:
+        tuple: The number of calls of every timer and their time in seconds.
+        Timers of expressions that were never evaluated are zero.
+    """
+    seconds = ROOT.PyRDF.Profiler.gSeconds
+    calls = ROOT.PyRDF.Profiler.gCalls
+    return ([int(calls[i]) if i < calls.size() else 0
+             for i in range(ntimers)],
+            [float(seconds[i]) if i < seconds.size() else 0.0
+             for i in range(ntimers)])
+
+
+class NodeProfile(object):
+    """
+    Cost of a transformation of the graph.
+
+    Attributes:
+        entries (int): Number of entries passing the transformation.
+
+        evaluations (int): Number of times the expression of the
+            transformation was evaluated. Defined columns are only evaluated
+            for the entries where they are used. It is :obj:`None` if the
+            expression was not timed.
+
+        seconds (float): Estimated time spent evaluating the expression,
+            excluding the time spent computing the columns it uses. It is
+            zero for transformations without C++ expression and
+            :obj:`None` for expressions with statements, which are not
+            timed.
+    """
+
+    def __init__(self, entries=0, evaluations=0, seconds=0.0):
+        """Creates the profile of a transformation."""
+        self.entries = entries
+        self.evaluations = evaluations
+        self.seconds = seconds
+
+    def __repr__(self):
+        """Returns a string representation of the profile."""
+        return "NodeProfile(entries={}, evaluations={}, seconds={})".format(
+            self.entries, self.evaluations, self.seconds)
+
+
+class GraphProfile(object):
+    """
+    Cost of every transformation of a graph, in the order of
+    `get_profiled_nodes`. It is merged like the rest of the values computed
+    for every range.
+
+    Attributes:
+        nodes (list): The :obj:`NodeProfile` of every transformation, or
+            :obj:`None` if a range could not be profiled, e.g. because it was
+            processed with implicit multithreading.
+    """
+
+    def __init__(self, nodes):
+        """
+        Creates the profile of a graph.
+
+        Args:
+            nodes (list): The profile of every transformation, or
+                :obj:`None` if it is not available.
+        """
+        self.nodes = nodes
+
+    def merge(self, other):
+        """
+        Adds the figures of the profile of another range. The profile is not
+        available anymore if the one of the other range is not.
+
+        Args:
+            other (GraphProfile): The profile to be added.
+        """
+        if self.nodes is None or other.nodes is None:
+            self.nodes = None
+            return
+
+        for profile, other_profile in zip(self.nodes, other.nodes):
+            profile.entries += other_profile.entries
+            if profile.seconds is not None:
+                profile.evaluations += other_profile.evaluations
+                profile.seconds += other_profile.seconds
+
+
+def get_profiled_nodes(node):
+    """
+    Collects the transformations of a graph in the order in which they are
+    profiled, i.e. depth first like the callable processes them.
+
+    Args:
+        node (PyRDF.Node.Node): The head node of the graph.
+
+    Returns:
+        list: The transformation nodes.
+    """
+    nodes = []
+    for child in node.children:
+        if child.operation.is_transformation():
+            nodes.append(child)
+        nodes.extend(get_profiled_nodes(child))
+    return nodes
+
+
+def _describe(node):
+    """
+    Builds a short description of an operation.
+
+    Args:
+        node (PyRDF.Node.Node): The node of the operation.
+
+    Returns:
+        str: The name of the operation and its first arguments.
+    """
+    args = ", ".join(repr(arg) for arg in node.operation.args[:2])
+    if len(args) > 50:
+        args = args[:47] + "..."
+    return "{}({})".format(node.operation.name, args)
+
+
+def format_report(node):
+    """
+    Builds a report of the cost of the transformations below a node, one
+    line per transformation, indented by depth. The cumulative time of a
+    transformation adds the time of the transformations it depends on.
+
+    Args:
+        node (PyRDF.Node.Node): The node whose descendants are reported.
+
+    Returns:
+        str: The report.
+    """
+    header = "{:<60} {:>12} {:>12} {:>10} {:>10}".format(
+        "Operation", "Entries", "Evaluations", "Self (s)", "Cumul. (s)")
+    lines = [header, "-" * len(header)]
+
+    def add_lines(parent, depth, cumulative):
+        for child in parent.children:
+            if child.profile is None:
+                continue
+            profile = child.profile
+            if profile.seconds is None:
+                # Expressions with statements are not timed
+                total = cumulative
+                lines.append("{:<60} {:>12} {:>12} {:>10} {:>10.3f}".format(
+                    "  " * depth + _describe(child), profile.entries, "-",
+                    "-", total))
+            else:
+                total = cumulative + profile.seconds
+                lines.append(
+                    "{:<60} {:>12} {:>12} {:>10.3f} {:>10.3f}".format(
+                        "  " * depth + _describe(child), profile.entries,
+                        profile.evaluations, profile.seconds, total))
+            add_lines(child, depth + 1, total)
+
+    add_lines(node, 0, 0.0)
+    return "\n".join(lines)
@@ -1,12 +1,16 @@
 from __future__ import print_function
 
 import logging
+import threading
+import uuid
 from abc import ABCMeta
 from abc import abstractmethod
+from concurrent import futures
 from contextlib import contextmanager
 
 import ROOT
 
+from PyRDF import Profiler
 from PyRDF.CallableGenerator import CallableGenerator
 from PyRDF.Node import Node
 from PyRDF.Operation import Operation
@@ -111,11 +115,69 @@ class ActionProxy(Proxy):
         with _managed_tcontext():
             if not self.proxied_node.value:  # If event-loop not triggered
                 headnode = self.proxied_node.get_head()
-                generator = CallableGenerator(headnode)
-                headnode.backend.execute(generator)
+                with headnode.execution_lock:
+                    # Another thread may have run the graph in the meantime
+                    if not self.proxied_node.value:
+                        generator = CallableGenerator(headnode)
+                        headnode.backend.execute(generator)
 
         return self.proxied_node.value
 
+    def GetValueAsync(self):
+        """
+        Returns a future of the result value of the current action node. The
+        graph is executed in a background thread if needed, so the caller is
+        not blocked. Cancelling the future also cancels the work submitted
+        to the backend, if the backend supports it.
+
+        Returns:
+            ResultFuture: A :obj:`concurrent.futures.Future` of the value. It
+            can be awaited from asyncio code with `asyncio.wrap_future`.
+
+        Example::
+
+            future = h.GetValueAsync()
+            try:
+                histogram = future.result(timeout=3600)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+        """
+        backend = self.proxied_node.get_head().backend
+        future = ResultFuture(backend)
+        future.start(self.GetValue)
+        return future
+
+    def GetPartialValue(self):
+        """
+        Returns the value of the current action node merged out of the ranges
+        processed so far, without triggering the execution of the graph. It
+        is only available while the graph runs with progressive merging
+        enabled in the backend, e.g. from another thread than the one that
+        called `GetValue`.
+
+        Returns:
+            A copy of the partial value of the current action node, which is
+            not updated by the next ranges, its final value if the execution
+            is over, or :obj:`None` if no range has been processed yet.
+        """
+        if self.proxied_node.value is not None:
+            return self.proxied_node.value
+
+        return self.proxied_node.partial_result
+
+    def GetProgress(self):
+        """
+        Returns the fraction of the entries of the dataset processed for the
+        value of the current action node.
+
+        Returns:
+            float: A number between 0 and 1, it is 1 once the value has been
+            computed.
+        """
+        if self.proxied_node.value:
+            return 1.0
+        return self.proxied_node.progress
+
     def _call_action_result(self, *args, **kwargs):
         """
         Handles an operation call to the current action node and returns
@@ -124,6 +186,90 @@ class ActionProxy(Proxy):
         return getattr(self.GetValue(), self._cur_attr)(*args, **kwargs)
 
 
+class ResultFuture(futures.Future):
+    """
+    Future of a result computed in a background thread. Unlike the futures
+    of :obj:`concurrent.futures.Executor` objects, it can be cancelled while
+    it is running: the work tagged with its identifier is cancelled in the
+    backend and its result, if any, is discarded.
+
+    Attributes:
+        job_id (str): Identifier of the work submitted to the backend.
+    """
+
+    def __init__(self, backend):
+        """
+        Creates a future of a result computed by a backend.
+
+        Args:
+            backend (PyRDF.Backends.Base.BaseBackend): The backend.
+        """
+        super(ResultFuture, self).__init__()
+        self.job_id = "pyrdf-{}".format(uuid.uuid4().hex)
+        self._backend = backend
+        self._thread = None
+
+    def start(self, function):
+        """
+        Computes the result in a background thread.
+
+        Args:
+            function (function): A function without arguments that returns
+                the result.
+        """
+        self._thread = threading.Thread(target=self._run, args=(function,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, function):
+        """
+        Calls the function in the job group of the future and stores its
+        result, unless the future was cancelled.
+
+        Args:
+            function (function): A function without arguments that returns
+                the result.
+        """
+        # The future is kept pending until it is done, so that it can still
+        # be cancelled while the function runs. It may be cancelled by
+        # another thread right before its outcome is stored, which is then
+        # discarded. The state is checked under the lock of the future since
+        # `set_result` does not check it before Python 3.8.
+        try:
+            with self._backend.job_group(self.job_id):
+                result = function()
+        except BaseException as exception:
+            with self._condition:
+                if not self.cancelled():
+                    self.set_exception(exception)
+        else:
+            with self._condition:
+                if not self.cancelled():
+                    self.set_result(result)
+
+    def running(self):
+        """
+        Returns:
+            bool: True if the result is being computed.
+        """
+        return (self._thread is not None and self._thread.is_alive() and
+                not self.done())
+
+    def cancel(self):
+        """
+        Cancels the computation of the result, including the work already
+        submitted to the backend.
+
+        Returns:
+            bool: False if the result was already computed, True otherwise.
+        """
+        if not super(ResultFuture, self).cancel():
+            return False
+        logger.debug("Cancelling job %s", self.job_id)
+        self._backend.cancel_job(self.job_id)
+        return True
+
+
 class TransformationProxy(Proxy):
     """
     A proxy object to an non-action node. It implements acces to attributes
@@ -161,6 +307,109 @@ class TransformationProxy(Proxy):
                     )
                 raise AttributeError(msg)
 
+    def IterBatches(self, columns=None, batch_size=None, prefetch=1):
+        """
+        Extracts columns of the dataset as numpy arrays, like `AsNumpy`, but
+        yields them in batches as the ranges of the dataset are processed.
+        Only a few batches are held in memory at the same time, so the
+        consumer can start right away and the full dataset never needs to
+        fit in the memory of the driver. Closing the generator before the
+        last batch cancels the work still running in the backend.
+
+        Args:
+            columns (list, optional): Names of the columns to be extracted.
+                If `None`, all columns are extracted.
+
+            batch_size (int, optional): Number of entries of every batch, the
+                last one may be smaller. If `None`, one batch per range of the
+                dataset is returned.
+
+            prefetch (int, optional): Number of range results fetched in
+                advance while batches are being consumed. Larger values
+                overlap processing and consumption at the cost of memory.
+
+        Yields:
+            dict: The numpy arrays of every column for the entries of a batch.
+
+        Example::
+
+            df = PyRDF.RDataFrame("tree", "file.root")
+            for batch in df.Filter("x > 0").IterBatches(["x", "y"], 10000):
+                train(batch["x"], batch["y"])
+        """
+        op = Operation("AsNumpy", columns, lazy=True)
+        newNode = Node(operation=op, get_head=self.proxied_node.get_head)
+        self.proxied_node.children.append(newNode)
+
+        headnode = self.proxied_node.get_head()
+        with headnode.execution_lock:
+            generator = CallableGenerator(headnode)
+            batches = headnode.backend.execute_batches(
+                generator, newNode, batch_size, prefetch)
+            try:
+                for batch in batches:
+                    yield batch
+            finally:
+                # Stops the work in flight if the consumer stopped early
+                batches.close()
+                # The node is only needed while batches are being produced
+                newNode.has_user_references = False
+
+    def Checkpoint(self, directory, treename="checkpoint"):
+        """
+        Materializes the dataset at the current node, i.e. its entries after
+        the filters and with the columns defined so far, and returns a new
+        dataframe reading it. The dataset is written to disk the first time
+        and reused by later calls, even from other sessions, as long as the
+        operations up to the current node and the input dataset did not
+        change. Analyses built on top of the returned dataframe then skip
+        the upstream operations.
+
+        Args:
+            directory (str): Directory where the checkpoints are stored. With
+                distributed backends it must be reachable from the workers.
+
+            treename (str, optional): Name of the tree written to disk.
+
+        Returns:
+            A new dataframe reading the materialized dataset.
+
+        Example::
+
+            df = PyRDF.RDataFrame("tree", "file.root")
+            skim = df.Filter("x > 0").Define("y", "x * x")
+            skim = skim.Checkpoint("/shared/checkpoints")
+            h = skim.Histo1D("y")
+        """
+        headnode = self.proxied_node.get_head()
+        with headnode.execution_lock:
+            generator = CallableGenerator(headnode)
+            return headnode.backend.checkpoint(generator, self.proxied_node,
+                                               directory, treename)
+
+    Persist = Checkpoint
+
+    def ProfileReport(self):
+        """
+        Builds a report of the cost of the transformations following the
+        current node, measured by the last execution of the graph with
+        profiling enabled (see the `profile` option of the backend). Every
+        line shows a transformation, the entries passing it, the number of
+        evaluations of its expression, the time spent in the expression and
+        the cumulative time including the transformations it depends on.
+
+        Returns:
+            str: The report.
+
+        Example::
+
+            df = PyRDF.RDataFrame("tree", "file.root", profile=True)
+            h = df.Filter("x > 0").Define("y", "sqrt(x)").Histo1D("y")
+            h.Draw()
+            print(df.ProfileReport())
+        """
+        return Profiler.format_report(self.proxied_node)
+
     def _create_new_op(self, *args, **kwargs):
         """
         Handles an operation call to the current node and returns the new node
@@ -184,8 +433,15 @@ class TransformationProxy(Proxy):
             return ActionProxy(newNode)
         elif op.name in ["AsNumpy", "Snapshot"]:
             headnode = self.proxied_node.get_head()
-            generator = CallableGenerator(headnode)
-            headnode.backend.execute(generator)
+            with headnode.execution_lock:
+                generator = CallableGenerator(headnode)
+                if op.name == "AsNumpy" and op.kwargs.get("distributed"):
+                    headnode.backend.execute_distributed(generator, newNode)
+                else:
+                    headnode.backend.execute(generator)
+            # The result is handed over to the user directly, the node must
+            # not run again in the next executions of the graph
+            newNode.has_user_references = False
             return newNode.value
         else:
             return TransformationProxy(newNode)
@@ -1,10 +1,13 @@
 """
 Top level functions and variables of the PyRDF package
 """
+import collections
+import contextlib
 import logging
 import sys
 
 from PyRDF import Backends
+from PyRDF import CallableGenerator
 
 logger = logging.getLogger(__name__)
 
@@ -50,3 +53,45 @@ def initialize(fun, *args, **kwargs):
         **kwargs (dict): Keyword arguments used to execute the function.
     """
     Backends.Base.BaseBackend.register_initialization(fun, *args, **kwargs)
+
+
+def RunGraphs(proxies):
+    """
+    Triggers the execution of the graphs of several dataframes at once.
+    Backends supporting it process the ranges of all of them in a single
+    submission, so that the workers stay busy from one dataset to the next.
+
+    Args:
+        proxies (list): Proxies to the results of actions of one or more
+            dataframes. Every graph with at least one result not computed yet
+            is executed.
+
+    Example::
+
+        counts = [PyRDF.RDataFrame("tree", files).Count()
+                  for files in samples]
+        PyRDF.RunGraphs(counts)
+    """
+    # Action nodes without a value, grouped by graph
+    pending = collections.OrderedDict()
+    for proxy in proxies:
+        node = proxy.proxied_node
+        if node.value is None:
+            pending.setdefault(node.get_head(), []).append(node)
+
+    if not pending:
+        return
+
+    # The graphs are not executed by other threads in the meantime, locks
+    # are taken in a fixed order so that concurrent calls cannot deadlock
+    with contextlib.ExitStack() as stack:
+        for head_node in sorted(pending, key=id):
+            stack.enter_context(head_node.execution_lock)
+
+        # Another thread may have run some of the graphs already
+        generators = [CallableGenerator.CallableGenerator(head_node)
+                      for head_node, nodes in pending.items()
+                      if not all(node.value is not None for node in nodes)]
+        if generators:
+            backend = generators[0].head_node.backend
+            backend.execute_graphs(generators)
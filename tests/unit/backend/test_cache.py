@@ -0,0 +1,294 @@
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from PyRDF import Node
+from PyRDF import Proxy
+from PyRDF.Backends import Cache
+from PyRDF.Backends import Dist
+from PyRDF.Backends import Snapshots
+
+
+class DummyValue(object):
+    """
+    Dummy mergeable value providing a `GetValue` method. Defined at module
+    level so that it can be pickled.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def GetValue(self):
+        return self.value
+
+
+class TestBackend(Dist.DistBackend):
+    """Dummy backend counting the number of distributed executions."""
+
+    def __init__(self):
+        super(TestBackend, self).__init__()
+        self.executions = 0
+
+    def ProcessAndMerge(self, mapper, reducer):
+        """
+        Dummy implementation of ProcessAndMerge. Returns one mock value per
+        action node left in the graph.
+        """
+        self.executions += 1
+        return [DummyValue(self.executions) for _ in range(self.nactions)]
+
+    def distribute_unique_paths(self, includes_list):
+        """
+        Dummy implementation of distribute_files. Does nothing.
+        """
+        pass
+
+    def make_dataframe(self, *args, **kwargs):
+        """Dummy make_dataframe"""
+        pass
+
+
+class LocalBackend(Dist.DistBackend):
+    """
+    Backend running map-reduce sequentially in the current process. It keeps
+    track of the files read in every execution.
+    """
+
+    def __init__(self):
+        super(LocalBackend, self).__init__()
+        self.processed_files = []
+
+    def ProcessAndMerge(self, mapper, reducer):
+        """Runs the mapper on every range and merges the results in order."""
+        ranges = self.build_ranges()
+        for current_range in ranges:
+            self.processed_files.extend(current_range.filelist)
+        return functools.reduce(reducer, map(mapper, ranges))
+
+    def distribute_unique_paths(self, includes_list):
+        """
+        Dummy implementation of distribute_files. Does nothing.
+        """
+        pass
+
+    def make_dataframe(self, *args, **kwargs):
+        """Dummy make_dataframe"""
+        pass
+
+
+class ResultCacheTest(unittest.TestCase):
+    """Check the on-disk cache of results"""
+
+    def setUp(self):
+        """Create a temporary directory for the cache"""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the cache directory"""
+        shutil.rmtree(self.directory)
+
+    def test_put_and_get(self):
+        """Stored values can be retrieved, unknown keys return None"""
+        cache = Cache.ResultCache(self.directory)
+        cache.put("key", {"a": [1, 2, 3]})
+
+        self.assertDictEqual(cache.get("key"), {"a": [1, 2, 3]})
+        self.assertIsNone(cache.get("other"))
+
+    def test_lru_eviction(self):
+        """The least recently used entries are removed first"""
+        cache = Cache.ResultCache(self.directory)
+        value = "x" * 1000
+
+        cache.put("first", value)
+        cache.put("second", value)
+        # Make 'second' the least recently used entry
+        os.utime(cache._path("second"), (1, 1))
+
+        # The cache can now only fit two entries
+        cache.max_size = 2 * os.path.getsize(cache._path("first"))
+        cache.put("third", value)
+
+        self.assertIsNotNone(cache.get("first"))
+        self.assertIsNone(cache.get("second"))
+        self.assertIsNotNone(cache.get("third"))
+
+    def test_unpicklable_value(self):
+        """Values that cannot be stored leave no temporary file"""
+        cache = Cache.ResultCache(self.directory)
+
+        with self.assertRaises(Exception):
+            cache.put("key", lambda: None)
+
+        self.assertListEqual(os.listdir(self.directory), [])
+
+    def test_entries_removed_concurrently(self):
+        """Entries removed by another process are skipped by the eviction"""
+        cache = Cache.ResultCache(self.directory)
+        listdir = os.listdir
+
+        def listdir_with_removed_entry(directory):
+            return listdir(directory) + ["gone" + Cache.ResultCache.EXTENSION]
+
+        with mock.patch.object(Cache.os, "listdir",
+                               listdir_with_removed_entry):
+            cache.put("key", "x")
+
+        self.assertEqual(cache.get("key"), "x")
+
+    def test_keys(self):
+        """Keys depend on the operations and on the fingerprints"""
+        hn = Node.HeadNode(1)
+        hn.backend = TestBackend()
+        node = Proxy.TransformationProxy(hn)
+        node.Define("x", "1").Count()
+        node.Define("x", "2").Count()
+
+        paths = Cache.get_action_paths(hn)
+        key1 = Cache.make_key(paths[0][1], ("file.root", 10, 1.0))
+        key2 = Cache.make_key(paths[1][1], ("file.root", 10, 1.0))
+        key3 = Cache.make_key(paths[0][1], ("file.root", 10, 2.0))
+
+        self.assertEqual(len(paths), 2)
+        self.assertEqual(key1, Cache.make_key(paths[0][1],
+                                              ("file.root", 10, 1.0)))
+        self.assertNotEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+
+class CachedExecutionTest(unittest.TestCase):
+    """Check that cached actions are not executed again"""
+
+    def setUp(self):
+        """Create a temporary directory for the cache"""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the cache directory"""
+        shutil.rmtree(self.directory)
+
+    def create_proxy(self):
+        """Creates the head node of a graph with a cache-enabled backend"""
+        hn = Node.HeadNode(10)
+        hn.backend = TestBackend()
+        hn.backend.result_cache = Cache.ResultCache(self.directory)
+        return Proxy.TransformationProxy(hn)
+
+    def test_cached_results_reused(self):
+        """A second execution of the same graph runs no event loop"""
+        node = self.create_proxy()
+        node.proxied_node.backend.nactions = 1
+        count = node.Define("x", "1").Count()
+        self.assertEqual(count.GetValue(), 1)
+
+        new_node = self.create_proxy()
+        new_node.proxied_node.backend.nactions = 1
+        new_count = new_node.Define("x", "1").Count()
+
+        self.assertEqual(new_count.GetValue(), 1)
+        self.assertEqual(new_node.proxied_node.backend.executions, 0)
+
+    def test_only_missing_actions_scheduled(self):
+        """Only actions not found in the cache are executed"""
+        node = self.create_proxy()
+        node.proxied_node.backend.nactions = 1
+        node.Define("x", "1").Count().GetValue()
+
+        new_node = self.create_proxy()
+        backend = new_node.proxied_node.backend
+        backend.nactions = 1
+        count1 = new_node.Define("x", "1").Count()
+        count2 = new_node.Define("x", "2").Count()
+        count2.GetValue()
+
+        self.assertEqual(backend.executions, 1)
+        self.assertEqual(count1.GetValue(), 1)
+        self.assertEqual(count2.GetValue(), 1)
+
+    def test_falsy_values_not_looked_up(self):
+        """Actions already computed are skipped even if their value is 0"""
+        node = self.create_proxy()
+        count = node.Define("x", "1").Count()
+        count.proxied_node.value = 0
+
+        backend = node.proxied_node.backend
+        missing_keys = backend._fill_cached_results(node.proxied_node)
+
+        self.assertDictEqual(missing_keys, {})
+        self.assertEqual(count.proxied_node.value, 0)
+
+
+class IncrementalExecutionTest(unittest.TestCase):
+    """Check that only new input files are processed in incremental mode"""
+
+    def setUp(self):
+        """Create a temporary directory for the cache"""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the cache directory"""
+        shutil.rmtree(self.directory)
+
+    def count_entries(self, filelist):
+        """
+        Counts the entries of the given files in incremental mode and returns
+        the result together with the files that were read.
+        """
+        hn = Node.HeadNode("myTree", filelist)
+        hn.backend = LocalBackend()
+        hn.backend.npartitions = 2
+        hn.backend.result_cache = Cache.ResultCache(self.directory)
+        hn.backend.incremental = True
+
+        count = Proxy.TransformationProxy(hn).Count()
+        return count.GetValue(), hn.backend.processed_files
+
+    def test_new_files_processed(self):
+        """Files added to the dataset are the only ones processed"""
+        file1 = "tests/unit/backend/2clusters.root"
+        file2 = "tests/unit/backend/4clusters.root"
+
+        count, processed_files = self.count_entries([file1])
+        self.assertEqual(count, 1000)
+        self.assertListEqual(processed_files, [file1, file1])
+
+        count, processed_files = self.count_entries([file1, file2])
+        self.assertEqual(count, 2000)
+        self.assertListEqual(processed_files, [file2, file2])
+
+        count, processed_files = self.count_entries([file1, file2])
+        self.assertEqual(count, 2000)
+        self.assertListEqual(processed_files, [])
+
+    def test_empty_files_cached(self):
+        """Files without entries are not processed again"""
+        hn = Node.HeadNode(1)
+        hn.backend = backend = LocalBackend()
+        backend.npartitions = 2
+        backend.result_cache = Cache.ResultCache(self.directory)
+        backend.incremental = True
+        backend.treename = "tree"
+        backend.files = ["a.root", "empty.root"]
+        backend.nentries = 10
+        backend.file_layouts = {
+            "a.root": Snapshots.FileLayout(10, [(0, 5), (5, 10)]),
+            "empty.root": Snapshots.FileLayout(0, [])
+        }
+        nodes = [Proxy.TransformationProxy(hn).Count().proxied_node]
+
+        def mapper(current_range):
+            return [DummyValue(current_range.end - current_range.start)]
+
+        def reducer(values_out, values_in):
+            return [DummyValue(values_out[0].value + values_in[0].value)]
+
+        for _ in range(2):
+            values = backend._process_incrementally(hn, nodes, mapper,
+                                                    reducer)
+            self.assertEqual(values[0].value, 10)
+            self.assertListEqual(backend.files, ["a.root", "empty.root"])
+
+        self.assertListEqual(backend.processed_files, ["a.root", "a.root"])
@@ -0,0 +1,50 @@
+import functools
+import pickle
+import unittest
+
+from PyRDF.Backends import Codec
+
+
+class PackedValuesTest(unittest.TestCase):
+    """Check the packing of the values of a range"""
+
+    def test_pickle_roundtrip(self):
+        """Packed values are unpacked after pickling"""
+        values = [[1, 2, 3], {"a": "b"}, 4.5]
+
+        for level in (0, 1, 9):
+            packed = Codec.PackedValues(values, compression_level=level)
+            unpickled = pickle.loads(pickle.dumps(packed))
+
+            self.assertIsNone(unpickled._values)
+            self.assertListEqual(Codec.unpack(unpickled), values)
+
+    def test_compression(self):
+        """Sparse values are compressed"""
+        values = [[0] * 10000]
+
+        uncompressed = Codec.PackedValues(values)
+        compressed = Codec.PackedValues(values, compression_level=1)
+
+        self.assertLess(len(compressed.payload),
+                        len(uncompressed.payload) / 10)
+
+    def test_packed_map_reduce(self):
+        """Wrapped mappers and reducers give the same result"""
+        def mapper(current_range):
+            return [list(range(*current_range))]
+
+        def reducer(values_out, values_in):
+            values_out[0].extend(values_in[0])
+            return values_out
+
+        ranges = [(0, 3), (3, 5), (5, 6)]
+        packed_mapper = Codec.pack_mapper(mapper, 1)
+        packed_reducer = Codec.pack_reducer(reducer, 1)
+
+        values = functools.reduce(
+            packed_reducer,
+            [pickle.loads(pickle.dumps(packed_mapper(current_range)))
+             for current_range in ranges])
+
+        self.assertListEqual(Codec.unpack(values), [[0, 1, 2, 3, 4, 5]])
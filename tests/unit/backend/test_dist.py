@@ -1,12 +1,20 @@
+import contextlib
 import os
+import shutil
+import tempfile
+import threading
 import unittest
 import warnings
 from array import array
 
+import numpy
+import PyRDF
 import ROOT
 from PyRDF import Node
 from PyRDF import Proxy
 from PyRDF.Backends import Dist
+from PyRDF.Backends import Snapshots
+from PyRDF.Operation import Operation
 
 
 def rangesToTuples(ranges):
@@ -392,6 +400,29 @@ class DistBuildRangesTest(unittest.TestCase):
 
         self.assertListEqual(ranges, ranges_reqd)
 
+    def test_file_aligned_ranges(self):
+        """
+        Check that _get_file_aligned_ranges never creates ranges spanning
+        more than one file and shares the partitions among files according
+        to their number of clusters.
+
+        """
+        backend = DistBuildRangesTest.TestBackend()
+        treename = "myTree"
+        filelist = ["tests/unit/backend/2clusters.root",
+                    "tests/unit/backend/4clusters.root"]
+        backend.npartitions = 3
+
+        crs = backend._get_file_aligned_ranges(treename, filelist)
+        ranges = rangesToTuples(crs)
+
+        ranges_reqd = [(0, 1000), (0, 500), (500, 1000)]
+
+        self.assertListEqual(ranges, ranges_reqd)
+        self.assertListEqual([r.filelist for r in crs],
+                             [[filelist[0]], [filelist[1]], [filelist[1]]])
+        self.assertListEqual([r.id for r in crs], [0, 1, 2])
+
     def test_buildranges_with_clustered_ranges(self):
         """
         Check that build_ranges produces clustered ranges when the dataset
@@ -443,6 +474,7 @@ class DistBuildRangesTest(unittest.TestCase):
         ]
 
         self.assertListEqual(ranges, ranges_reqd)
+        self.assertListEqual([r.id for r in crs], list(range(16)))
 
 
 class DistRDataFrameInterface(unittest.TestCase):
@@ -612,3 +644,723 @@ class DistRDataFrameInterface(unittest.TestCase):
         ranges_reqd = [(0, 1250), (250, 1000)]
 
         self.assertListEqual(ranges, ranges_reqd)
+
+
+class MergeArrayChunksTest(unittest.TestCase):
+    """Check the merge of the partial results of AsNumpy"""
+
+    def test_chunks_merged_in_order(self):
+        """Partial arrays are concatenated following the order of the keys"""
+        chunks = {
+            (2,): {"x": numpy.array([5, 6]), "y": numpy.array([0.5, 0.6])},
+            (0,): {"x": numpy.array([1, 2]), "y": numpy.array([0.1, 0.2])},
+            (1,): {"x": numpy.array([3, 4]), "y": numpy.array([0.3, 0.4])}
+        }
+
+        merged = Dist._merge_array_chunks(chunks)
+
+        numpy.testing.assert_array_equal(merged["x"], [1, 2, 3, 4, 5, 6])
+        numpy.testing.assert_array_equal(
+            merged["y"], [0.1, 0.2, 0.3, 0.4, 0.5, 0.6])
+        self.assertEqual(merged["x"].dtype, numpy.array([1]).dtype)
+        self.assertDictEqual(chunks, {})
+
+    def test_empty_chunks(self):
+        """Ranges without entries do not change the result"""
+        chunks = {
+            (0, 0): {"x": numpy.array([], dtype=float)},
+            (0, 1): {"x": numpy.array([1.5, 2.5])}
+        }
+
+        merged = Dist._merge_array_chunks(chunks)
+
+        numpy.testing.assert_array_equal(merged["x"], [1.5, 2.5])
+        self.assertEqual(merged["x"].dtype, numpy.float64)
+
+
+class ArrayFilesTest(unittest.TestCase):
+    """Check AsNumpy results written to disk"""
+
+    def setUp(self):
+        """Create a temporary output directory"""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the output directory"""
+        shutil.rmtree(self.directory)
+
+    def test_files_stitched_in_order(self):
+        """Files of every range are merged in a memory-mapped array"""
+        chunks = {
+            (rangeid,): Dist._write_array_chunk(
+                {"x": numpy.arange(start, end, dtype=numpy.float32)},
+                self.directory, rangeid)
+            for rangeid, (start, end) in enumerate([(0, 3), (3, 5), (5, 9)])
+        }
+
+        merged = Dist._stitch_array_files(chunks, self.directory)
+
+        self.assertIsInstance(merged["x"], numpy.memmap)
+        self.assertEqual(merged["x"].dtype, numpy.float32)
+        numpy.testing.assert_array_equal(merged["x"], numpy.arange(9))
+        self.assertListEqual(os.listdir(self.directory), ["x.npy"])
+
+    def test_file_names_do_not_collide(self):
+        """Columns named like the files of other ranges are kept apart"""
+        chunks = {
+            (rangeid,): Dist._write_array_chunk(
+                {"x": numpy.array([rangeid]), "x_1": numpy.array([10]),
+                 "a/b": numpy.array([20])},
+                self.directory, rangeid)
+            for rangeid in range(2)
+        }
+
+        merged = Dist._stitch_array_files(chunks, self.directory)
+
+        numpy.testing.assert_array_equal(merged["x"], [0, 1])
+        numpy.testing.assert_array_equal(merged["x_1"], [10, 10])
+        numpy.testing.assert_array_equal(merged["a/b"], [20, 20])
+        self.assertListEqual(sorted(os.listdir(self.directory)),
+                             ["a%2Fb.npy", "x.npy", "x_1.npy"])
+
+    def test_object_columns(self):
+        """Columns of Python objects are loaded in memory"""
+        chunks = {
+            (0,): Dist._write_array_chunk(
+                {"s": numpy.array(["a", None], dtype=object)},
+                self.directory, 0),
+            (1,): Dist._write_array_chunk(
+                {"s": numpy.array(["b"], dtype=object)},
+                self.directory, 1)
+        }
+
+        merged = Dist._stitch_array_files(chunks, self.directory)
+
+        self.assertListEqual(merged["s"].tolist(), ["a", None, "b"])
+
+
+class StreamingTest(unittest.TestCase):
+    """Check the streaming of numpy arrays in batches"""
+
+    class TestBackend(Dist.DistBackend):
+        """
+        Dummy backend streaming the entry numbers of every range as the
+        result of the only action of the graph.
+        """
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Dummy implementation of ProcessAndMerge."""
+            pass
+
+        def __init__(self):
+            """Records the job groups and the end of the iterations"""
+            super(StreamingTest.TestBackend, self).__init__()
+            self.job_groups = []
+            self.cancelled_jobs = []
+            self.iteration_closed = threading.Event()
+
+        def ProcessAndIterate(self, mapper, ordered=True):
+            """Returns a mock AsNumpy result per range."""
+            try:
+                for current_range in self.build_ranges():
+                    entries = numpy.arange(current_range.start,
+                                           current_range.end)
+                    yield [{(current_range.id,): {"x": entries}}]
+            finally:
+                self.iteration_closed.set()
+
+        @contextlib.contextmanager
+        def job_group(self, job_id):
+            """Records the job group"""
+            self.job_groups.append(job_id)
+            yield
+
+        def cancel_job(self, job_id):
+            """Records the cancelled job"""
+            self.cancelled_jobs.append(job_id)
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def test_split_batches(self):
+        """Chunks are regrouped in batches of the requested size"""
+        chunks = [{"x": numpy.arange(0, 3)},
+                  {"x": numpy.arange(3, 4)},
+                  {"x": numpy.arange(4, 11)}]
+
+        batches = list(Dist._split_batches(iter(chunks), batch_size=4))
+
+        self.assertListEqual([batch["x"].tolist() for batch in batches],
+                             [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10]])
+
+    def test_invalid_batch_size(self):
+        """Batches must hold at least one entry"""
+        with self.assertRaises(ValueError):
+            next(Dist._split_batches(iter([]), batch_size=0))
+
+    def test_prefetch(self):
+        """Prefetched items keep their order and errors are propagated"""
+        def items():
+            yield 1
+            yield 2
+            raise ValueError("failed")
+
+        prefetched = Dist._prefetch(items(), 1)
+
+        self.assertEqual(next(prefetched), 1)
+        self.assertEqual(next(prefetched), 2)
+        with self.assertRaises(ValueError):
+            next(prefetched)
+
+    def test_iter_batches(self):
+        """Batches follow the order of the entries in the dataset"""
+        hn = Node.HeadNode(10)
+        hn.backend = StreamingTest.TestBackend()
+        hn.backend.npartitions = 3
+        node = Proxy.TransformationProxy(hn)
+
+        batches = list(node.IterBatches(["x"], batch_size=4))
+
+        self.assertListEqual([batch["x"].tolist() for batch in batches],
+                             [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+        # The node extracting the arrays is removed from the graph
+        hn.graph_prune()
+        self.assertListEqual(hn.children, [])
+        self.assertEqual(len(hn.backend.job_groups), 1)
+        self.assertListEqual(hn.backend.cancelled_jobs, [])
+
+    def test_iter_batches_closed_early(self):
+        """The work in flight is cancelled if the consumer stops early"""
+        hn = Node.HeadNode(10)
+        hn.backend = StreamingTest.TestBackend()
+        hn.backend.npartitions = 10
+        node = Proxy.TransformationProxy(hn)
+
+        batches = node.IterBatches(["x"], batch_size=4)
+        self.assertListEqual(next(batches)["x"].tolist(), [0, 1, 2, 3])
+        batches.close()
+
+        self.assertTrue(hn.backend.iteration_closed.wait(10))
+        self.assertEqual(len(hn.backend.cancelled_jobs), 1)
+        self.assertListEqual(hn.backend.cancelled_jobs,
+                             hn.backend.job_groups)
+
+
+class DistributedArraysTest(unittest.TestCase):
+    """Check AsNumpy results kept on the workers"""
+
+    class TestBackend(Dist.DistBackend):
+        """Dummy backend returning a list as the distributed collection."""
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Dummy implementation of ProcessAndMerge."""
+            pass
+
+        def ProcessAndDistribute(self, mapper, reducer, index):
+            """Returns one mock AsNumpy result per range."""
+            handle = [{"x": numpy.arange(current_range.start,
+                                         current_range.end)}
+                      for current_range in self.build_ranges()]
+            return handle, [{}]
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def test_handle_returned(self):
+        """The distributed collection is returned instead of the arrays"""
+        hn = Node.HeadNode(10)
+        hn.backend = DistributedArraysTest.TestBackend()
+        hn.backend.npartitions = 2
+        node = Proxy.TransformationProxy(hn)
+
+        handle = node.AsNumpy(["x"], distributed=True)
+
+        self.assertListEqual([columns["x"].tolist() for columns in handle],
+                             [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]])
+        hn.graph_prune()
+        self.assertListEqual(hn.children, [])
+
+
+class CombineRangesTest(unittest.TestCase):
+    """Check the local merge of the values of several ranges"""
+
+    def test_ranges_combined(self):
+        """The values of all ranges are merged into a single list"""
+        def mapper(current_range):
+            return [current_range.end - current_range.start]
+
+        def reducer(values_out, values_in):
+            return [values_out[0] + values_in[0]]
+
+        combined_mapper = Dist.combine_ranges(mapper, reducer)
+        ranges = [Dist.Range(0, 5, None, None, 0),
+                  Dist.Range(5, 7, None, None, 1)]
+
+        self.assertListEqual(list(combined_mapper(iter(ranges))), [[7]])
+        self.assertListEqual(list(combined_mapper(iter([]))), [])
+
+
+class RunGraphsTest(unittest.TestCase):
+    """Check the execution of several graphs in a single submission"""
+
+    class Counter(object):
+        """Mergeable value counting entries."""
+
+        def __init__(self, value):
+            self.value = value
+
+        def GetValue(self):
+            return self.value
+
+    class TestBackend(Dist.DistBackend):
+        """
+        Dummy backend counting the entries of every range and recording the
+        ranges of every submission.
+        """
+
+        def __init__(self):
+            super(RunGraphsTest.TestBackend, self).__init__()
+            self.npartitions = 2
+            self.submissions = []
+
+        def _build_mapper_and_reducer(self, head_node, callable_function,
+                                      nodes):
+            """Counts the entries of every range for every node."""
+            def mapper(current_range):
+                nentries = current_range.end - current_range.start
+                return [RunGraphsTest.Counter(nentries) for _ in nodes]
+
+            def reducer(values_out, values_in):
+                return [RunGraphsTest.Counter(out.value + value_in.value)
+                        for out, value_in in zip(values_out, values_in)]
+
+            return mapper, reducer
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Runs the mapper and the reducer sequentially."""
+            ranges = self.build_ranges()
+            self.submissions.append(ranges)
+            self.submitted_headers = set(self.headers)
+            values = mapper(ranges[0])
+            for current_range in ranges[1:]:
+                values = reducer(values, mapper(current_range))
+            return values
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def create_graph(self, nentries):
+        """Creates a graph with a head node of the given number of entries"""
+        hn = Node.HeadNode(nentries)
+        hn.backend = RunGraphsTest.TestBackend()
+        return Proxy.TransformationProxy(hn)
+
+    def test_interleave_ranges(self):
+        """Ranges of every graph are taken in turn"""
+        tasks = Dist.interleave_ranges([["a0", "a1", "a2"], ["b0"]])
+
+        self.assertListEqual(tasks, [(0, "a0"), (1, "b0"),
+                                     (0, "a1"), (0, "a2")])
+
+    def test_combine_graphs(self):
+        """Values of every graph are placed in their own slots"""
+        def reducer(values_out, values_in):
+            return [values_out[0] + values_in[0]]
+
+        mapper, combined_reducer = Dist.combine_graphs(
+            [lambda r: [r], lambda r: [r, 2 * r]], [1, 2], reducer)
+
+        values = combined_reducer(mapper((1, 3)), mapper((0, 5)))
+        values = combined_reducer(values, mapper((1, 4)))
+
+        self.assertListEqual(values, [5, 7, 14])
+
+    def test_run_graphs(self):
+        """The graphs are processed in one submission and get their values"""
+        graph1 = self.create_graph(10)
+        graph2 = self.create_graph(4)
+        count1 = graph1.Count()
+        sum1 = graph1.Sum("x")
+        count2 = graph2.Count()
+
+        PyRDF.RunGraphs([count1, sum1, count2])
+
+        backend = graph1.proxied_node.backend
+        self.assertEqual(len(backend.submissions), 1)
+        self.assertListEqual([index for index, _ in backend.submissions[0]],
+                             [0, 1, 0, 1])
+        self.assertListEqual([count1.GetValue(), sum1.GetValue(),
+                              count2.GetValue()], [10, 10, 4])
+        self.assertListEqual(graph2.proxied_node.backend.submissions, [])
+
+    def test_headers_of_submission(self):
+        """Headers of every graph are only used for their submission"""
+        graph1 = self.create_graph(10)
+        graph2 = self.create_graph(4)
+        graph1.proxied_node.backend.headers.add("a.h")
+        graph2.proxied_node.backend.headers.add("b.h")
+
+        PyRDF.RunGraphs([graph1.Count(), graph2.Count()])
+
+        backend = graph1.proxied_node.backend
+        self.assertSetEqual(backend.submitted_headers, {"a.h", "b.h"})
+        self.assertSetEqual(backend.headers, {"a.h"})
+
+    def test_computed_values_skipped(self):
+        """Results equal to zero are not computed again"""
+        graph = self.create_graph(10)
+        count = graph.Count()
+        count.proxied_node.value = 0
+
+        PyRDF.RunGraphs([count])
+
+        self.assertListEqual(graph.proxied_node.backend.submissions, [])
+
+
+class ProgressiveMergeTest(unittest.TestCase):
+    """Check the merge of the values as soon as ranges are processed"""
+
+    class Counter(object):
+        """Mergeable value counting entries."""
+
+        def __init__(self, value):
+            self.value = value
+
+        def GetValue(self):
+            return self.value
+
+    class TestBackend(Dist.DistBackend):
+        """
+        Dummy backend processing the ranges in reverse order and recording
+        the partial value of a node after every range.
+        """
+
+        def __init__(self):
+            super(ProgressiveMergeTest.TestBackend, self).__init__()
+            self.partial_values = []
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Dummy implementation of ProcessAndMerge."""
+            pass
+
+        def ProcessAndIterate(self, mapper, ordered=True):
+            """Runs the mapper on the ranges in reverse order."""
+            for current_range in reversed(self.build_ranges()):
+                yield mapper(current_range)
+                proxy = Proxy.ActionProxy(self.node)
+                self.partial_values.append((proxy.GetPartialValue(),
+                                            proxy.GetProgress()))
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def test_partial_values(self):
+        """Partial values and progress are updated after every range"""
+        hn = Node.HeadNode(10)
+        hn.backend = backend = ProgressiveMergeTest.TestBackend()
+        backend.npartitions = 2
+        backend._load_dataset_info(hn)
+        backend.node = Proxy.TransformationProxy(hn).Count().proxied_node
+
+        def mapper(current_range):
+            return [ProgressiveMergeTest.Counter(
+                current_range.end - current_range.start)]
+
+        def reducer(values_out, values_in):
+            return [ProgressiveMergeTest.Counter(
+                values_out[0].value + values_in[0].value)]
+
+        values = backend._process_progressively([backend.node], mapper,
+                                                reducer)
+
+        self.assertEqual(values[0].value, 10)
+        self.assertListEqual(backend.partial_values, [(5, 0.5), (10, 1.0)])
+
+    def test_partial_value_copied(self):
+        """Partial values are not modified by the next merges"""
+        class Histogram(object):
+            def __init__(self, entries):
+                self.entries = entries
+
+            def Clone(self):
+                return Histogram(self.entries)
+
+        hn = Node.HeadNode(10)
+        hn.backend = backend = ProgressiveMergeTest.TestBackend()
+        backend.npartitions = 2
+        backend._load_dataset_info(hn)
+        backend.node = Proxy.TransformationProxy(hn).Count().proxied_node
+
+        def mapper(current_range):
+            return [ProgressiveMergeTest.Counter(
+                Histogram(current_range.end - current_range.start))]
+
+        def reducer(values_out, values_in):
+            values_out[0].value.entries += values_in[0].value.entries
+            return values_out
+
+        backend._process_progressively([backend.node], mapper, reducer)
+
+        self.assertListEqual(
+            [histogram.entries for histogram, _ in backend.partial_values],
+            [5, 10])
+
+    def test_progressive_merge_ignored_options(self):
+        """Options not supported with progressive merging are reported"""
+        hn = Node.HeadNode(10)
+        hn.backend = backend = ProgressiveMergeTest.TestBackend()
+        backend.npartitions = 2
+        backend._load_dataset_info(hn)
+        backend.node = Proxy.TransformationProxy(hn).Count().proxied_node
+        backend.progressive_merge = True
+        backend.pack_results = True
+
+        def mapper(current_range):
+            return [ProgressiveMergeTest.Counter(
+                current_range.end - current_range.start)]
+
+        def reducer(values_out, values_in):
+            return [ProgressiveMergeTest.Counter(
+                values_out[0].value + values_in[0].value)]
+
+        with self.assertWarns(UserWarning):
+            backend._run_execution(hn, [backend.node], {}, mapper, reducer)
+
+        self.assertEqual(backend.node.value, 10)
+
+    def test_no_partial_value(self):
+        """No partial value is available before the first range"""
+        hn = Node.HeadNode(10)
+        hn.backend = ProgressiveMergeTest.TestBackend()
+        count = Proxy.TransformationProxy(hn).Count()
+
+        self.assertIsNone(count.GetPartialValue())
+        self.assertEqual(count.GetProgress(), 0.0)
+
+
+class DeltaSnapshotTest(unittest.TestCase):
+    """Check the snapshots of the columns defined in the graph"""
+
+    class TestBackend(Dist.DistBackend):
+        """Dummy backend reading a dataset from files."""
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Dummy implementation of ProcessAndMerge."""
+            pass
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def create_graph(self, *transformations):
+        """
+        Books a delta snapshot after the given transformations and returns
+        the head node and the snapshot node.
+        """
+        hn = Node.HeadNode(1)
+        hn.backend = DeltaSnapshotTest.TestBackend()
+        hn.backend.treename = "tree"
+        hn.backend.files = ["file.root"]
+        node = Proxy.TransformationProxy(hn)
+        for name, args in transformations:
+            node = getattr(node, name)(*args)
+
+        op = Operation("Snapshot", "tree", "delta.root", delta=True)
+        snapshot = Node.Node(operation=op,
+                             get_head=node.proxied_node.get_head)
+        node.proxied_node.children.append(snapshot)
+        return hn, snapshot
+
+    def test_ancestors(self):
+        """The nodes between the head node and a node are found"""
+        hn, snapshot = self.create_graph(("Define", ("x", "1")),
+                                         ("Define", ("y", "x")))
+
+        ancestors = Dist._get_ancestors(hn, snapshot)
+
+        self.assertListEqual([node.operation.args[0] for node in ancestors],
+                             ["x", "y"])
+
+    def test_ancestors_of_merged_node(self):
+        """Merged nodes are found through the node they were merged into"""
+        hn, snapshot = self.create_graph(("Define", ("x", "1")))
+        duplicate = Node.Node(operation=snapshot.operation,
+                              get_head=hn.get_head)
+        snapshot.merged_nodes.append(duplicate)
+
+        ancestors = Dist._get_ancestors(hn, duplicate)
+
+        self.assertListEqual([node.operation.args[0] for node in ancestors],
+                             ["x"])
+
+    def test_ancestors_of_unreachable_node(self):
+        """Nodes that are not in the graph are an error"""
+        hn, _ = self.create_graph(("Define", ("x", "1")))
+        _, snapshot = self.create_graph(("Define", ("x", "1")))
+
+        self.assertListEqual(Dist._get_ancestors(hn, hn), [])
+        with self.assertRaises(ValueError):
+            Dist._get_ancestors(hn, snapshot)
+
+    def test_only_defines(self):
+        """Delta snapshots cannot follow a filter"""
+        hn, snapshot = self.create_graph(("Define", ("x", "1")))
+        hn.backend._check_delta_snapshots(hn, [snapshot])
+
+        hn, snapshot = self.create_graph(("Define", ("x", "1")),
+                                         ("Filter", ("x > 0",)))
+        with self.assertRaises(ValueError):
+            hn.backend._check_delta_snapshots(hn, [snapshot])
+
+    def test_friend_files_selected(self):
+        """Friend trees aligned with the main tree keep the range files"""
+        friend_info = Dist.FriendInfo(
+            ["delta", "other"],
+            [["delta_0.root", "delta_1.root", "delta_2.root"],
+             ["other.root"]])
+
+        selected = friend_info.select_files([1, 2], 3)
+
+        self.assertListEqual(selected.friend_names, ["delta", "other"])
+        self.assertListEqual(selected.friend_file_names,
+                             [["delta_1.root", "delta_2.root"],
+                              ["other.root"]])
+
+    def test_file_aligned_ranges_with_friends(self):
+        """Ranges of a single file get the friend files of that file"""
+        backend = DeltaSnapshotTest.TestBackend()
+        backend.npartitions = 4
+        backend.file_layouts = {
+            "a.root": Snapshots.FileLayout(10, [(0, 5), (5, 10)]),
+            "b.root": Snapshots.FileLayout(4, [(0, 4)])
+        }
+        friend_info = Dist.FriendInfo(["delta"],
+                                      [["delta_a.root", "delta_b.root"]])
+
+        ranges = backend._get_file_aligned_ranges(
+            "tree", ["a.root", "b.root"], friend_info)
+
+        self.assertListEqual(
+            [(r.filelist, r.friend_info.friend_file_names) for r in ranges],
+            [(["a.root"], [["delta_a.root"]]),
+             (["a.root"], [["delta_a.root"]]),
+             (["b.root"], [["delta_b.root"]])])
+
+    def test_file_aligned_ranges_unaligned_friends(self):
+        """Friend trees not split like the input files are rejected"""
+        backend = DeltaSnapshotTest.TestBackend()
+        backend.npartitions = 2
+        friend_info = Dist.FriendInfo(["other"], [["other.root"]])
+
+        with self.assertRaises(ValueError):
+            backend._get_file_aligned_ranges(
+                "tree", ["a.root", "b.root"], friend_info)
+
+
+class CheckpointTest(unittest.TestCase):
+    """Check the materialization of the dataset at a node of the graph"""
+
+    class TestBackend(Dist.DistBackend):
+        """
+        Dummy backend counting the executions and returning a snapshot file
+        as the result of the only action of the graph.
+        """
+
+        def __init__(self, path):
+            super(CheckpointTest.TestBackend, self).__init__()
+            self.path = path
+            self.executions = 0
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Returns the path to the snapshot file and its layout."""
+            self.executions += 1
+            with open(self.path, "w") as snapshot_file:
+                snapshot_file.write("snapshot")
+            return [[(self.path, (10, [(0, 10)]))]]
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Returns the layout of the files of the new dataframe"""
+            return kwargs["file_layouts"]
+
+    def setUp(self):
+        """Create a temporary directory for the checkpoints"""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the checkpoints"""
+        shutil.rmtree(self.directory)
+
+    def checkpoint(self, expression):
+        """
+        Materializes a dataset with a defined column and returns the layouts
+        of its files and the number of executions.
+        """
+        hn = Node.HeadNode(10)
+        hn.backend = CheckpointTest.TestBackend(
+            os.path.join(self.directory, "snapshot.root"))
+        hn.backend.npartitions = 2
+        node = Proxy.TransformationProxy(hn).Define("x", expression)
+
+        layouts = node.Checkpoint(self.directory)
+        return layouts, hn.backend.executions
+
+    def test_checkpoint_reused(self):
+        """The dataset is only written the first time"""
+        layouts, executions = self.checkpoint("1")
+        self.assertEqual(executions, 1)
+        self.assertEqual(len(layouts), 1)
+
+        new_layouts, executions = self.checkpoint("1")
+        self.assertEqual(executions, 0)
+        self.assertDictEqual(new_layouts, layouts)
+
+    def test_checkpoint_invalidated(self):
+        """Different operations or modified files are written again"""
+        self.checkpoint("1")
+
+        _, executions = self.checkpoint("2")
+        self.assertEqual(executions, 1)
+
+        os.utime(os.path.join(self.directory, "snapshot.root"), (1, 1))
+        _, executions = self.checkpoint("1")
+        self.assertEqual(executions, 1)
@@ -0,0 +1,77 @@
+import unittest
+
+import numpy
+import ROOT
+from PyRDF.Backends import Histograms
+
+
+class HistogramArraysTest(unittest.TestCase):
+    """Check the merge of histograms through numpy arrays"""
+
+    def create_arrays(self, contents, sumw2=None, axes=None):
+        """Creates a one dimensional histogram with three bins"""
+        if axes is None:
+            axes = [(3, 0.0, 3.0, None)]
+        return Histograms.HistogramArrays(
+            "TH1D", "h", "h", axes,
+            numpy.array(contents, dtype=float),
+            None if sumw2 is None else numpy.array(sumw2, dtype=float),
+            numpy.ones(Histograms.NSTATS), sum(contents))
+
+    def test_merge(self):
+        """Contents, statistics and entries are added"""
+        h1 = self.create_arrays([0, 1, 2, 3, 0])
+        h2 = self.create_arrays([1, 1, 1, 1, 1])
+
+        h1.merge(h2)
+
+        numpy.testing.assert_array_equal(h1.contents, [1, 2, 3, 4, 1])
+        numpy.testing.assert_array_equal(h1.stats,
+                                         2 * numpy.ones(Histograms.NSTATS))
+        self.assertEqual(h1.entries, 11)
+        self.assertIsNone(h1.sumw2)
+
+    def test_merge_sumw2(self):
+        """Missing squares of weights are taken from the contents"""
+        h1 = self.create_arrays([0, 1, 2, 3, 0])
+        h2 = self.create_arrays([1, 1, 1, 1, 1], sumw2=[4, 4, 4, 4, 4])
+
+        h1.merge(h2)
+
+        numpy.testing.assert_array_equal(h1.sumw2, [4, 5, 6, 7, 4])
+
+    def test_different_binning(self):
+        """Histograms with different binning cannot be merged"""
+        h1 = self.create_arrays([0, 1, 2, 3, 0])
+        h2 = self.create_arrays([0, 1, 2, 3, 0], axes=[(3, 0.0, 6.0, None)])
+
+        with self.assertRaises(ValueError):
+            h1.merge(h2)
+
+    def test_roundtrip(self):
+        """Histograms are rebuilt with the same binning and content"""
+        h = ROOT.TH1D("roundtrip", "roundtrip", 4, 0, 4)
+        h.SetDirectory(0)
+        for value in (0.5, 1.5, 1.5, 3.5, 10):
+            h.Fill(value)
+
+        h1 = Histograms.from_histogram(h)
+        h2 = Histograms.from_histogram(h)
+        h1.merge(h2)
+        merged = h1.GetValue()
+
+        self.assertEqual(merged.GetNbinsX(), 4)
+        self.assertEqual(merged.GetBinContent(2), 4)
+        self.assertEqual(merged.GetBinContent(5), 2)
+        self.assertEqual(merged.GetEntries(), 10)
+        self.assertAlmostEqual(merged.GetMean(), h.GetMean())
+
+    def test_merge_values_same_binning(self):
+        """Histograms with the same binning are added with numpy"""
+        h1 = self.create_arrays([0, 1, 2, 3, 0])
+        h2 = self.create_arrays([1, 1, 1, 1, 1])
+
+        merged = Histograms.merge_values(h1, h2)
+
+        self.assertIs(merged, h1)
+        numpy.testing.assert_array_equal(merged.contents, [1, 2, 3, 4, 1])
@@ -0,0 +1,132 @@
+import io
+import unittest
+
+from PyRDF import Node
+from PyRDF.Backends import Dist
+from PyRDF.Backends import Progress
+
+
+class ProgressReportTest(unittest.TestCase):
+    """Check the figures derived from the reports of the workers"""
+
+    def test_throughput_and_eta(self):
+        """Rates are computed since the start of the execution"""
+        stats = Progress.RangeStats(2, 300, 6e6, 5.0)
+        report = Progress.ProgressReport(stats, 4, 1200, 3.0)
+
+        self.assertFalse(report.done)
+        self.assertEqual(report.fraction, 0.25)
+        self.assertEqual(report.events_per_second, 100)
+        self.assertEqual(report.bytes_per_second, 2e6)
+        self.assertEqual(report.eta, 9)
+
+    def test_no_entries_processed(self):
+        """The time left is unknown before the first range"""
+        report = Progress.ProgressReport(Progress.EMPTY_STATS, 4, 1200, 0.0)
+
+        self.assertIsNone(report.eta)
+        self.assertEqual(report.events_per_second, 0)
+
+    def test_text_progress_bar(self):
+        """The bar is rewritten in place and ends the line when done"""
+        stream = io.StringIO()
+        bar = Progress.TextProgressBar(stream, width=4)
+
+        bar(Progress.ProgressReport(Progress.RangeStats(1, 10, 0, 1.0),
+                                    2, 20, 2.0))
+        bar(Progress.ProgressReport(Progress.RangeStats(2, 20, 0, 2.0),
+                                    2, 20, 4.0))
+
+        self.assertEqual(stream.getvalue(),
+                         "\r[##..] 1/2 ranges, 5 events/s, 0 MB/s, "
+                         "ETA 0:00:02"
+                         "\r[####] 2/2 ranges, 5 events/s, 0 MB/s, "
+                         "ETA 0:00:00\n")
+
+
+class MonitorTest(unittest.TestCase):
+    """Check the figures sent by the mappers"""
+
+    class TestBackend(Dist.DistBackend):
+        """Dummy backend running the mapper on every range."""
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Runs the mapper and the reducer sequentially."""
+            values = [mapper(current_range)
+                      for current_range in self.build_ranges()]
+            self.nsubmissions += 1
+            merged = values[0]
+            for range_values in values[1:]:
+                merged = reducer(merged, range_values)
+            return merged
+
+        def ProcessAndIterate(self, mapper, ordered=True):
+            """Runs the mapper sequentially and yields its results."""
+            for current_range in self.build_ranges():
+                yield mapper(current_range)
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def test_monitored_mapper(self):
+        """Every range adds its entries to the accumulator"""
+        accumulator = Progress.LocalAccumulator()
+        mapper = Progress.monitor_mapper(lambda r: [r], accumulator,
+                                         lambda r: r * 10)
+
+        self.assertListEqual(mapper(2), [2])
+        mapper(3)
+
+        self.assertEqual(accumulator.value.ranges, 2)
+        self.assertEqual(accumulator.value.entries, 50)
+
+    def test_progress_reported(self):
+        """Callbacks receive the progress of the execution"""
+        hn = Node.HeadNode(10)
+        backend = MonitorTest.TestBackend()
+        backend.npartitions = 2
+        backend.nsubmissions = 0
+        backend._load_dataset_info(hn)
+
+        reports = []
+        backend.progress_callback = reports.append
+
+        values = backend._process_and_merge(
+            lambda r: [r.end - r.start],
+            lambda out, value_in: [out[0] + value_in[0]])
+
+        self.assertListEqual(values, [10])
+        self.assertEqual(backend.nsubmissions, 1)
+        self.assertEqual((reports[0].completed_ranges, reports[0].entries),
+                         (0, 0))
+        self.assertEqual((reports[-1].completed_ranges,
+                          reports[-1].total_ranges,
+                          reports[-1].entries, reports[-1].total_entries),
+                         (2, 2, 10, 10))
+        self.assertTrue(reports[-1].done)
+
+    def test_progressive_progress_reported(self):
+        """Progress is reported when values are merged progressively"""
+        hn = Node.HeadNode(10)
+        backend = MonitorTest.TestBackend()
+        backend.npartitions = 2
+        backend._load_dataset_info(hn)
+
+        reports = []
+        backend.progress_callback = reports.append
+
+        values = backend._process_progressively(
+            [], lambda r: [r.end - r.start],
+            lambda out, value_in: [out[0] + value_in[0]])
+
+        self.assertListEqual(values, [10])
+        self.assertEqual((reports[-1].completed_ranges, reports[-1].entries),
+                         (2, 10))
+        self.assertTrue(reports[-1].done)
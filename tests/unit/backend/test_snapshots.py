@@ -0,0 +1,163 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from PyRDF import Node
+from PyRDF.Backends import Dist
+from PyRDF.Backends import Snapshots
+
+
+class SnapshotFilesTest(unittest.TestCase):
+    """Check the planning of the merge of partial snapshot files"""
+
+    class TestBackend(Dist.DistBackend):
+        """Dummy backend recording the merge tasks of every round."""
+
+        def __init__(self):
+            super(SnapshotFilesTest.TestBackend, self).__init__()
+            self.rounds = []
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Dummy implementation of ProcessAndMerge."""
+            pass
+
+        def RunTasks(self, function, tasks):
+            """Records the tasks instead of merging the files."""
+            self.rounds.append(tasks)
+            return [(output, None) for _, output, _, _ in tasks]
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def setUp(self):
+        """Create partial snapshot files of different sizes"""
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        for index, size in enumerate([10, 10, 10, 30, 10, 10]):
+            path = os.path.join(self.directory, "snap_{}.root".format(index))
+            with open(path, "wb") as partial_file:
+                partial_file.write(b"x" * size)
+            self.paths.append(path)
+
+    def tearDown(self):
+        """Remove the partial files"""
+        shutil.rmtree(self.directory)
+
+    def get_range_files(self):
+        """Returns the partial files keyed by range, like the reducer"""
+        return {(index,): [(path, None)]
+                for index, path in enumerate(self.paths)}
+
+    def test_compression_setting(self):
+        """Algorithms are combined with levels like in ROOT"""
+        self.assertEqual(Snapshots.get_compression_setting("ZSTD", 5), 505)
+        self.assertEqual(Snapshots.get_compression_setting("zlib", None), 101)
+        self.assertIsNone(Snapshots.get_compression_setting(None, None))
+        with self.assertRaises(ValueError):
+            Snapshots.get_compression_setting("unknown", 1)
+
+    def test_compression_level_without_algorithm(self):
+        """A level alone applies to the default algorithm of ROOT"""
+        self.assertEqual(Snapshots.get_compression_setting(None, 5), 5)
+        self.assertEqual(Snapshots.get_compression_setting(None, 0), 0)
+
+    def test_group_files(self):
+        """Consecutive files are grouped by size"""
+        groups = Snapshots.group_files(self.paths, [10, 10, 10, 30, 10, 10],
+                                       2)
+
+        self.assertListEqual(groups, [self.paths[:3], self.paths[3:]])
+
+    def test_no_merge(self):
+        """Partial files are kept if no merge is requested"""
+        backend = SnapshotFilesTest.TestBackend()
+
+        files = [(path, None) for path in self.paths]
+
+        self.assertListEqual(
+            backend._merge_snapshot_files("tree", "snap.root",
+                                          self.get_range_files()), files)
+        self.assertListEqual(backend.rounds, [])
+
+    def test_files_in_range_order(self):
+        """Files are grouped in the order of the ranges, not of arrival"""
+        backend = SnapshotFilesTest.TestBackend()
+        backend.snapshot_nfiles = 2
+
+        range_files = self.get_range_files()
+        shuffled = {key: range_files[key]
+                    for key in sorted(range_files, reverse=True)}
+        backend._merge_snapshot_files("tree", "snap.root", shuffled)
+
+        self.assertListEqual(backend.rounds, [
+            [(self.paths[:3], "snap_0.root", None, "tree"),
+             (self.paths[3:], "snap_1.root", None, "tree")]])
+
+    def test_merge_rounds(self):
+        """Large groups are merged in several rounds"""
+        backend = SnapshotFilesTest.TestBackend()
+        backend.snapshot_file_size = 1000
+        backend.snapshot_merge_batch_size = 4
+        backend.snapshot_compression_algorithm = "lz4"
+        backend.snapshot_compression_level = 4
+
+        files = backend._merge_snapshot_files(
+            "tree", "snap.root", self.get_range_files())
+
+        self.assertListEqual(files, [("snap.root", None)])
+        self.assertListEqual(backend.rounds, [
+            [(self.paths[:4], "snap_0_merge0_0.root", 404, None),
+             (self.paths[4:], "snap_0_merge0_1.root", 404, None)],
+            [(["snap_0_merge0_0.root", "snap_0_merge0_1.root"], "snap.root",
+              404, "tree")]
+        ])
+
+    def test_merge_into_files(self):
+        """The requested number of files is written"""
+        backend = SnapshotFilesTest.TestBackend()
+        backend.snapshot_nfiles = 2
+
+        files = backend._merge_snapshot_files(
+            "tree", "snap.root", self.get_range_files())
+
+        self.assertListEqual([path for path, _ in files],
+                             ["snap_0.root", "snap_1.root"])
+        self.assertEqual(len(backend.rounds), 1)
+
+
+class FileLayoutTest(unittest.TestCase):
+    """Check that known file layouts are used instead of opening files"""
+
+    def setUp(self):
+        """Describe two files that do not exist"""
+        self.layouts = {
+            "a.root": Snapshots.FileLayout(10, [(0, 6), (6, 10)]),
+            "b.root": Snapshots.FileLayout(5, [(0, 5)])
+        }
+
+    def test_num_entries(self):
+        """The entries of the dataset are the sum of the known entries"""
+        hn = Node.HeadNode("tree", ["a.root", "b.root"])
+        hn.file_layouts = self.layouts
+
+        self.assertEqual(hn.get_num_entries(), 15)
+
+    def test_clusters(self):
+        """Clusters are shifted by the entries of the previous files"""
+        backend = SnapshotFilesTest.TestBackend()
+        backend.file_layouts = self.layouts
+
+        clusters = backend.get_clusters("tree", ["a.root", "b.root"])
+
+        self.assertListEqual(
+            [(cluster.start, cluster.end, cluster.offset)
+             for cluster in clusters],
+            [(0, 6, 0), (6, 10, 0), (10, 15, 10)])
@@ -0,0 +1,123 @@
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+from PyRDF import DataFrame
+from PyRDF.Backends import Dist
+from PyRDF.Backends import Spill
+
+
+def reducer(values_out, values_in):
+    """Adds the numpy arrays of two lists of values"""
+    return [value_out + value_in
+            for value_out, value_in in zip(values_out, values_in)]
+
+
+class SpillReducerTest(unittest.TestCase):
+    """Check the spilling of merged values to disk"""
+
+    def setUp(self):
+        """Create a temporary directory for the spilled values"""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        shutil.rmtree(self.directory)
+
+    def create_values(self, nranges):
+        """Creates the values of two actions for every range"""
+        return [[numpy.full(10, i), numpy.full(100, 2 * i)]
+                for i in range(nranges)]
+
+    def test_estimate_size(self):
+        """The size of numpy arrays is taken into account"""
+        values = self.create_values(1)[0]
+        self.assertEqual(Spill.estimate_size(values), 110 * 8)
+        self.assertEqual(Spill.estimate_size({"x": values[0]}), 10 * 8)
+
+    def test_values_within_budget(self):
+        """Values smaller than the budget are kept in memory"""
+        spilling_reducer = Spill.spill_reducer(reducer, self.directory,
+                                               memory_budget=10000)
+
+        values = functools.reduce(spilling_reducer, self.create_values(4))
+
+        self.assertIsInstance(values, list)
+        self.assertListEqual(os.listdir(self.directory), [])
+
+    def test_values_spilled(self):
+        """Values larger than the budget are merged from disk"""
+        spilling_reducer = Spill.spill_reducer(reducer, self.directory,
+                                               memory_budget=100)
+
+        spilled = functools.reduce(spilling_reducer, self.create_values(10))
+        self.assertIsInstance(spilled, Spill.SpilledValues)
+        self.assertEqual(len(spilled.paths), 10)
+
+        values = Spill.merge_files(spilled, reducer, self.directory,
+                                   batch_size=2)
+
+        numpy.testing.assert_array_equal(values[0], numpy.full(10, 45))
+        numpy.testing.assert_array_equal(values[1], numpy.full(100, 90))
+        self.assertListEqual(os.listdir(self.directory), [])
+
+    def test_size_checked_before_merge(self):
+        """Values are spilled instead of being merged above the budget"""
+        merged = []
+
+        def recording_reducer(values_out, values_in):
+            merged.append(values_in)
+            return reducer(values_out, values_in)
+
+        spilling_reducer = Spill.spill_reducer(recording_reducer,
+                                               self.directory,
+                                               memory_budget=1000)
+        values = self.create_values(2)
+
+        spilled = spilling_reducer(values[0], values[1])
+
+        self.assertIsInstance(spilled, Spill.SpilledValues)
+        self.assertListEqual(merged, [])
+
+
+class SpillDirTest(unittest.TestCase):
+    """Check that spilled values are written to a shared directory"""
+
+    class TestBackend(Dist.DistBackend):
+        """Dummy backend."""
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Dummy implementation of ProcessAndMerge."""
+            pass
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_files. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def test_spill_dir_required(self):
+        """A memory budget without spill directory is an error"""
+        backend = SpillDirTest.TestBackend()
+        backend.reduce_memory_budget = 1000
+
+        with self.assertRaises(ValueError):
+            backend._map_and_reduce(None, reducer)
+
+    def test_merge_batch_size_validated(self):
+        """Batches of less than two files would never be merged"""
+        for batch_size in (-1, 0, 1):
+            with self.assertRaises(ValueError):
+                DataFrame.DistDataFrame(SpillDirTest.TestBackend(), 10,
+                                        spill_merge_batch_size=batch_size)
+
+        rdf = DataFrame.DistDataFrame(SpillDirTest.TestBackend(), 10,
+                                      spill_merge_batch_size=2)
+        self.assertEqual(rdf._headnode.backend.spill_merge_batch_size, 2)
@@ -115,3 +115,65 @@ class CallableGeneratorTest(unittest.TestCase):
         self.assertEqual(t.ord_list, reqd_order)
         self.assertListEqual(nodes, [n4.proxied_node])
         self.assertListEqual(values, [t])
+
+    def test_mapper_with_lazy_asnumpy(self):
+        """
+        Lazy AsNumpy results are retrieved once all the actions of the graph
+        have been booked.
+        """
+        class AsNumpyResult(object):
+            """Mock of the result of a lazy AsNumpy call"""
+
+            def __init__(self, rdf):
+                self.rdf = rdf
+
+            def GetValue(self):
+                self.rdf.ord_list.append(5)
+                return {"x": [1, 2, 3]}
+
+        class TempAsNumpy(CallableGeneratorTest.Temp):
+            """Mock RDF object supporting lazy AsNumpy"""
+
+            def AsNumpy(self, columns, lazy=False):
+                self.ord_list.append(4)
+                return AsNumpyResult(self)
+
+        t = TempAsNumpy()
+
+        hn = Node.HeadNode(1)
+        hn.backend = CallableGeneratorTest.TestBackend()
+        node = Proxy.TransformationProxy(hn)
+
+        n1 = node.Define().AsNumpy(["x"], lazy=True)
+        n2 = node.Count()
+
+        generator = CallableGenerator.CallableGenerator(node.proxied_node)
+        values = generator.get_callable()(t)
+        nodes = generator.get_action_nodes()
+
+        reqd_order = [1, 4, 3, 5]
+
+        self.assertEqual(t.ord_list, reqd_order)
+        self.assertListEqual(nodes, [n1.proxied_node, n2.proxied_node])
+        self.assertListEqual(values, [{"x": [1, 2, 3]}, t])
+
+    def test_pyroot_nodes_cleared(self):
+        """
+        The PyROOT objects are not kept in the graph once it has been
+        processed, only the results are returned.
+        """
+        t = CallableGeneratorTest.Temp()
+
+        hn = Node.HeadNode(1)
+        hn.backend = CallableGeneratorTest.TestBackend()
+        node = Proxy.TransformationProxy(hn)
+
+        n1 = node.Define()
+        n2 = n1.Filter().Count()
+
+        generator = CallableGenerator.CallableGenerator(node.proxied_node)
+        values = generator.get_callable()(t)
+
+        self.assertListEqual(values, [t])
+        self.assertIsNone(n1.proxied_node.pyroot_node)
+        self.assertIsNone(n2.proxied_node.pyroot_node)
@@ -0,0 +1,254 @@
+import unittest
+from unittest import mock
+
+from PyRDF import CallableGenerator, GraphOptimizer, Node, Proxy
+from PyRDF.Backends import Dist
+
+
+class TestBackend(Dist.DistBackend):
+    """Dummy backend."""
+
+    def ProcessAndMerge(self, mapper, reducer):
+        """
+        Dummy implementation of ProcessAndMerge. Returns one mock value per
+        action node found in the graph.
+        """
+        class DummyValue(object):
+            """Dummy value providing a `GetValue` method."""
+
+            def __init__(self, value):
+                self.value = value
+
+            def GetValue(self):
+                return self.value
+
+        return [DummyValue(i + 1) for i in range(self.nactions)]
+
+    def distribute_unique_paths(self, includes_list):
+        """
+        Dummy implementation of distribute_files. Does nothing.
+        """
+        pass
+
+    def make_dataframe(self, *args, **kwargs):
+        """Dummy make_dataframe"""
+        pass
+
+
+class Temp(object):
+    """A Class for mocking RDF CPP object."""
+
+    def __init__(self):
+        """
+        Creates a mock instance. Each mock method adds the name of the
+        operation and its arguments to `ord_list`.
+        """
+        self.ord_list = []
+
+    def Define(self, *args):
+        """Mock Define method"""
+        self.ord_list.append(("Define",) + args)
+        return self
+
+    def Filter(self, *args):
+        """Mock Filter method"""
+        self.ord_list.append(("Filter",) + args)
+        return self
+
+    def Count(self, *args):
+        """Mock Count method"""
+        self.ord_list.append(("Count",) + args)
+        return self
+
+
+class MergeCommonNodesTest(unittest.TestCase):
+    """Check the common subexpression elimination pass"""
+
+    def create_proxy(self):
+        """Creates the head node of a graph and its proxy"""
+        hn = Node.HeadNode(1)
+        hn.backend = TestBackend()
+        return Proxy.TransformationProxy(hn)
+
+    def test_identical_siblings_merged(self):
+        """Identical transformations and their subtrees run only once"""
+        node = self.create_proxy()
+
+        n1 = node.Filter("x > 1").Count()
+        n2 = node.Filter("x > 1").Count()
+        n3 = node.Filter("x > 2").Count()
+
+        GraphOptimizer.merge_common_nodes(node.proxied_node)
+
+        t = Temp()
+        generator = CallableGenerator.CallableGenerator(node.proxied_node)
+        generator.get_callable()(t)
+        nodes = generator.get_action_nodes()
+
+        reqd_order = [("Filter", "x > 1"), ("Count",),
+                      ("Filter", "x > 2"), ("Count",)]
+
+        self.assertListEqual(t.ord_list, reqd_order)
+        self.assertListEqual(nodes, [n1.proxied_node, n3.proxied_node])
+        self.assertListEqual(n1.proxied_node.merged_nodes, [n2.proxied_node])
+
+    def test_different_arguments_not_merged(self):
+        """Siblings that differ in some argument are kept separate"""
+        node = self.create_proxy()
+
+        node.Define("x", "1").Count()
+        node.Define("x", "2").Count()
+        node.Define("y", "1").Count()
+
+        GraphOptimizer.merge_common_nodes(node.proxied_node)
+
+        self.assertEqual(len(node.proxied_node.children), 3)
+
+    def test_children_booked_after_merge(self):
+        """Operations booked on a merged node are added to the graph"""
+        node = self.create_proxy()
+
+        f1 = node.Filter("x > 1")
+        f2 = node.Filter("x > 1")
+        c1 = f1.Count()  # noqa: avoid PEP8 F841
+
+        GraphOptimizer.merge_common_nodes(node.proxied_node)
+        c2 = f2.Define("y", "x").Count()
+
+        generator = CallableGenerator.CallableGenerator(node.proxied_node)
+        self.assertIn(c2.proxied_node, generator.get_action_nodes())
+
+    def test_merged_actions_share_value(self):
+        """Every proxy of a merged action gets the shared result"""
+        node = self.create_proxy()
+        backend = node.proxied_node.backend
+        backend.nactions = 1
+
+        c1 = node.Filter("x > 1").Count()
+        c2 = node.Filter("x > 1").Count()
+
+        self.assertEqual(c2.GetValue(), 1)
+        self.assertEqual(c1.GetValue(), 1)
+
+    def test_action_booked_after_execution(self):
+        """An action identical to a computed one gets its own value"""
+        node = self.create_proxy()
+        backend = node.proxied_node.backend
+        backend.nactions = 1
+
+        c1 = node.Count()
+        self.assertEqual(c1.GetValue(), 1)
+
+        c2 = node.Count()
+        self.assertEqual(c2.GetValue(), 1)
+        self.assertListEqual(c1.proxied_node.merged_nodes, [])
+        self.assertListEqual(node.proxied_node.children, [c2.proxied_node])
+
+    def test_merged_node_references(self):
+        """A node stays in the graph while merged nodes are referenced"""
+        node = self.create_proxy()
+
+        c1 = node.Count()
+        c2 = node.Count()
+
+        GraphOptimizer.merge_common_nodes(node.proxied_node)
+        c1 = None  # noqa: avoid PEP8 F841
+        node.proxied_node.graph_prune()
+
+        self.assertListEqual(node.proxied_node.children[0].merged_nodes,
+                             [c2.proxied_node])
+
+
+class FilterFusionTest(unittest.TestCase):
+    """Check fusion and reordering of chains of filters"""
+
+    def create_proxy(self):
+        """Creates the head node of a graph and its proxy"""
+        hn = Node.HeadNode(1)
+        hn.backend = TestBackend()
+        return Proxy.TransformationProxy(hn)
+
+    def run_mapper(self, node, **kwargs):
+        """Runs the callable of the graph on a mock RDF object"""
+        t = Temp()
+        generator = CallableGenerator.CallableGenerator(node.proxied_node)
+        generator.get_callable(**kwargs)(t)
+        return t.ord_list
+
+    def test_consecutive_filters_fused(self):
+        """Consecutive filters run as a single filter"""
+        node = self.create_proxy()
+        f = node.Filter("x > 1").Filter("y > 2").Filter("z > 3")
+        c = f.Count()  # noqa: avoid PEP8 F841
+
+        ord_list = self.run_mapper(node, fuse_filters=True)
+
+        reqd_order = [("Filter", "(x > 1) && (y > 2) && (z > 3)"), ("Count",)]
+        self.assertListEqual(ord_list, reqd_order)
+
+    def test_action_between_filters(self):
+        """Filters are not fused across nodes with several children"""
+        node = self.create_proxy()
+        f1 = node.Filter("x > 1")
+        c1 = f1.Count()  # noqa: avoid PEP8 F841
+        f2 = f1.Filter("y > 2").Filter("z > 3")
+        c2 = f2.Count()  # noqa: avoid PEP8 F841
+
+        ord_list = self.run_mapper(node, fuse_filters=True)
+
+        reqd_order = [("Filter", "x > 1"), ("Count",),
+                      ("Filter", "(y > 2) && (z > 3)"), ("Count",)]
+        self.assertListEqual(ord_list, reqd_order)
+
+    def test_named_filters_not_fused(self):
+        """Named filters are kept as they are"""
+        node = self.create_proxy()
+        f = node.Filter("x > 1", "cut").Filter("y > 2")
+        c = f.Count()  # noqa: avoid PEP8 F841
+
+        ord_list = self.run_mapper(node, fuse_filters=True)
+
+        reqd_order = [("Filter", "x > 1", "cut"), ("Filter", "y > 2"),
+                      ("Count",)]
+        self.assertListEqual(ord_list, reqd_order)
+
+    def test_filters_reordered_by_selectivity(self):
+        """The most selective filters are evaluated first"""
+        node = self.create_proxy()
+        f = node.Filter("x > 1").Filter("y > 2").Filter("z > 3")
+        c = f.Count()  # noqa: avoid PEP8 F841
+
+        selectivity = {"x > 1": 0.9, "y > 2": 0.1, "z > 3": 0.5}
+        ord_list = self.run_mapper(node, fuse_filters=True,
+                                   filter_selectivity=selectivity)
+
+        reqd_order = [("Filter", "(y > 2) && (z > 3) && (x > 1)"), ("Count",)]
+        self.assertListEqual(ord_list, reqd_order)
+
+    def test_unknown_selectivity_keeps_order(self):
+        """Chains with unmeasured filters keep the user order"""
+        node = self.create_proxy()
+        f = node.Filter("x > 1").Filter("y > 2")
+        c = f.Count()  # noqa: avoid PEP8 F841
+
+        ord_list = self.run_mapper(node, fuse_filters=True,
+                                   filter_selectivity={"y > 2": 0.1})
+
+        reqd_order = [("Filter", "(x > 1) && (y > 2)"), ("Count",)]
+        self.assertListEqual(ord_list, reqd_order)
+
+    def test_selectivity_measured_for_fused_filters(self):
+        """Selectivity is only measured when filters are fused"""
+        for fuse_filters in (False, True):
+            node = self.create_proxy()
+            c = node.Filter("x > 1").Filter("y > 2").Count()  # noqa: F841
+            backend = node.proxied_node.backend
+            backend.fuse_filters = fuse_filters
+            backend.reorder_filters = True
+
+            generator = CallableGenerator.CallableGenerator(node.proxied_node)
+            with mock.patch.object(backend,
+                                   "_update_filter_selectivity") as update:
+                backend._prepare_execution(generator)
+
+            self.assertEqual(update.called, fuse_filters)
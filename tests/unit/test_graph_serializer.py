@@ -0,0 +1,134 @@
+import collections
+import pickle
+import unittest
+from unittest import mock
+
+from PyRDF import CallableGenerator, GraphSerializer, Node, Proxy
+from PyRDF.Backends import Dist
+
+
+class TestBackend(Dist.DistBackend):
+    """Dummy backend."""
+
+    def ProcessAndMerge(self, mapper, reducer):
+        """Dummy implementation of ProcessAndMerge."""
+        pass
+
+    def distribute_unique_paths(self, includes_list):
+        """
+        Dummy implementation of distribute_files. Does nothing.
+        """
+        pass
+
+    def make_dataframe(self, *args, **kwargs):
+        """Dummy make_dataframe"""
+        pass
+
+
+def build_graph():
+    """Creates a small PyRDF graph and returns its head node"""
+    hn = Node.HeadNode(1)
+    hn.backend = TestBackend()
+    node = Proxy.TransformationProxy(hn)
+
+    n1 = node.Define("x", "rdfentry_")
+    n2 = n1.Filter("x > 10")
+    n2.Histo1D(("h", "h", 10, 0.0, 100.0), "x")
+    n1.Filter("x > 10", "cut").Histo2D(("h2", "h2", 5, 0, 5, 5, 0, 5),
+                                       "x", "x")
+    return hn
+
+
+class GraphSerializerTest(unittest.TestCase):
+    """Check the compact serialization of PyRDF graphs"""
+
+    def assertGraphs(self, node1, node2):
+        """Asserts that two graphs hold the same operations"""
+        self.assertEqual(len(node1.children), len(node2.children))
+
+        if not node1.operation:
+            self.assertIsNone(node2.operation)
+        else:
+            self.assertEqual(node1.operation.name, node2.operation.name)
+            self.assertEqual(node1.operation.args, node2.operation.args)
+            self.assertEqual(node1.operation.kwargs, node2.operation.kwargs)
+
+        for child1, child2 in zip(node1.children, node2.children):
+            self.assertGraphs(child1, child2)
+
+    def test_round_trip(self):
+        """A deserialized graph has the same operations as the original"""
+        hn = build_graph()
+
+        payload = GraphSerializer.serialize(hn)
+        new_hn = GraphSerializer.deserialize(payload)
+
+        self.assertGraphs(hn, new_hn)
+
+    def test_string_table(self):
+        """Repeated strings are stored only once in the table"""
+        hn = build_graph()
+
+        version, strings, nodes = GraphSerializer.encode(hn)
+
+        self.assertEqual(version, GraphSerializer.GRAPH_FORMAT_VERSION)
+        self.assertEqual(strings.count("x > 10"), 1)
+        self.assertEqual(strings.count("x"), 1)
+        self.assertEqual(len(nodes), 6)
+
+    def test_content_hash(self):
+        """Equal graphs have the same hash, different graphs do not"""
+        hash1 = GraphSerializer.content_hash(
+            GraphSerializer.serialize(build_graph()))
+        hash2 = GraphSerializer.content_hash(
+            GraphSerializer.serialize(build_graph()))
+
+        hn = build_graph()
+        Proxy.TransformationProxy(hn).Count()
+        hash3 = GraphSerializer.content_hash(GraphSerializer.serialize(hn))
+
+        self.assertEqual(hash1, hash2)
+        self.assertNotEqual(hash1, hash3)
+
+    def test_version_mismatch(self):
+        """Payloads of an unknown format version are rejected"""
+        payload = pickle.dumps((GraphSerializer.GRAPH_FORMAT_VERSION + 1,
+                                (), ()))
+
+        with self.assertRaises(ValueError):
+            GraphSerializer.deserialize(payload)
+
+    def test_generator_pickle_reuses_graph(self):
+        """Unpickled generators share the graph if its hash was seen before"""
+        generator = CallableGenerator.CallableGenerator(build_graph())
+        pickled_generator = pickle.dumps(generator)
+
+        unpickled_1 = pickle.loads(pickled_generator)
+        unpickled_2 = pickle.loads(pickled_generator)
+
+        self.assertGraphs(generator.head_node, unpickled_1.head_node)
+        self.assertIs(unpickled_1.head_node, unpickled_2.head_node)
+
+    @mock.patch.object(CallableGenerator, "_GRAPH_CACHE_SIZE", 2)
+    @mock.patch.object(CallableGenerator, "_graph_cache",
+                       collections.OrderedDict())
+    def test_generator_cache_least_recently_used(self):
+        """The graph used the longest time ago is dropped from the cache"""
+        pickled_generators = []
+        for cut in ("x > 1", "x > 2", "x > 3"):
+            hn = Node.HeadNode(1)
+            hn.backend = TestBackend()
+            Proxy.TransformationProxy(hn).Filter(cut).Count()
+            pickled_generators.append(
+                pickle.dumps(CallableGenerator.CallableGenerator(hn)))
+
+        first = pickle.loads(pickled_generators[0])
+        second = pickle.loads(pickled_generators[1])
+        # Using the first graph again makes the second one the oldest
+        pickle.loads(pickled_generators[0])
+        pickle.loads(pickled_generators[2])
+
+        self.assertIs(pickle.loads(pickled_generators[0]).head_node,
+                      first.head_node)
+        self.assertIsNot(pickle.loads(pickled_generators[1]).head_node,
+                         second.head_node)
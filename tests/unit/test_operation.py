@@ -15,6 +15,32 @@ class ClassifyTest(unittest.TestCase):
         op = Operation("Snapshot")
         self.assertEqual(op.op_type, Operation.Types.INSTANT_ACTION)
 
+    def test_lazy_snapshot(self):
+        """Lazy snapshots are classified as actions."""
+        class SnapshotOptions(object):
+            """Mock of RSnapshotOptions"""
+            def __init__(self, lazy):
+                self.fLazy = lazy
+
+        op = Operation("Snapshot", "tree", "file.root", [],
+                       SnapshotOptions(True))
+        self.assertEqual(op.op_type, Operation.Types.ACTION)
+
+        op = Operation("Snapshot", "tree", "file.root",
+                       options=SnapshotOptions(False))
+        self.assertEqual(op.op_type, Operation.Types.INSTANT_ACTION)
+
+    def test_lazy_asnumpy(self):
+        """Lazy AsNumpy operations are classified as actions."""
+        op = Operation("AsNumpy", ["x"], lazy=True)
+        self.assertEqual(op.op_type, Operation.Types.ACTION)
+
+        op = Operation("AsNumpy", ["x"])
+        self.assertEqual(op.op_type, Operation.Types.INSTANT_ACTION)
+
+        op = Operation("AsNumpy", ["x"], lazy=True, distributed=True)
+        self.assertEqual(op.op_type, Operation.Types.INSTANT_ACTION)
+
     def test_transformation(self):
         """Transformation nodes are classified accurately."""
         op = Operation("Define", "c1")
@@ -0,0 +1,174 @@
+import unittest
+
+from PyRDF import CallableGenerator, Node, Profiler, Proxy
+from PyRDF.Backends import Dist
+
+
+class ProfilerTest(unittest.TestCase):
+    """Check the profiling of the transformations of a graph"""
+
+    class TestBackend(Dist.DistBackend):
+        """Dummy backend."""
+
+        def ProcessAndMerge(self, mapper, reducer):
+            """Dummy implementation of ProcessAndMerge."""
+            pass
+
+        def distribute_unique_paths(self, includes_list):
+            """
+            Dummy implementation of distribute_unique_paths. Does nothing.
+            """
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    class Temp(object):
+        """A Class for mocking RDF CPP object, recording the operations."""
+
+        def __init__(self, operations=None):
+            """Creates a mock node sharing the list of operations."""
+            self.operations = operations if operations is not None else []
+
+        def Define(self, *args):
+            """Mock Define method"""
+            self.operations.append(("Define", args))
+            return ProfilerTest.Temp(self.operations)
+
+        def Filter(self, *args):
+            """Mock Filter method"""
+            self.operations.append(("Filter", args))
+            return ProfilerTest.Temp(self.operations)
+
+        def Count(self):
+            """Mock Count method"""
+            self.operations.append(("Count", ()))
+            return ProfilerTest.Temp(self.operations)
+
+    def create_graph(self):
+        """Creates a graph with two branches of transformations"""
+        hn = Node.HeadNode(1)
+        hn.backend = ProfilerTest.TestBackend()
+        node = Proxy.TransformationProxy(hn)
+        filtered = node.Filter("x > 0").Filter("y > 0")
+        self.count = filtered.Count()
+        self.defined = node.Define("z", "x * 2")
+        self.count_defined = self.defined.Count()
+        return node
+
+    def test_profiled_nodes_order(self):
+        """Transformations are collected depth first"""
+        node = self.create_graph()
+
+        nodes = Profiler.get_profiled_nodes(node.proxied_node)
+
+        self.assertListEqual([n.operation.args[0] for n in nodes],
+                             ["x > 0", "y > 0", "z"])
+
+    def test_expressions_wrapped(self):
+        """Expressions are timed and entries are counted, without fusion"""
+        node = self.create_graph()
+        generator = CallableGenerator.CallableGenerator(node.proxied_node)
+        mapper = generator.get_callable(fuse_filters=True)
+        rdf = ProfilerTest.Temp()
+
+        profile_counts = []
+        mapper(rdf, profile_counts=profile_counts)
+
+        self.assertEqual(len(profile_counts), 3)
+        self.assertListEqual(
+            [args for name, args in rdf.operations if name != "Count"],
+            [(Profiler.wrap_expression(0, "x > 0"),),
+             (Profiler.wrap_expression(1, "y > 0"),),
+             ("z", Profiler.wrap_expression(2, "x * 2"))])
+
+    def test_wrap_expression(self):
+        """The wrapped expression has no return statement"""
+        self.assertEqual(Profiler.wrap_expression(3, "x > 0"),
+                         "((void)PyRDF::Profiler::Timer(3), (x > 0))")
+
+    def test_merge_and_report(self):
+        """Profiles of the ranges are added and shown per transformation"""
+        node = self.create_graph()
+        backend = node.proxied_node.backend
+        backend.profile = True
+
+        profile = Profiler.GraphProfile([Profiler.NodeProfile(10, 20, 1.0),
+                                         Profiler.NodeProfile(5, 10, 0.5),
+                                         Profiler.NodeProfile(20, 5, 0.25)])
+        profile.merge(Profiler.GraphProfile([
+            Profiler.NodeProfile(1, 2, 1.0),
+            Profiler.NodeProfile(1, 1, 0.5),
+            Profiler.NodeProfile(2, 1, 0.25)]))
+        backend._set_profile(node.proxied_node, profile)
+
+        self.assertEqual(self.defined.proxied_node.profile.entries, 22)
+
+        lines = node.ProfileReport().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[2].startswith("Filter('x > 0')"))
+        self.assertTrue(lines[3].startswith("  Filter('y > 0')"))
+        self.assertListEqual(lines[3].split()[-4:],
+                             ["6", "11", "1.000", "3.000"])
+        self.assertListEqual(lines[4].split()[-4:],
+                             ["22", "6", "0.500", "0.500"])
+
+    def test_profile_not_available(self):
+        """Ranges that were not profiled make the whole profile unavailable"""
+        node = self.create_graph()
+        backend = node.proxied_node.backend
+        backend.profile = True
+
+        profile = Profiler.GraphProfile([Profiler.NodeProfile(10, 20, 1.0),
+                                         Profiler.NodeProfile(5, 10, 0.5),
+                                         Profiler.NodeProfile(20, 5, 0.25)])
+        profile.merge(Profiler.GraphProfile(None))
+        backend._set_profile(node.proxied_node, profile)
+
+        self.assertIsNone(profile.nodes)
+        self.assertIsNone(self.defined.proxied_node.profile)
+
+    def test_statements_not_wrapped(self):
+        """Expressions with statements run as they are and are not timed"""
+        hn = Node.HeadNode(1)
+        hn.backend = ProfilerTest.TestBackend()
+        node = Proxy.TransformationProxy(hn)
+        count = node.Filter("return x > 0;").Define("y", "x * 2").Count()
+        generator = CallableGenerator.CallableGenerator(hn)
+        rdf = ProfilerTest.Temp()
+
+        profile_counts = []
+        generator.get_callable()(rdf, profile_counts=profile_counts)
+
+        self.assertEqual(len(profile_counts), 2)
+        self.assertListEqual(
+            [args for name, args in rdf.operations if name != "Count"],
+            [("return x > 0;",),
+             ("y", Profiler.wrap_expression(1, "x * 2"))])
+        self.assertListEqual(
+            [Profiler.is_timed(n.operation)
+             for n in Profiler.get_profiled_nodes(hn)], [False, True])
+        self.assertListEqual(generator.get_action_nodes(),
+                             [count.proxied_node])
+
+    def test_report_not_timed(self):
+        """Transformations that were not timed only report their entries"""
+        node = self.create_graph()
+        backend = node.proxied_node.backend
+        backend.profile = True
+
+        profile = Profiler.GraphProfile([Profiler.NodeProfile(10, None, None),
+                                         Profiler.NodeProfile(5, 10, 0.5),
+                                         Profiler.NodeProfile(20, 5, 0.25)])
+        profile.merge(Profiler.GraphProfile([
+            Profiler.NodeProfile(1, None, None),
+            Profiler.NodeProfile(1, 1, 0.5),
+            Profiler.NodeProfile(2, 1, 0.25)]))
+        backend._set_profile(node.proxied_node, profile)
+
+        lines = node.ProfileReport().splitlines()
+        self.assertListEqual(lines[2].split()[-4:],
+                             ["11", "-", "-", "0.000"])
+        self.assertListEqual(lines[3].split()[-4:],
+                             ["6", "11", "1.000", "1.000"])
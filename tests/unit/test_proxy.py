@@ -1,3 +1,5 @@
+import concurrent.futures
+import threading
 import unittest
 
 from PyRDF import Node
@@ -201,3 +203,184 @@ class GetValueTests(unittest.TestCase):
         node.value = 5
 
         self.assertEqual(proxy.GetValue(), 5)
+
+
+class GetValueAsyncTests(unittest.TestCase):
+    """Check 'GetValueAsync' instance method in Proxy."""
+    class TestBackend(Base.BaseBackend):
+        """
+        Test backend that sets the value of the action nodes once it is
+        allowed to run, and records the cancelled jobs.
+        """
+
+        def __init__(self):
+            """Creates the events used to control the execution"""
+            self.allow_execution = threading.Event()
+            self.started = threading.Event()
+            self.cancelled_jobs = []
+            self.executions = 0
+
+        def execute(self, generator):
+            """Sets a value to every action node"""
+            self.started.set()
+            self.allow_execution.wait(10)
+            self.executions += 1
+            for node in generator.get_action_nodes():
+                node.value = 42
+
+        def cancel_job(self, job_id):
+            """Records the cancelled job"""
+            self.cancelled_jobs.append(job_id)
+
+        def distribute_files(self, includes_list):
+            """do nothing"""
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def create_action(self):
+        """Creates a graph with one action and returns its proxy"""
+        hn = Node.HeadNode(1)
+        hn.backend = GetValueAsyncTests.TestBackend()
+        return Proxy.TransformationProxy(hn).Count()
+
+    def test_result(self):
+        """The future holds the value of the action"""
+        count = self.create_action()
+        backend = count.proxied_node.get_head().backend
+        backend.allow_execution.set()
+
+        future = count.GetValueAsync()
+
+        self.assertEqual(future.result(timeout=10), 42)
+        self.assertEqual(count.GetValue(), 42)
+        self.assertEqual(backend.executions, 1)
+
+    def test_cancel(self):
+        """A running future can be cancelled, which cancels its job"""
+        count = self.create_action()
+        backend = count.proxied_node.get_head().backend
+
+        future = count.GetValueAsync()
+        backend.started.wait(10)
+
+        self.assertTrue(future.running())
+        self.assertTrue(future.cancel())
+        self.assertTrue(future.cancelled())
+        self.assertListEqual(backend.cancelled_jobs, [future.job_id])
+
+        # The result computed afterwards is discarded
+        backend.allow_execution.set()
+        self.assertEqual(count.GetValue(), 42)
+        with self.assertRaises(concurrent.futures.CancelledError):
+            future.result(timeout=10)
+
+    def test_outcome_after_cancel(self):
+        """Results and errors of cancelled futures are discarded"""
+        backend = GetValueAsyncTests.TestBackend()
+
+        for function in (lambda: 42, lambda: 1 / 0):
+            future = Proxy.ResultFuture(backend)
+            future.cancel()
+            future._run(function)
+
+            self.assertTrue(future.cancelled())
+
+    def test_concurrent_executions(self):
+        """The graph is executed once for concurrent requests"""
+        count = self.create_action()
+        backend = count.proxied_node.get_head().backend
+
+        futures = [count.GetValueAsync() for _ in range(3)]
+        backend.started.wait(10)
+        backend.allow_execution.set()
+
+        self.assertListEqual([f.result(timeout=10) for f in futures],
+                             [42, 42, 42])
+        self.assertEqual(backend.executions, 1)
+
+
+class ExecutionLockTest(unittest.TestCase):
+    """Check that every execution of a graph holds its execution lock"""
+
+    class TestBackend(Base.BaseBackend):
+        """
+        Test backend recording whether the execution lock of the graph is
+        held by the executions.
+        """
+
+        def __init__(self):
+            """Creates the list of recorded executions"""
+            self.locked = []
+
+        def record_lock(self, generator):
+            """Checks from another thread that the lock is held"""
+            lock = generator.head_node.execution_lock
+            acquired = []
+            thread = threading.Thread(
+                target=lambda: acquired.append(lock.acquire(blocking=False)))
+            thread.start()
+            thread.join()
+            if acquired[0]:
+                lock.release()
+            self.locked.append(not acquired[0])
+
+        def execute(self, generator):
+            """Records the lock"""
+            self.record_lock(generator)
+
+        def checkpoint(self, generator, node, directory, treename):
+            """Records the lock and returns no dataframe"""
+            self.record_lock(generator)
+
+        def execute_distributed(self, generator, distributed_node):
+            """Records the lock"""
+            self.record_lock(generator)
+
+        def execute_batches(self, generator, batch_node, batch_size=None,
+                            prefetch=1):
+            """Records the lock and yields a single batch"""
+            self.record_lock(generator)
+            yield {}
+
+        def distribute_files(self, includes_list):
+            """do nothing"""
+            pass
+
+        def make_dataframe(self, *args, **kwargs):
+            """Dummy make_dataframe"""
+            pass
+
+    def create_graph(self):
+        """Creates a graph and returns the proxy of its head node"""
+        hn = Node.HeadNode(1)
+        hn.backend = ExecutionLockTest.TestBackend()
+        return Proxy.TransformationProxy(hn)
+
+    def test_checkpoint(self):
+        """Checkpoints are written while holding the lock"""
+        node = self.create_graph()
+
+        node.Define("x", "1").Checkpoint("directory")
+
+        self.assertListEqual(node.backend.locked, [True])
+
+    def test_iter_batches(self):
+        """Batches are produced while holding the lock"""
+        node = self.create_graph()
+
+        batches = list(node.IterBatches(["x"]))
+
+        self.assertListEqual(batches, [{}])
+        self.assertListEqual(node.backend.locked, [True])
+
+    def test_instant_actions(self):
+        """Instant actions and distributed arrays hold the lock"""
+        node = self.create_graph()
+
+        node.AsNumpy(["x"])
+        node.AsNumpy(["x"], distributed=True)
+
+        self.assertListEqual(node.backend.locked, [True, True])